@@ -6,6 +6,7 @@
 #define DHTPIN3 6  // DHT22 두 번째 핀(히터)
 #define DHTTYPE22 DHT22
 #define DHTTYPE11 DHT11
+#define BAUD_RATE 9600
 
 // 3 펠티어
 // 7 히터팬
@@ -24,8 +25,18 @@ const int controlPins[] = {3, 7, 8, 11, 12, 13};
 const int numPins = sizeof(controlPins) / sizeof(controlPins[0]);
 int pinStates[numPins] = {0, 0, 0, 0, 0, 0};
 
+// 바이너리 텔레메트리 프레임 (리틀 엔디안, 20바이트)
+// sync(0xAA 0x55) | version | seq(u16) | 온도/습도 x3 (int16, 0.01 단위) | 핀 비트마스크 | CRC16
+// 시작 시 "proto bin" 명령을 받으면 JSON 대신 이 형식으로 전송
+const uint8_t FRAME_SYNC1 = 0xAA;
+const uint8_t FRAME_SYNC2 = 0x55;
+const uint8_t FRAME_VERSION = 1;
+const int FRAME_SIZE = 20;
+bool binaryMode = false;
+uint16_t frameSeq = 0;
+
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(BAUD_RATE);
   for (int i = 0; i < numPins; i++) {
     pinMode(controlPins[i], OUTPUT);
     digitalWrite(controlPins[i], LOW);
@@ -44,29 +55,13 @@ void loop() {
   float temp3 = dht3.readTemperature();
   float humidity3 = dht3.readHumidity();
 
-  // JSON 데이터 생성
-  StaticJsonDocument<256> jsonDoc;
-
-  JsonObject sensor1 = jsonDoc.createNestedObject("sensor1");
-  sensor1["temperature"] = isnan(temp1) ? NAN : temp1;
-  sensor1["humidity"] = isnan(humidity1) ? NAN : humidity1;
-
-  JsonObject sensor2 = jsonDoc.createNestedObject("sensor2");
-  sensor2["temperature"] = isnan(temp2) ? NAN : temp2;
-  sensor2["humidity"] = isnan(humidity2) ? NAN : humidity2;
-
-  JsonObject sensor3 = jsonDoc.createNestedObject("sensor3");
-  sensor3["temperature"] = isnan(temp3) ? NAN : temp3;
-  sensor3["humidity"] = isnan(humidity3) ? NAN : humidity3;
-
-  JsonArray pinArray = jsonDoc.createNestedArray("pinStates");
-  for (int i = 0; i < numPins; i++) {
-    pinArray.add(pinStates[i]);
+  if (binaryMode) {
+    float readings[6] = {temp1, humidity1, temp2, humidity2, temp3, humidity3};
+    sendBinaryFrame(readings);
+  } else {
+    sendJsonFrame(temp1, humidity1, temp2, humidity2, temp3, humidity3);
   }
 
-  serializeJson(jsonDoc, Serial);
-  Serial.println();
-
   // 시리얼 입력 처리
   if (Serial.available() > 0) {
     String input = Serial.readStringUntil('\n');
@@ -81,10 +76,18 @@ void loop() {
     else if (input == "0") {
       turnAllOff();
     } 
+    // on 명령 처리 (여러 핀 한 번에 켜기)
+    else if (input.startsWith("on ")) {
+      handleOnCommand(input);
+    } 
     // stop 명령 처리
     else if (input.startsWith("stop")) {
       handleStopCommand(input);
     } 
+    // 전송 형식 협상
+    else if (input.startsWith("proto ")) {
+      handleProtoCommand(input);
+    } 
     // 입력 오류
     else {
       Serial.println("Invalid command. Enter a valid pin number or '0' to turn all off.");
@@ -95,6 +98,99 @@ void loop() {
 }
 
 
+// JSON 형식 센서 데이터 전송
+void sendJsonFrame(float temp1, float humidity1, float temp2, float humidity2, float temp3, float humidity3) {
+  // JSON 데이터 생성
+  StaticJsonDocument<256> jsonDoc;
+
+  JsonObject sensor1 = jsonDoc.createNestedObject("sensor1");
+  sensor1["temperature"] = isnan(temp1) ? NAN : temp1;
+  sensor1["humidity"] = isnan(humidity1) ? NAN : humidity1;
+
+  JsonObject sensor2 = jsonDoc.createNestedObject("sensor2");
+  sensor2["temperature"] = isnan(temp2) ? NAN : temp2;
+  sensor2["humidity"] = isnan(humidity2) ? NAN : humidity2;
+
+  JsonObject sensor3 = jsonDoc.createNestedObject("sensor3");
+  sensor3["temperature"] = isnan(temp3) ? NAN : temp3;
+  sensor3["humidity"] = isnan(humidity3) ? NAN : humidity3;
+
+  JsonArray pinArray = jsonDoc.createNestedArray("pinStates");
+  for (int i = 0; i < numPins; i++) {
+    pinArray.add(pinStates[i]);
+  }
+
+  serializeJson(jsonDoc, Serial);
+  Serial.println();
+}
+
+// 0.01 단위 정수로 변환 (센서 오류(NaN)는 INT16_MIN)
+int16_t toCenti(float value) {
+  if (isnan(value)) {
+    return INT16_MIN;
+  }
+  return (int16_t)(value * 100.0 + (value >= 0 ? 0.5 : -0.5));
+}
+
+// CRC-16/CCITT-FALSE (다항식 0x1021, 초기값 0xFFFF)
+uint16_t crc16(const uint8_t* data, int length) {
+  uint16_t crc = 0xFFFF;
+  for (int i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+// 바이너리 형식 센서 데이터 전송
+void sendBinaryFrame(float readings[6]) {
+  uint8_t frame[FRAME_SIZE];
+  int n = 0;
+  frame[n++] = FRAME_SYNC1;
+  frame[n++] = FRAME_SYNC2;
+  frame[n++] = FRAME_VERSION;
+  frame[n++] = frameSeq & 0xFF;
+  frame[n++] = frameSeq >> 8;
+  for (int i = 0; i < 6; i++) {
+    int16_t value = toCenti(readings[i]);
+    frame[n++] = value & 0xFF;
+    frame[n++] = (value >> 8) & 0xFF;
+  }
+  uint8_t pinMask = 0;
+  for (int i = 0; i < numPins; i++) {
+    if (pinStates[i]) {
+      pinMask |= 1 << i;
+    }
+  }
+  frame[n++] = pinMask;
+  uint16_t crc = crc16(frame + 2, n - 2);  // sync를 제외한 나머지
+  frame[n++] = crc & 0xFF;
+  frame[n++] = crc >> 8;
+  Serial.write(frame, n);
+  frameSeq++;
+}
+
+// "proto bin" / "proto json" 명령으로 전송 형식 변경
+void handleProtoCommand(String command) {
+  command.remove(0, 6);  // "proto " 제거
+  command.trim();
+  if (command == "bin") {
+    binaryMode = true;
+  } else if (command == "json") {
+    binaryMode = false;
+  } else {
+    Serial.println("Invalid protocol. Use 'proto bin' or 'proto json'.");
+    return;
+  }
+  StaticJsonDocument<64> ackDoc;
+  ackDoc["ack"] = "proto";
+  ackDoc["mode"] = binaryMode ? "bin" : "json";
+  serializeJson(ackDoc, Serial);
+  Serial.println();
+}
+
 // 특정 핀 활성화 함수
 void controlPin(int pin) {
   for (int i = 0; i < numPins; i++) {
@@ -128,6 +224,38 @@ void handleStopCommand(String command) {
       }
     }
   }
+  sendAck("stop");
+}
+
+// "on 3 7 8 11 13" 형식으로 여러 핀을 한 번에 켜고 JSON 응답 한 번만 전송
+void handleOnCommand(String command) {
+  command.remove(0, 3);  // "on " 제거
+  while (command.length() > 0) {
+    int spaceIndex = command.indexOf(' ');
+    String pinString = (spaceIndex == -1) ? command : command.substring(0, spaceIndex);
+    command = (spaceIndex == -1) ? "" : command.substring(spaceIndex + 1);
+
+    int pin = pinString.toInt();
+    for (int i = 0; i < numPins; i++) {
+      if (controlPins[i] == pin) {
+        pinStates[i] = 1;
+        digitalWrite(controlPins[i], HIGH);
+      }
+    }
+  }
+  sendAck("on");
+}
+
+// {"ack":"on","pinStates":[...]} 형식의 명령 응답 전송
+void sendAck(const char* command) {
+  StaticJsonDocument<128> ackDoc;
+  ackDoc["ack"] = command;
+  JsonArray pinArray = ackDoc.createNestedArray("pinStates");
+  for (int i = 0; i < numPins; i++) {
+    pinArray.add(pinStates[i]);
+  }
+  serializeJson(ackDoc, Serial);
+  Serial.println();
 }
 
 // 모든 핀 끄기 함수
@@ -0,0 +1,178 @@
+"""uint8 배열용 데이터 증강 (img_processing.py에서 사용)
+
+PIL ImageEnhance 대신 LUT와 OpenCV 연산으로 처리하고, 같은 크기의 이미지를 쌓은 배열
+(N, H, W) 또는 (N, H, W, C)에 한 번에 적용함.
+
+    augmenter = Augmenter(seed=1234)
+    augmented = augmenter.apply_batch(np.repeat(image[np.newaxis], 8, axis=0))
+
+연산 종류(회전, 좌우 반전, 밝기, 대비, 채도, 선명도, 노이즈, 블러)와 범위는 이전 PIL 버전과
+같고, 이미지마다 1~3개를 고름. 적용 순서는 위 순서로 고정 (밝기와 대비는 LUT 하나로 합침).
+"""
+from functools import lru_cache
+import cv2
+import numpy as np
+
+OPERATIONS = ("rotate", "flip", "brightness", "contrast", "color", "sharpness", "noise", "blur")
+ROTATE_RANGE = (-30, 30)
+ENHANCE_RANGE = (0.7, 1.3)
+BLUR_RANGE = (1, 2)
+NOISE_SIGMA = 25
+
+# PIL ImageFilter.SMOOTH와 같은 커널 (ImageEnhance.Sharpness의 기준 이미지)
+SMOOTH_KERNEL = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13
+_RAMP = np.arange(256, dtype=np.float32)
+
+
+@lru_cache(maxsize=None)
+def gamma_lut(gamma):
+    """감마 보정 LUT"""
+    return (((_RAMP / 255.0) ** (1.0 / gamma)) * 255).astype(np.uint8)
+
+
+@lru_cache(maxsize=4096)
+def _affine_lut(scale, offset):
+    lut = _RAMP * scale
+    lut += offset
+    np.clip(lut, 0, 255, out=lut)
+    return lut.astype(np.uint8)
+
+
+def affine_lut(scale, offset):
+    """x * scale + offset LUT (같은 값이 다시 나오도록 scale은 0.001, offset은 0.1 단위로 반올림해서 캐시)"""
+    return _affine_lut(round(scale, 3), round(offset, 1))
+
+
+def gamma_correction(image, gamma):
+    return cv2.LUT(image, gamma_lut(gamma))
+
+
+def brightness_contrast_lut(brightness, contrast, histogram):
+    """ImageEnhance.Brightness(b) 다음 ImageEnhance.Contrast(c)를 LUT 하나로 합침
+
+    밝기: y = clip(b * x), 대비: z = clip(m + c * (y - m)) (m은 밝기 조절 후 평균으로
+    원본 히스토그램에서 계산) -> 두 LUT를 합성한 256개 값 하나로 적용
+    """
+    bright = affine_lut(brightness, 0.0)
+    mean = int(np.dot(histogram, bright) / histogram.sum() + 0.5)
+    return affine_lut(contrast, (1.0 - contrast) * mean)[bright]
+
+
+class Augmenter:
+    """이미지마다 연산과 인자를 고르고 적용 (RNG와 노이즈 버퍼는 재사용)"""
+    def __init__(self, seed=None, noise_sigma=NOISE_SIGMA, max_operations=3):
+        self.rng = np.random.default_rng(seed)
+        self.noise_sigma = noise_sigma
+        self.max_operations = max_operations
+        self._noise = None  # 이미지 한 장 크기의 float32 버퍼
+
+    def sample(self, n):
+        """n장에 적용할 연산 계획: 사용 여부 (n, 연산 수) 배열과 연산별 인자"""
+        count = self.rng.integers(1, self.max_operations + 1, size=n)
+        # 이미지마다 연산 순서를 무작위로 섞고 앞의 count개 사용
+        ranks = np.argsort(self.rng.random((n, len(OPERATIONS))), axis=1).argsort(axis=1)
+        enabled = ranks < count[:, np.newaxis]
+        return {
+            "enabled": {name: enabled[:, i] for i, name in enumerate(OPERATIONS)},
+            "angle": self.rng.uniform(*ROTATE_RANGE, size=n),
+            "brightness": self.rng.uniform(*ENHANCE_RANGE, size=n),
+            "contrast": self.rng.uniform(*ENHANCE_RANGE, size=n),
+            "color": self.rng.uniform(*ENHANCE_RANGE, size=n),
+            "sharpness": self.rng.uniform(*ENHANCE_RANGE, size=n),
+            "blur": self.rng.uniform(*BLUR_RANGE, size=n),
+        }
+
+    @staticmethod
+    def select(plan, index):
+        """계획에서 일부 이미지 몫만 (index는 slice 또는 인덱스 배열)"""
+        selected = {name: values[index] for name, values in plan.items() if name != "enabled"}
+        selected["enabled"] = {name: values[index] for name, values in plan["enabled"].items()}
+        return selected
+
+    def apply(self, image):
+        """이미지 한 장 증강 (원본은 그대로 두고 새 배열 반환)"""
+        return self.apply_batch(image[np.newaxis])[0]
+
+    def apply_batch(self, images, plan=None, inplace=False):
+        """같은 크기 uint8 이미지를 쌓은 배열 증강 (inplace=True면 images를 직접 수정)"""
+        if images.dtype != np.uint8:
+            raise ValueError(f"uint8 이미지만 지원: {images.dtype}")
+        if not inplace:
+            images = images.copy()
+        n = len(images)
+        plan = plan or self.sample(n)
+        enabled = plan["enabled"]
+
+        for i in np.flatnonzero(enabled["rotate"]):
+            images[i] = rotate(images[i], plan["angle"][i])
+
+        flip = np.flatnonzero(enabled["flip"])
+        if len(flip):
+            images[flip] = images[flip, :, ::-1]
+
+        self._brightness_contrast(images, plan)
+
+        if images.ndim == 4:
+            for i in np.flatnonzero(enabled["color"]):
+                saturate(images[i], plan["color"][i])
+
+        for i in np.flatnonzero(enabled["sharpness"]):
+            sharpen(images[i], plan["sharpness"][i])
+
+        for i in np.flatnonzero(enabled["noise"]):
+            self.add_noise(images[i])
+
+        for i in np.flatnonzero(enabled["blur"]):
+            images[i] = cv2.GaussianBlur(images[i], (0, 0), plan["blur"][i])
+
+        return images
+
+    def _brightness_contrast(self, images, plan):
+        """밝기/대비를 쓰는 이미지마다 LUT 하나를 만들어 한 번의 인덱싱으로 모두 적용"""
+        brightness_on = plan["enabled"]["brightness"]
+        contrast_on = plan["enabled"]["contrast"]
+        selected = np.flatnonzero(brightness_on | contrast_on)
+        if not len(selected):
+            return
+        brightness = np.where(brightness_on, plan["brightness"], 1.0)[selected]
+        contrast = np.where(contrast_on, plan["contrast"], 1.0)[selected]
+        luts = np.stack([
+            brightness_contrast_lut(b, c, np.bincount(images[i].ravel(), minlength=256))
+            for i, b, c in zip(selected, brightness, contrast)
+        ])
+        rows = np.arange(len(selected)).reshape((-1,) + (1,) * (images.ndim - 1))
+        images[selected] = luts[rows, images[selected]]
+
+    def add_noise(self, image):
+        """가우시안 노이즈를 더하고 0~255로 자름 (image를 직접 수정)"""
+        if self._noise is None or self._noise.shape != image.shape:
+            self._noise = np.empty(image.shape, dtype=np.float32)
+        noise = self._noise
+        self.rng.standard_normal(dtype=np.float32, out=noise)
+        noise *= self.noise_sigma
+        noise += image
+        np.clip(noise, 0, 255, out=noise)
+        np.copyto(image, noise, casting="unsafe")
+        return image
+
+
+def rotate(image, angle):
+    """가운데 기준 반시계 방향 회전 (PIL Image.rotate와 같이 크기 유지, 빈 곳은 검은색)"""
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D(((width - 1) / 2, (height - 1) / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_NEAREST,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+
+def saturate(image, factor):
+    """ImageEnhance.Color: 흑백 이미지와 섞음 (image를 직접 수정, RGB 순서)"""
+    gray = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+    image[...] = cv2.addWeighted(image, factor, gray, 1.0 - factor, 0)
+    return image
+
+
+def sharpen(image, factor):
+    """ImageEnhance.Sharpness: 부드럽게 한 이미지와 섞음 (image를 직접 수정)"""
+    smooth = cv2.filter2D(image, -1, SMOOTH_KERNEL, borderType=cv2.BORDER_REPLICATE)
+    image[...] = cv2.addWeighted(image, factor, smooth, 1.0 - factor, 0)
+    return image
@@ -1,35 +1,147 @@
+"""증강 이미지를 train/validation/test로 나눠 dataset/에 정리
+
+같은 원본 사진에서 나온 증강 이미지(<원본>_aug<i>.jpg)는 모두 같은 분할에 들어가도록
+원본 사진 단위로 나눔. 파일은 하드 링크(안 되면 심볼릭 링크)로 만들어 복사하지 않고,
+원본 폴더는 그대로 두므로 비율이나 시드를 바꿔 바로 다시 나눌 수 있음.
+분할 결과는 dataset/split.json에 기록.
+
+    python folder.py                               # 7:2:1, 시드 42
+    python folder.py --ratios 0.8,0.1,0.1 --seed 7
+    python folder.py --link symlink
+"""
 import os
+import re
+import json
+import time
+import random
 import shutil
-from sklearn.model_selection import train_test_split
+import argparse
 
 # 원본 데이터 디렉토리
-original_dir = "./figs/cropped/augmented"  # 파일이 저장된 폴더 이름
+original_dir = "./figs/cropped/augmented"  # 파일이 저장된 폴더 이름 (img_processing.py 출력)
+manifest_path = os.path.join(original_dir, "manifest.json")  # img_processing.py가 기록한 파일 목록
 output_dir = "./dataset"  # 정리된 데이터셋 폴더 이름
+index_name = "split.json"
 
 # 정리할 클래스 이름
 classes = ["boots", "shoes", "slipper", "sneakers"]
+splits = ["train", "validation", "test"]
+
+# 증강 이미지 이름에서 원본 사진 ID 추출 (boots12_aug3.jpg -> boots12)
+AUG_PATTERN = re.compile(r"_aug\d+$")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="증강 이미지를 train/validation/test로 정리")
+    parser.add_argument("--source-dir", default=original_dir)
+    parser.add_argument("--output-dir", default=output_dir)
+    parser.add_argument("--ratios", default="0.7,0.2,0.1", help="train,validation,test 비율")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--link", choices=["hard", "symlink", "copy"], default="hard",
+                        help="hard: 하드 링크 (다른 파일 시스템이면 심볼릭 링크로 대체)")
+    return parser.parse_args()
+
+
+def photo_id(filename):
+    return AUG_PATTERN.sub("", os.path.splitext(filename)[0])
+
+
+def load_groups(source_dir):
+    """클래스별 {원본 사진 ID: [증강 이미지 파일 이름]}
+
+    img_processing.py의 manifest가 있으면 그 목록을, 없으면 폴더의 파일 이름을 사용.
+    """
+    groups = {cls: {} for cls in classes}
+    path = os.path.join(source_dir, os.path.basename(manifest_path))
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            files = [
+                (entry["category"], name)
+                for entry in json.load(f)["entries"].values() for name in entry["outputs"]
+            ]
+    else:
+        files = [
+            (next((cls for cls in classes if name.startswith(cls)), None), name)
+            for name in os.listdir(source_dir) if name.endswith((".jpg", ".png", ".jpeg"))
+        ]
+    for cls, name in files:
+        if cls in groups:
+            groups[cls].setdefault(photo_id(name), []).append(name)
+    return groups
 
-# 데이터셋 비율 설정
-train_ratio = 0.7
-val_ratio = 0.2
-test_ratio = 0.1
 
-# 출력 디렉토리 생성
-for split in ["train", "validation", "test"]:
+def split_groups(ids, ratios, seed, cls):
+    """원본 사진 ID를 섞어서 비율대로 나눔 (클래스마다 다른 순서, 같은 시드면 같은 결과)"""
+    ids = sorted(ids)
+    random.Random(f"{seed}-{cls}").shuffle(ids)
+    total = sum(ratios)
+    n_test = round(len(ids) * ratios[2] / total)
+    n_val = round(len(ids) * ratios[1] / total)
+    return {
+        "test": ids[:n_test],
+        "validation": ids[n_test:n_test + n_val],
+        "train": ids[n_test + n_val:],
+    }
+
+
+def materialize(src_path, dest_path, link):
+    """복사 없이 분할 폴더에 파일 배치 (하드 링크 -> 심볼릭 링크 순으로 시도)"""
+    if link == "hard":
+        try:
+            os.link(src_path, dest_path)
+            return "hard"
+        except OSError:
+            link = "symlink"  # 다른 파일 시스템이거나 하드 링크를 지원하지 않음
+    if link == "symlink":
+        os.symlink(os.path.relpath(src_path, os.path.dirname(dest_path)), dest_path)
+        return "symlink"
+    shutil.copy2(src_path, dest_path)
+    return "copy"
+
+
+def main():
+    args = parse_args()
+    ratios = [float(ratio) for ratio in args.ratios.split(",")]
+    if len(ratios) != 3:
+        raise SystemExit("--ratios는 train,validation,test 세 값이어야 함")
+    start = time.perf_counter()
+    groups = load_groups(args.source_dir)
+
+    # 이전 분할 결과를 지우고 출력 디렉토리 생성 (링크만 지워지고 원본은 그대로)
+    for split in splits:
+        shutil.rmtree(os.path.join(args.output_dir, split), ignore_errors=True)
+        for cls in classes:
+            os.makedirs(os.path.join(args.output_dir, split, cls), exist_ok=True)
+
+    index = {
+        "source_dir": os.path.abspath(args.source_dir),
+        "ratios": dict(zip(splits, ratios)),
+        "seed": args.seed,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "photos": {},  # 원본 사진 ID -> 분할
+        "files": {split: {cls: [] for cls in classes} for split in splits},
+    }
+    methods = {}
     for cls in classes:
-        os.makedirs(os.path.join(output_dir, split, cls), exist_ok=True)
-
-# 클래스별로 파일 분리
-for cls in classes:
-    class_files = [f for f in os.listdir(original_dir) if f.startswith(cls)]
-    train_files, temp_files = train_test_split(class_files, test_size=(val_ratio + test_ratio), random_state=42)
-    val_files, test_files = train_test_split(temp_files, test_size=test_ratio / (val_ratio + test_ratio), random_state=42)
-
-    # 파일 이동
-    for split, files in zip(["train", "validation", "test"], [train_files, val_files, test_files]):
-        for file in files:
-            src_path = os.path.join(original_dir, file)
-            dest_path = os.path.join(output_dir, split, cls, file)
-            shutil.move(src_path, dest_path)
-
-print("데이터 정리가 완료되었습니다!")
+        assignment = split_groups(groups[cls], ratios, args.seed, cls)
+        for split in splits:
+            for group in assignment[split]:
+                index["photos"][group] = split
+                for name in sorted(groups[cls][group]):
+                    src_path = os.path.join(args.source_dir, name)
+                    dest_path = os.path.join(args.output_dir, split, cls, name)
+                    method = materialize(src_path, dest_path, args.link)
+                    methods[method] = methods.get(method, 0) + 1
+                    index["files"][split][cls].append(name)
+        print(f"{cls}: " + ", ".join(
+            f"{split} {len(assignment[split])}장({len(index['files'][split][cls])})" for split in splits
+        ))
+
+    with open(os.path.join(args.output_dir, index_name), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    print(f"링크 방식: {methods} ({time.perf_counter() - start:.2f}초)")
+    print("데이터 정리가 완료되었습니다!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,217 @@
+"""figs/의 원본 사진으로 학습용 증강 이미지 생성
+
+원본마다 한 번만 디코딩해서 크롭 -> 전처리(흑백, 평활화, 감마) -> 증강 N장 -> 크기 변경을
+메모리에서 처리하고 최종 이미지만 저장함. 여러 프로세스에서 나눠 처리.
+
+출력 폴더의 manifest.json에 원본 내용 해시와 처리 설정, 만들어진 파일 목록을 기록해서
+새로 추가되거나 바뀐 사진만 다시 처리하고, 지워진 사진의 증강 이미지는 삭제함.
+
+    python img_processing.py                      # CPU 수만큼 프로세스 사용
+    python img_processing.py --workers 2 --size 96
+    python img_processing.py --force              # 전부 다시 생성
+"""
 import os
-from PIL import Image, ImageEnhance, ImageFilter
-import random
+import json
+import time
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import cv2
 import numpy as np
 
-# 입력 및 출력 디렉토리 설정
+from augmentation import Augmenter, gamma_correction
+
+# 입력 및 출력 디렉토리 설정 (출력은 folder.py가 읽는 위치)
 input_dir = "figs"
-cropped_dir = os.path.join(input_dir, "cropped")
-processed_dir = os.path.join(cropped_dir, "preprocessd")
-augmented_dir = os.path.join(processed_dir, "augmented")
-resized_dir = os.path.join(augmented_dir, "resized")
+output_dir = os.path.join(input_dir, "cropped", "augmented")
+extensions = (".jpg", ".png", ".jpeg")
+manifest_name = "manifest.json"
+# 전처리/증강 코드를 바꿔서 같은 설정이라도 결과가 달라지면 올림 (전부 다시 생성)
+pipeline_version = 2
+
+# 데이터 증강: 데이터 불균형을 고려하여 증강 횟수를 조정
+augmentation_counts = {
+    "shoes": 21,
+    "boots": 21,
+    "slipper": 21,
+    "sneakers": 12
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="학습용 증강 이미지 생성")
+    parser.add_argument("--input-dir", default=input_dir)
+    parser.add_argument("--output-dir", default=output_dir)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="동시에 처리할 프로세스 수")
+    parser.add_argument("--seed", type=int, default=42, help="기준 시드 (이미지별 시드는 파일 이름과 조합)")
+    parser.add_argument("--size", type=int, default=224, help="저장할 이미지 크기 (model.py의 가장 큰 --img-size 이상)")
+    parser.add_argument("--crop-width", type=int, default=1500, help="오른쪽에서 잘라낼 픽셀 수")
+    parser.add_argument("--gamma", type=float, default=2.0)
+    parser.add_argument("--batch", type=int, default=8, help="한 번에 증강할 이미지 수 (프로세스당 메모리 = 원본 크기 x batch)")
+    parser.add_argument("--force", action="store_true", help="manifest를 무시하고 전부 다시 생성")
+    return parser.parse_args()
 
-# 디렉토리 생성
-os.makedirs(cropped_dir, exist_ok=True)
-os.makedirs(processed_dir, exist_ok=True)
-os.makedirs(augmented_dir, exist_ok=True)
-os.makedirs(resized_dir, exist_ok=True)
 
 # 이미지 크롭 함수
 def crop_image(image, crop_width=1500):
-    width, height = image.size
+    height, width = image.shape[:2]
     # 오른쪽에서 crop_width만큼 잘라내기
-    return image.crop((0, 0, width - crop_width, height))
-
-# figs 디렉토리의 모든 이미지를 크롭하고 저장
-for filename in os.listdir(input_dir):
-    if filename.endswith((".jpg", ".png", ".jpeg")):
-        input_path = os.path.join(input_dir, filename)
-        cropped_path = os.path.join(cropped_dir, filename)
-        with Image.open(input_path) as img:
-            cropped_img = crop_image(img)
-            cropped_img.save(cropped_path)
-            print(f"크롭 저장됨: {cropped_path}")
+    return image[:, :width - crop_width]
+
 
 # 이미지 전처리 함수
-def gamma_correction(image, gamma):
-    invGamma = 1.0 / gamma
-    table = np.array([((i / 255.0) ** invGamma) * 255 for i in range(256)]).astype("uint8")
-    return cv2.LUT(image, table)
-
-def preprocess_image(input_path, output_path):
-    img = cv2.imread(input_path)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+def preprocess_image(image, gamma=2.0):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     equalized = cv2.equalizeHist(gray)
-    gamma_corrected = gamma_correction(equalized, gamma=2.0)
-    cv2.imwrite(output_path, gamma_corrected)
-
-# 크롭된 이미지를 전처리하고 저장
-for filename in os.listdir(cropped_dir):
-    if filename.endswith((".jpg", ".png", ".jpeg")):
-        input_path = os.path.join(cropped_dir, filename)
-        processed_path = os.path.join(processed_dir, filename)
-        preprocess_image(input_path, processed_path)
-        print(f"전처리 저장됨: {processed_path}")
-
-# 증강을 위한 함수 정의
-def add_noise(image):
-    np_image = np.array(image)
-    noise = np.random.normal(0, 25, np_image.shape)
-    noisy_image = np_image + noise
-    noisy_image = np.clip(noisy_image, 0, 255)
-    return Image.fromarray(noisy_image.astype('uint8'))
-
-def augment_image(image):
-    operations = [
-        lambda x: x.rotate(random.uniform(-30, 30)),
-        lambda x: x.transpose(Image.FLIP_LEFT_RIGHT),
-        lambda x: ImageEnhance.Brightness(x).enhance(random.uniform(0.7, 1.3)),
-        lambda x: ImageEnhance.Contrast(x).enhance(random.uniform(0.7, 1.3)),
-        lambda x: ImageEnhance.Color(x).enhance(random.uniform(0.7, 1.3)),
-        lambda x: ImageEnhance.Sharpness(x).enhance(random.uniform(0.7, 1.3)),
-        lambda x: add_noise(x),
-        lambda x: x.filter(ImageFilter.GaussianBlur(radius=random.uniform(1, 2))),
-    ]
-    for operation in random.sample(operations, random.randint(1, 3)):
-        image = operation(image)
-    return image
+    return gamma_correction(equalized, gamma=gamma)
+
+
+def category_of(filename):
+    return "shoes" if "shoes" in filename else \
+           "boots" if "boots" in filename else \
+           "slipper" if "slipper" in filename else \
+           "sneakers"
+
+
+def image_seed(seed, filename):
+    """파일 이름으로 정해지는 시드 (처리 순서나 프로세스 수와 관계없이 같은 결과)"""
+    return zlib.crc32(filename.encode("utf-8")) ^ seed
+
+
+def file_hash(path):
+    """원본 파일 내용의 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"version": 1, "entries": {}}
+
+
+def save_manifest(manifest, path):
+    """임시 파일에 쓴 뒤 교체 (중간에 중단돼도 이전 manifest가 남음)"""
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def remove_outputs(entry, output_dir):
+    for name in entry.get("outputs", []):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def is_current(entry, digest, params, output_dir):
+    """manifest 기록과 원본 내용, 설정이 같고 결과 파일이 모두 남아 있으면 다시 처리하지 않음"""
+    return (
+        entry is not None
+        and entry["sha256"] == digest
+        and entry["params"] == params
+        and all(os.path.exists(os.path.join(output_dir, name)) for name in entry["outputs"])
+    )
+
+
+def process_image(input_path, output_dir, seed, size, crop_width, gamma, augmentations, batch=8):
+    """원본 한 장을 디코딩해서 증강 이미지들을 저장하고 저장한 파일 이름 목록 반환"""
+    filename = os.path.basename(input_path)
+    image = cv2.imread(input_path)
+    if image is None:
+        raise ValueError(f"이미지를 읽을 수 없음: {input_path}")
+    processed = preprocess_image(crop_image(image, crop_width), gamma)
+
+    augmenter = Augmenter(seed=image_seed(seed, filename))
+    plan = augmenter.sample(augmentations)  # batch 크기와 관계없이 같은 결과가 나오도록 한 번에 뽑음
+    buffer = np.empty((min(batch, augmentations),) + processed.shape, dtype=np.uint8)
+    outputs = []
+    for first in range(0, augmentations, batch):
+        images = buffer[:min(batch, augmentations - first)]
+        images[...] = processed
+        augmenter.apply_batch(images, Augmenter.select(plan, slice(first, first + len(images))), inplace=True)
+        for i, augmented in enumerate(images, first):
+            output_name = f"{os.path.splitext(filename)[0]}_aug{i}.jpg"
+            cv2.imwrite(os.path.join(output_dir, output_name), cv2.resize(augmented, (size, size), interpolation=cv2.INTER_AREA))
+            outputs.append(output_name)
+    return outputs
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, manifest_name)
+    manifest = load_manifest(manifest_path)
+    entries = manifest["entries"]
+    sources = sorted(
+        os.path.join(args.input_dir, filename) for filename in os.listdir(args.input_dir)
+        if filename.endswith(extensions)
+    )
+
+    # 원본이 지워진 항목의 증강 이미지 삭제
+    names = {os.path.basename(path) for path in sources}
+    removed = [filename for filename in entries if filename not in names]
+    for filename in removed:
+        remove_outputs(entries.pop(filename), args.output_dir)
+
+    pending = []
+    for path in sources:
+        filename = os.path.basename(path)
+        category = category_of(filename)
+        params = {
+            "pipeline": pipeline_version,
+            "crop_width": args.crop_width,
+            "gamma": args.gamma,
+            "size": args.size,
+            "seed": args.seed,
+            "augmentations": augmentation_counts.get(category, 10),
+        }
+        digest = file_hash(path)
+        entry = entries.get(filename)
+        if not args.force and is_current(entry, digest, params, args.output_dir):
+            continue
+        if entry is not None:
+            # 바뀐 원본은 이전 결과를 지우고 다시 생성 (증강 횟수가 줄어도 남는 파일이 없게)
+            remove_outputs(entries.pop(filename), args.output_dir)
+        pending.append((path, filename, category, digest, params))
+
+    print(f"원본 {len(sources)}장: 처리 {len(pending)}장, 최신 {len(sources) - len(pending)}장, 삭제 {len(removed)}장")
+
+    start = time.perf_counter()
+    total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = {
+                executor.submit(process_image, path, args.output_dir, args.seed, args.size,
+                                args.crop_width, args.gamma, params["augmentations"], args.batch): (path, filename, category, digest, params)
+                for path, filename, category, digest, params in pending
+            }
+            for future in as_completed(futures):
+                path, filename, category, digest, params = futures[future]
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    print(f"처리 실패: {path} ({e})")
+                    continue
+                entries[filename] = {"sha256": digest, "category": category, "params": params, "outputs": outputs}
+                total += len(outputs)
+                print(f"증강 저장됨: {path} -> {len(outputs)}장")
+    finally:
+        save_manifest(manifest, manifest_path)
+
+    # manifest에 없는 이전 결과 삭제 (이전 버전이나 중단된 실행이 남긴 파일)
+    known = {name for entry in entries.values() for name in entry["outputs"]}
+    stale = [name for name in os.listdir(args.output_dir) if name.endswith(extensions) and name not in known]
+    for name in stale:
+        os.remove(os.path.join(args.output_dir, name))
+
+    print(f"증강 {total}장 생성, 오래된 파일 {len(stale)}개 삭제 ({time.perf_counter() - start:.1f}초, 프로세스 {args.workers}개)")
 
-# 데이터 증강: 데이터 불균형을 고려하여 증강 횟수를 조정
-augmentation_counts = {
-    "shoes": 21,
-    "boots": 21,
-    "slipper": 21,
-    "sneakers": 12
-}
 
-for filename in os.listdir(processed_dir):
-    if filename.endswith((".jpg", ".png", ".jpeg")):
-        input_path = os.path.join(processed_dir, filename)
-        category = "shoes" if "shoes" in filename else \
-                   "boots" if "boots" in filename else \
-                   "slipper" if "slipper" in filename else \
-                   "sneakers"
-        augmentation_count = augmentation_counts.get(category, 10)
-        
-        with Image.open(input_path) as img:
-            for i in range(augmentation_count):
-                augmented_img = augment_image(img)
-                output_path = os.path.join(augmented_dir, f"{os.path.splitext(filename)[0]}_aug{i}.jpg")
-                augmented_img.save(output_path)
-                print(f"증강 저장됨: {output_path}")
-
-# 증강된 이미지를 96x96 크기로 변환 및 저장
-for filename in os.listdir(augmented_dir):
-    if filename.endswith((".jpg", ".png", ".jpeg")):
-        input_path = os.path.join(augmented_dir, filename)
-        resized_path = os.path.join(resized_dir, filename)
-        with Image.open(input_path) as img:
-            resized_img = img.resize((96, 96))
-            resized_img.save(resized_path)
-            print(f"크기 변경 저장됨: {resized_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""model.py --sweep로 만든 TFLite 모델들의 지연 시간을 실행하는 장비(라즈베리파이)에서 다시 측정
+
+    python measure_latency.py tflite/sweep            # 하위 폴더의 모든 .tflite 측정
+    python measure_latency.py tflite/sweep --threads 4 --runs 100
+
+측정값은 각 모델의 .json 메타데이터에 device_latency_ms로 추가되고
+정확도(학습 장비에서 측정)와 함께 device_report.csv로 저장됨.
+"""
+import os
+import json
+import time
+import glob
+import argparse
+import platform
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+
+def measure(path, threads, runs, warmup):
+    """무작위 입력으로 invoke 지연 시간 측정 (ms)"""
+    interpreter = Interpreter(model_path=path, num_threads=threads)
+    interpreter.allocate_tensors()
+    input_details = interpreter.get_input_details()[0]
+    rng = np.random.default_rng(0)
+    if input_details["dtype"] == np.float32:
+        data = rng.random(input_details["shape"], dtype=np.float32)
+    else:
+        info = np.iinfo(input_details["dtype"])
+        data = rng.integers(info.min, info.max, input_details["shape"], endpoint=True).astype(input_details["dtype"])
+    interpreter.set_tensor(input_details["index"], data)
+
+    latencies = []
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        interpreter.invoke()
+        if i >= warmup:
+            latencies.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "mean": float(latencies_ms.mean()),
+        "p50": float(np.percentile(latencies_ms, 50)),
+        "p90": float(np.percentile(latencies_ms, 90)),
+        "threads": threads,
+        "device": f"{platform.node()} {platform.machine()}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TFLite 모델 장비 지연 시간 측정")
+    parser.add_argument("directory", nargs="?", default="tflite/sweep")
+    parser.add_argument("--threads", type=int, default=4, help="ModelHandler와 같은 쓰레드 수")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for path in sorted(glob.glob(os.path.join(args.directory, "**", "*.tflite"), recursive=True)):
+        metadata_path = os.path.splitext(path)[0] + ".json"
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path, encoding="utf-8") as f:
+                metadata = json.load(f)
+        metadata["device_latency_ms"] = measure(path, args.threads, args.runs, args.warmup)
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        rows.append((path, metadata))
+        print(f"{path}: p50 {metadata['device_latency_ms']['p50']:.1f}ms")
+
+    rows.sort(key=lambda row: row[1]["device_latency_ms"]["p50"])
+    report_path = os.path.join(args.directory, "device_report.csv")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("backbone,alpha,img_size,variant,accuracy,device_p50_ms,device_p90_ms,path\n")
+        for path, metadata in rows:
+            accuracy = metadata.get("accuracy")
+            f.write(f"{metadata.get('backbone', '')},{metadata.get('alpha', '')},"
+                    f"{(metadata.get('input_size') or [''])[0]},{metadata.get('variant', '')},"
+                    f"{'' if accuracy is None else f'{accuracy:.4f}'},"
+                    f"{metadata['device_latency_ms']['p50']:.2f},{metadata['device_latency_ms']['p90']:.2f},{path}\n")
+    print(f"보고서 저장: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
+import os
+import json
+import time
+import argparse
+import itertools
+import platform
 import tensorflow as tf
 from tensorflow.keras.preprocessing import image_dataset_from_directory
 import matplotlib.pyplot as plt
@@ -5,149 +11,386 @@ from tensorflow.keras import layers, models
 from sklearn.metrics import classification_report
 import numpy as np
 
+from shards import ShardReader
+
 
 # 데이터 경로
 train_dir = "dataset/train"
 val_dir = "dataset/validation"
 test_dir = "dataset/test"
 
-# 데이터 로드
-batch_size = 32
-img_size = (224, 224)  # 입력 이미지 크기
-
-train_dataset = image_dataset_from_directory(
-    train_dir,
-    image_size=img_size,
-    batch_size=batch_size
-)
-
-class_names = train_dataset.class_names
-
-val_dataset = image_dataset_from_directory(
-    val_dir,
-    image_size=img_size,
-    batch_size=batch_size
-)
-
-
-# 테스트 데이터 로드
-test_dataset = image_dataset_from_directory(
-    test_dir,
-    image_size=img_size,
-    batch_size=batch_size
-)
-
-# 데이터 증강
-data_augmentation = tf.keras.Sequential([
-    tf.keras.layers.RandomBrightness(0.2),  # 밝기를 20% 범위에서 무작위 변경
-    tf.keras.layers.RandomContrast(0.2),    # 대비도를 20% 범위에서 무작위 변경
-    tf.keras.layers.RandomFlip("horizontal")  # 수평 대칭
-])
-
-# 전처리 및 데이터 증강 적용
-AUTOTUNE = tf.data.AUTOTUNE
-train_dataset = (
-    train_dataset
-    .map(lambda x, y: (data_augmentation(x), y), num_parallel_calls=AUTOTUNE)
-    .cache()
-    .shuffle(1000)
-    .prefetch(buffer_size=AUTOTUNE)
-)
-val_dataset = val_dataset.cache().prefetch(buffer_size=AUTOTUNE)
-test_dataset = test_dataset.cache().prefetch(buffer_size=AUTOTUNE)
-
-# MobileNetV2 기반 모델 구성
-base_model = tf.keras.applications.MobileNetV2(
-    input_shape=(224, 224, 3),
-    include_top=False,
-    weights='imagenet'
-)
-
-base_model.trainable = False
-
-model = models.Sequential([
-    base_model,
-    layers.GlobalAveragePooling2D(),
-    layers.Dense(
-        len(class_names),
-        activation='softmax',
+RESOLUTIONS = [96, 128, 160, 224]
+# (백본, 폭 배율) - MobileNetV2의 ImageNet 가중치가 있는 배율만 사용
+BACKBONES = {
+    "mobilenet_v2": [0.35, 0.5, 1.0],
+    "mobilenet_v3_small": [1.0],
+}
+VARIANTS = ["float32", "dynamic", "float16", "int8"]
+representative_samples = 200  # int8 입력 범위 보정에 사용할 학습 이미지 수
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="신발 분류 모델 학습 및 TFLite 변환")
+    parser.add_argument("--img-size", type=int, default=224, choices=RESOLUTIONS, help="입력 해상도 (정사각형)")
+    parser.add_argument("--backbone", default="mobilenet_v2", choices=list(BACKBONES))
+    parser.add_argument("--alpha", type=float, default=1.0, help="MobileNetV2 폭 배율 (0.35, 0.5, 1.0)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=35)
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="만들 TFLite 변환 (쉼표로 구분)")
+    parser.add_argument("--out-dir", default="tflite")
+    parser.add_argument("--name", default="model", help="TFLite 파일 이름 (model.tflite, model_int8.tflite, ...)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="해상도 x 백본 조합을 모두 학습하고 정확도/지연 시간 보고서 작성")
+    parser.add_argument("--sweep-sizes", default=",".join(map(str, RESOLUTIONS)))
+    parser.add_argument("--sweep-backbones", default=",".join(
+        f"{backbone}:{alpha}" for backbone, alphas in BACKBONES.items() for alpha in alphas
+    ), help="백본:배율 목록 (예: mobilenet_v2:0.35,mobilenet_v3_small:1.0)")
+    parser.add_argument("--shards", default=None,
+                        help="shards.py로 만든 샤드 폴더 (예: shards/224, 없으면 dataset/ 이미지를 직접 읽음)")
+    parser.add_argument("--no-plot", action="store_true", help="학습 곡선 그래프 저장 안 함")
+    return parser.parse_args()
+
+
+def normalize(x, y):
+    # 입력은 ui/funs/ModelHandler.py와 같이 0~1 범위 (int8 변환 시 입력 범위 보정에도 같은 범위 사용)
+    return x / 255.0, y
+
+
+def shard_dataset(split_dir, img_size, batch_size, shuffle=False):
+    """shards.py로 만든 샤드를 메모리 맵으로 배치 단위로 읽는 데이터셋 (float32 0~255, 라벨)"""
+    reader = ShardReader(split_dir)
+    epochs = itertools.count()
+
+    def generator():
+        # 에포크마다 샤드/이미지 순서를 다시 섞음
+        yield from reader.batches(batch_size, shuffle=shuffle, seed=next(epochs) if shuffle else None)
+
+    dataset = tf.data.Dataset.from_generator(generator, output_signature=(
+        tf.TensorSpec((None, reader.img_size, reader.img_size, 3), tf.uint8),
+        tf.TensorSpec((None,), tf.int32),
+    ))
+    dataset = dataset.map(lambda x, y: (tf.cast(x, tf.float32), y))
+    if reader.img_size != img_size:
+        dataset = dataset.map(lambda x, y: (tf.image.resize(x, (img_size, img_size)), y))
+    return dataset, reader.class_names
+
+
+def load_datasets(img_size, batch_size, shard_dir=None):
+    """학습/검증/테스트 데이터셋 (학습 데이터만 증강)과 int8 변환용 증강 없는 학습 데이터
+
+    shard_dir이 있으면 shards.py로 만든 샤드를 읽고 (메모리에 캐시하지 않음), 없으면
+    dataset/ 폴더의 이미지를 읽어 디코딩한 결과를 캐시함. 증강은 캐시 뒤에 적용해서
+    에포크마다 다른 증강이 나오게 함.
+    """
+    AUTOTUNE = tf.data.AUTOTUNE
+    if shard_dir:
+        train_dataset, class_names = shard_dataset(os.path.join(shard_dir, "train"), img_size, batch_size, shuffle=True)
+        val_dataset, _ = shard_dataset(os.path.join(shard_dir, "validation"), img_size, batch_size)
+        test_dataset, _ = shard_dataset(os.path.join(shard_dir, "test"), img_size, batch_size)
+    else:
+        size = (img_size, img_size)
+        train_dataset = image_dataset_from_directory(train_dir, image_size=size, batch_size=batch_size)
+        class_names = train_dataset.class_names
+        val_dataset = image_dataset_from_directory(val_dir, image_size=size, batch_size=batch_size)
+        test_dataset = image_dataset_from_directory(test_dir, image_size=size, batch_size=batch_size, shuffle=False)
+        train_dataset = train_dataset.cache().shuffle(1000)
+        val_dataset = val_dataset.cache()
+        test_dataset = test_dataset.cache()
+    representative = train_dataset.map(normalize)
+
+    # 데이터 증강 (0~255 범위에서 적용)
+    data_augmentation = tf.keras.Sequential([
+        tf.keras.layers.RandomBrightness(0.2),  # 밝기를 20% 범위에서 무작위 변경
+        tf.keras.layers.RandomContrast(0.2),    # 대비도를 20% 범위에서 무작위 변경
+        tf.keras.layers.RandomFlip("horizontal")  # 수평 대칭
+    ])
+
+    # 데이터 증강 및 전처리 적용
+    train_dataset = (
+        train_dataset
+        .map(lambda x, y: (data_augmentation(x, training=True), y), num_parallel_calls=AUTOTUNE)
+        .map(normalize, num_parallel_calls=AUTOTUNE)
+        .prefetch(buffer_size=AUTOTUNE)
     )
-])
-
-# 학습률 설정 및 모델 컴파일
-initial_learning_rate = 0.001  # 초기 학습률
-optimizer = tf.keras.optimizers.Adam(learning_rate=initial_learning_rate)
-model.compile(
-    optimizer=optimizer,
-    loss='sparse_categorical_crossentropy',
-    metrics=['accuracy']
-)
-
-early_stopping = tf.keras.callbacks.EarlyStopping(
-    monitor='val_loss',
-    patience=5,
-    restore_best_weights=True
-)
-
-lr_scheduler = tf.keras.callbacks.ReduceLROnPlateau(
-    monitor='val_loss',
-    factor=0.2,
-    patience=3,
-    min_lr=1e-6
-)
-
-# 모델 학습
-epochs = 35
-history = model.fit(
-    train_dataset,
-    validation_data=val_dataset,
-    epochs=epochs,
-    callbacks=[early_stopping, lr_scheduler]
-)
-
-
-# 모델 평가
-test_loss, test_accuracy = model.evaluate(test_dataset)
-print(f"테스트 정확도: {test_accuracy:.2f}")
-
-y_true = np.concatenate([y for _, y in test_dataset], axis=0)
-y_pred_probs = model.predict(test_dataset)
-y_pred = np.argmax(y_pred_probs, axis=1)
-
-print("\n클래스별 성능 보고서:")
-print(classification_report(y_true, y_pred, target_names=class_names))
-
-# 모델 저장
-model.save('saved_model/my_model')
-
-# TFLite 변환
-converter = tf.lite.TFLiteConverter.from_saved_model('saved_model/my_model')
-tflite_model = converter.convert()
-
-# TFLite 모델 저장
-with open('model.tflite', 'wb') as f:
-    f.write(tflite_model)
-
-# Accuracy와 Loss 시각화
-plt.figure(figsize=(12, 6))
-
-# Accuracy 그래프
-plt.subplot(1, 2, 1)  # 1행 2열의 첫 번째 서브플롯
-plt.plot(history.history['accuracy'], label='Train Accuracy')
-plt.plot(history.history['val_accuracy'], label='Validation Accuracy')
-plt.xlabel('Epochs')
-plt.ylabel('Accuracy')
-plt.legend()
-
-# Loss 그래프
-plt.subplot(1, 2, 2)  # 1행 2열의 두 번째 서브플롯
-plt.plot(history.history['loss'], label='Train Loss')
-plt.plot(history.history['val_loss'], label='Validation Loss')
-plt.xlabel('Epochs')
-plt.ylabel('Loss')
-plt.legend()
-
-# 그래프 저장
-plt.tight_layout()
-plt.savefig('./accloss.png')
-print("저장되었습니다")
+    val_dataset = val_dataset.map(normalize).prefetch(buffer_size=AUTOTUNE)
+    test_dataset = test_dataset.map(normalize).prefetch(buffer_size=AUTOTUNE)
+    return train_dataset, val_dataset, test_dataset, class_names, representative
+
+
+def build_model(backbone, alpha, img_size, num_classes):
+    """ImageNet 가중치 백본 + 분류층 (입력 0~1을 백본이 기대하는 -1~1로 변환하는 층 포함)"""
+    input_shape = (img_size, img_size, 3)
+    if backbone == "mobilenet_v2":
+        base_model = tf.keras.applications.MobileNetV2(
+            input_shape=input_shape, alpha=alpha, include_top=False, weights='imagenet'
+        )
+    elif backbone == "mobilenet_v3_small":
+        base_model = tf.keras.applications.MobileNetV3Small(
+            input_shape=input_shape, alpha=alpha, include_top=False, weights='imagenet',
+            include_preprocessing=False
+        )
+    else:
+        raise ValueError(f"지원하지 않는 백본: {backbone}")
+
+    base_model.trainable = False
+
+    return models.Sequential([
+        layers.Input(shape=input_shape),
+        layers.Rescaling(2.0, offset=-1.0),
+        base_model,
+        layers.GlobalAveragePooling2D(),
+        layers.Dense(
+            num_classes,
+            activation='softmax',
+        )
+    ])
+
+
+def train(model, train_dataset, val_dataset, epochs):
+    # 학습률 설정 및 모델 컴파일
+    initial_learning_rate = 0.001  # 초기 학습률
+    optimizer = tf.keras.optimizers.Adam(learning_rate=initial_learning_rate)
+    model.compile(
+        optimizer=optimizer,
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    early_stopping = tf.keras.callbacks.EarlyStopping(
+        monitor='val_loss',
+        patience=5,
+        restore_best_weights=True
+    )
+
+    lr_scheduler = tf.keras.callbacks.ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=0.2,
+        patience=3,
+        min_lr=1e-6
+    )
+
+    # 모델 학습
+    return model.fit(
+        train_dataset,
+        validation_data=val_dataset,
+        epochs=epochs,
+        callbacks=[early_stopping, lr_scheduler]
+    )
+
+
+def representative_dataset(dataset):
+    """증강 없는 학습 이미지 (추론 때와 같은 0~1 범위)"""
+    def generator():
+        for image, _ in dataset.unbatch().take(representative_samples):
+            yield [tf.cast(image[tf.newaxis], tf.float32)]
+    return generator
+
+
+def convert(saved_model_dir, variant, representative):
+    """TFLite 변환: float32(최적화 없음), dynamic(가중치 int8), float16, int8(입출력 포함 정수)"""
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    if variant in ("dynamic", "float16", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    if variant == "int8":
+        converter.representative_dataset = representative_dataset(representative)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def evaluate_tflite(path, dataset, warmup=5):
+    """TFLite 모델의 테스트 정확도와 이미지 한 장당 추론 시간 측정 (ModelHandler와 같은 양자화 처리)"""
+    interpreter = tf.lite.Interpreter(model_path=path, num_threads=4)
+    interpreter.allocate_tensors()
+    input_details = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()[0]
+    input_scale, input_zero_point = input_details["quantization"]
+    output_scale, output_zero_point = output_details["quantization"]
+
+    correct, total, latencies = 0, 0, []
+    for images, labels in dataset:
+        for image, label in zip(images.numpy(), labels.numpy()):
+            if input_details["dtype"] != np.float32:
+                info = np.iinfo(input_details["dtype"])
+                image = np.clip(np.round(image / input_scale + input_zero_point), info.min, info.max)
+            interpreter.set_tensor(input_details["index"], image[np.newaxis].astype(input_details["dtype"]))
+            start = time.perf_counter()
+            interpreter.invoke()
+            latencies.append(time.perf_counter() - start)
+            output = interpreter.get_tensor(output_details["index"])[0]
+            if output_details["dtype"] != np.float32:
+                output = (output.astype(np.float32) - output_zero_point) * output_scale
+            correct += int(np.argmax(output) == label)
+            total += 1
+
+    latencies_ms = np.array(latencies[warmup:] or latencies) * 1000
+    return {
+        "accuracy": correct / total if total else None,
+        "latency_ms": {
+            "mean": float(latencies_ms.mean()),
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p90": float(np.percentile(latencies_ms, 90)),
+        },
+        "samples": total,
+    }
+
+
+def export_variants(saved_model_dir, out_dir, name, variants, test_dataset, representative, info):
+    """변환별 .tflite와 같은 이름의 .json 메타데이터(정확도, 지연 시간 등) 저장"""
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    for variant in variants:
+        suffix = "" if variant == "float32" else f"_{variant}"
+        path = os.path.join(out_dir, f"{name}{suffix}.tflite")
+        with open(path, 'wb') as f:
+            f.write(convert(saved_model_dir, variant, representative))
+
+        metadata = {
+            "variant": variant,
+            "file": os.path.basename(path),
+            "size_bytes": os.path.getsize(path),
+            **info,
+            **evaluate_tflite(path, test_dataset),
+            "measured_on": f"{platform.system()} {platform.machine()}",  # 지연 시간은 변환한 장비 기준
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        print(f"{variant}: 정확도 {metadata['accuracy']:.3f}, 지연 {metadata['latency_ms']['p50']:.1f}ms, "
+              f"크기 {metadata['size_bytes'] / 1024:.0f}KB -> {path}")
+        results.append({**metadata, "path": path})
+    return results
+
+
+def save_plot(history, path):
+    # Accuracy와 Loss 시각화
+    plt.figure(figsize=(12, 6))
+
+    # Accuracy 그래프
+    plt.subplot(1, 2, 1)  # 1행 2열의 첫 번째 서브플롯
+    plt.plot(history.history['accuracy'], label='Train Accuracy')
+    plt.plot(history.history['val_accuracy'], label='Validation Accuracy')
+    plt.xlabel('Epochs')
+    plt.ylabel('Accuracy')
+    plt.legend()
+
+    # Loss 그래프
+    plt.subplot(1, 2, 2)  # 1행 2열의 두 번째 서브플롯
+    plt.plot(history.history['loss'], label='Train Loss')
+    plt.plot(history.history['val_loss'], label='Validation Loss')
+    plt.xlabel('Epochs')
+    plt.ylabel('Loss')
+    plt.legend()
+
+    # 그래프 저장
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    print("저장되었습니다")
+
+
+def run(backbone, alpha, img_size, batch_size, epochs, variants, out_dir, name, plot=True, shard_dir=None):
+    """한 조합을 학습하고 평가한 뒤 TFLite 변환까지 수행"""
+    train_dataset, val_dataset, test_dataset, class_names, representative = load_datasets(img_size, batch_size, shard_dir)
+    model = build_model(backbone, alpha, img_size, len(class_names))
+    history = train(model, train_dataset, val_dataset, epochs)
+
+    # 모델 평가
+    test_loss, test_accuracy = model.evaluate(test_dataset)
+    print(f"테스트 정확도: {test_accuracy:.2f}")
+
+    y_true = np.concatenate([y for _, y in test_dataset], axis=0)
+    y_pred_probs = model.predict(test_dataset)
+    y_pred = np.argmax(y_pred_probs, axis=1)
+
+    print("\n클래스별 성능 보고서:")
+    report = classification_report(y_true, y_pred, target_names=class_names, output_dict=True)
+    print(classification_report(y_true, y_pred, target_names=class_names))
+
+    # 모델 저장
+    run_name = f"{backbone}_{alpha:g}_{img_size}"
+    saved_model_dir = os.path.join('saved_model', run_name)
+    model.save(saved_model_dir)
+
+    info = {
+        "backbone": backbone,
+        "alpha": alpha,
+        "input_size": [img_size, img_size],
+        "batch_size": batch_size,
+        "epochs_trained": len(history.history['loss']),
+        "class_names": class_names,
+        "keras_test_accuracy": float(test_accuracy),
+        # 클래스별 재현율 (부츠/구두/슬리퍼/운동화를 고르게 구분하는지 확인)
+        "recall": {name: report[name]["recall"] for name in class_names},
+    }
+    results = export_variants(saved_model_dir, out_dir, name, variants, test_dataset, representative, info)
+    if plot:
+        save_plot(history, os.path.join(out_dir, 'accloss.png'))
+    return results
+
+
+def pareto_front(rows):
+    """지연 시간이 더 짧으면서 정확도도 같거나 높은 다른 결과가 없는 행"""
+    front = []
+    for row in rows:
+        dominated = any(
+            other is not row
+            and other["latency_ms"]["p50"] <= row["latency_ms"]["p50"]
+            and other["accuracy"] >= row["accuracy"]
+            and (other["latency_ms"]["p50"], other["accuracy"]) != (row["latency_ms"]["p50"], row["accuracy"])
+            for other in rows
+        )
+        if not dominated:
+            front.append(row)
+    return front
+
+
+def sweep(args):
+    """해상도 x 백본 조합을 모두 학습하고 정확도와 지연 시간 보고서 작성"""
+    sizes = [int(size) for size in args.sweep_sizes.split(",")]
+    backbones = [(item.split(":")[0], float(item.split(":")[1])) for item in args.sweep_backbones.split(",")]
+    variants = args.variants.split(",")
+    sweep_dir = os.path.join(args.out_dir, "sweep")
+
+    rows = []
+    for (backbone, alpha), img_size in itertools.product(backbones, sizes):
+        print(f"\n===== {backbone} (alpha {alpha:g}), {img_size}x{img_size} =====")
+        out_dir = os.path.join(sweep_dir, f"{backbone}_{alpha:g}_{img_size}")
+        rows.extend(run(backbone, alpha, img_size, args.batch_size, args.epochs, variants,
+                        out_dir, args.name, plot=not args.no_plot, shard_dir=args.shards))
+        tf.keras.backend.clear_session()
+
+    front = pareto_front(rows)
+    rows.sort(key=lambda row: row["latency_ms"]["p50"])
+    with open(os.path.join(sweep_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(sweep_dir, "report.csv"), "w", encoding="utf-8") as f:
+        f.write("backbone,alpha,img_size,variant,accuracy,min_recall,latency_p50_ms,size_kb,pareto,path\n")
+        for row in rows:
+            f.write(f"{row['backbone']},{row['alpha']:g},{row['input_size'][0]},{row['variant']},"
+                    f"{row['accuracy']:.4f},{min(row['recall'].values()):.4f},{row['latency_ms']['p50']:.2f},"
+                    f"{row['size_bytes'] / 1024:.0f},{int(row in front)},{row['path']}\n")
+
+    print(f"\n{'backbone':<20}{'alpha':>6}{'size':>6}{'variant':>9}{'acc':>8}{'minrec':>8}{'p50 ms':>9}")
+    for row in rows:
+        mark = " *" if row in front else ""
+        print(f"{row['backbone']:<20}{row['alpha']:>6g}{row['input_size'][0]:>6}{row['variant']:>9}"
+              f"{row['accuracy']:>8.3f}{min(row['recall'].values()):>8.3f}{row['latency_ms']['p50']:>9.2f}{mark}")
+    print(f"\n* = 정확도/지연 시간 파레토 최적. 보고서: {sweep_dir}/report.csv")
+    print("라즈베리파이 지연 시간은 camera/measure_latency.py로 다시 측정하세요.")
+
+
+def main():
+    args = parse_args()
+    if args.sweep:
+        sweep(args)
+    else:
+        run(args.backbone, args.alpha, args.img_size, args.batch_size, args.epochs,
+            args.variants.split(","), args.out_dir, args.name, plot=not args.no_plot, shard_dir=args.shards)
+
+
+if __name__ == "__main__":
+    main()
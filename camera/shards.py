@@ -0,0 +1,148 @@
+"""정리된 데이터셋(dataset/{train,validation,test}/<클래스>/*.jpg)을 크기를 맞춘 uint8 NumPy 샤드로 묶음
+
+작은 JPEG 수천 장을 매번 디코딩하는 대신 샤드를 메모리 맵으로 열어 배치 단위로 읽음
+(model.py --shards에서 사용, 메모리 사용량은 배치 크기로 제한됨).
+
+    python shards.py dataset shards/224 --img-size 224
+    -> shards/224/train/images-00000.npy, labels-00000.npy, ..., index.json
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+splits = ["train", "validation", "test"]
+extensions = (".jpg", ".png", ".jpeg")
+index_name = "index.json"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="데이터셋을 NumPy 샤드로 묶기")
+    parser.add_argument("dataset_dir", nargs="?", default="dataset")
+    parser.add_argument("out_dir", nargs="?", default=None, help="기본: shards/<img-size>")
+    parser.add_argument("--img-size", type=int, default=224)
+    parser.add_argument("--shard-size", type=int, default=2048, help="샤드 하나에 넣을 이미지 수")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="디코딩 쓰레드 수")
+    parser.add_argument("--seed", type=int, default=0, help="저장 순서를 섞을 시드")
+    return parser.parse_args()
+
+
+def list_files(split_dir):
+    """image_dataset_from_directory와 같은 클래스 순서(폴더 이름 정렬)로 (경로, 라벨) 목록"""
+    class_names = sorted(
+        name for name in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, name))
+    )
+    files = []
+    for label, name in enumerate(class_names):
+        class_dir = os.path.join(split_dir, name)
+        files.extend(
+            (os.path.join(class_dir, filename), label)
+            for filename in sorted(os.listdir(class_dir)) if filename.lower().endswith(extensions)
+        )
+    return files, class_names
+
+
+def load_image(path, img_size):
+    """RGB uint8 (img_size, img_size, 3), 흑백 이미지도 3채널로 (image_dataset_from_directory와 같음)"""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"이미지를 읽을 수 없음: {path}")
+    image = cv2.resize(image, (img_size, img_size), interpolation=cv2.INTER_LINEAR)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def write_split(split_dir, out_dir, img_size, shard_size, workers, seed=0):
+    """한 분할을 샤드로 저장하고 index.json 내용 반환
+
+    파일 순서를 한 번 섞어서 저장 (샤드마다 클래스가 고르게 섞여 있어야 샤드 단위로
+    섞어 읽어도 배치가 한 클래스로 몰리지 않음).
+    """
+    files, class_names = list_files(split_dir)
+    files = [files[i] for i in np.random.default_rng(seed).permutation(len(files))]
+    os.makedirs(out_dir, exist_ok=True)
+    # 이전 샤드 삭제 (index.json을 먼저 지워서 쓰는 도중에는 읽지 않게 함)
+    for filename in [index_name] + sorted(os.listdir(out_dir)):
+        if filename == index_name or filename.endswith(".npy"):
+            path = os.path.join(out_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+    shards = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for number, first in enumerate(range(0, len(files), shard_size)):
+            chunk = files[first:first + shard_size]
+            images_name, labels_name = f"images-{number:05d}.npy", f"labels-{number:05d}.npy"
+            images = np.lib.format.open_memmap(
+                os.path.join(out_dir, images_name), mode="w+", dtype=np.uint8,
+                shape=(len(chunk), img_size, img_size, 3)
+            )
+            for i, image in enumerate(executor.map(lambda item: load_image(item[0], img_size), chunk)):
+                images[i] = image
+            images.flush()
+            del images
+            np.save(os.path.join(out_dir, labels_name), np.array([label for _, label in chunk], dtype=np.int32))
+            shards.append({"images": images_name, "labels": labels_name, "count": len(chunk)})
+
+    index = {
+        "class_names": class_names,
+        "img_size": img_size,
+        "seed": seed,
+        "count": len(files),
+        "shards": shards,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(os.path.join(out_dir, index_name), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index
+
+
+class ShardReader:
+    """샤드를 메모리 맵으로 열어 배치 단위로 읽음 (한 번에 메모리에 올리는 것은 배치 하나)"""
+    def __init__(self, split_dir):
+        self.split_dir = split_dir
+        with open(os.path.join(split_dir, index_name), encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.class_names = self.index["class_names"]
+        self.img_size = self.index["img_size"]
+        self.count = self.index["count"]
+
+    def batches(self, batch_size, shuffle=False, seed=None):
+        """(images uint8 (n, H, W, 3), labels int32 (n,)) 배치 생성
+
+        shuffle이면 샤드 순서와 샤드 안의 순서를 섞음. 배치 안의 인덱스는 정렬해서
+        메모리 맵을 앞에서부터 읽도록 함 (배치 구성은 무작위, 배치 안 순서만 정렬).
+        """
+        rng = np.random.default_rng(seed)
+        shards = self.index["shards"]
+        order = rng.permutation(len(shards)) if shuffle else range(len(shards))
+        for number in order:
+            shard = shards[number]
+            images = np.load(os.path.join(self.split_dir, shard["images"]), mmap_mode="r")
+            labels = np.load(os.path.join(self.split_dir, shard["labels"]))
+            indices = rng.permutation(len(labels)) if shuffle else np.arange(len(labels))
+            for first in range(0, len(indices), batch_size):
+                batch = indices[first:first + batch_size]
+                if shuffle:
+                    batch = np.sort(batch)
+                yield np.asarray(images[batch]), labels[batch]
+
+
+def main():
+    args = parse_args()
+    out_dir = args.out_dir or os.path.join("shards", str(args.img_size))
+    for split in splits:
+        split_dir = os.path.join(args.dataset_dir, split)
+        if not os.path.isdir(split_dir):
+            print(f"{split}: 폴더 없음, 건너뜀 ({split_dir})")
+            continue
+        start = time.perf_counter()
+        index = write_split(split_dir, os.path.join(out_dir, split), args.img_size, args.shard_size, args.workers, args.seed)
+        print(f"{split}: {index['count']}장 -> 샤드 {len(index['shards'])}개 ({time.perf_counter() - start:.1f}초)")
+    print(f"저장 위치: {out_dir} (model.py --shards {out_dir})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+COMPARE_METRICS = ("p50_ms", "p90_ms")  # 기준과 비교할 지표 (낮을수록 좋음)
+
+
+def measure(func, iterations=200, warmup=10):
+    """func()을 warmup번 실행한 뒤 iterations번 실행하며 한 번씩 걸린 시간(초) 측정"""
+    for _ in range(warmup):
+        func()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+def summarize(samples, **extra):
+    """측정값(초)을 밀리초 단위 백분위수 요약으로 변환"""
+    samples_ms = np.asarray(samples) * 1000
+    summary = {
+        "count": int(len(samples_ms)),
+        "mean_ms": float(samples_ms.mean()),
+        "min_ms": float(samples_ms.min()),
+        "max_ms": float(samples_ms.max()),
+    }
+    for q, value in zip(PERCENTILES, np.percentile(samples_ms, PERCENTILES)):
+        summary[f"p{q}_ms"] = float(value)
+    summary["ops_per_s"] = 1000 / summary["mean_ms"] if summary["mean_ms"] > 0 else float("inf")
+    summary.update(extra)
+    return summary
+
+
+def environment():
+    """결과 비교 시 참고할 실행 환경 정보"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(current, baseline, threshold=0.1):
+    """기준 결과와 비교해 벤치마크별 변화율 계산
+
+    반환: [(이름, 지표, 기준값, 현재값, 변화율, 느려졌는지)] (threshold 이상 느려지면 True)
+    """
+    rows = []
+    for name, summary in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base or "skipped" in summary or "skipped" in base:
+            continue
+        for metric in COMPARE_METRICS:
+            if metric not in summary or metric not in base or base[metric] <= 0:
+                continue
+            change = summary[metric] / base[metric] - 1
+            rows.append((name, metric, base[metric], summary[metric], change, change > threshold))
+    return rows
+
+
+def print_summary(results):
+    print(f"{'benchmark':<36}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+    for name, summary in results["benchmarks"].items():
+        if "skipped" in summary:
+            print(f"{name:<36}  건너뜀: {summary['skipped']}")
+            continue
+        print(f"{name:<36}{summary['p50_ms']:>10.3f}{summary['p90_ms']:>10.3f}"
+              f"{summary['p99_ms']:>10.3f}{summary['ops_per_s']:>12.1f}")
+
+
+def print_comparison(rows, threshold):
+    print(f"\n기준 대비 변화 (+{threshold:.0%} 이상 느려지면 REGRESSION)")
+    for name, metric, base, value, change, regressed in rows:
+        mark = "REGRESSION" if regressed else ("faster" if change < -threshold else "")
+        print(f"{name:<36}{metric:>8}{base:>10.3f} -> {value:<10.3f}{change:>+8.1%}  {mark}")
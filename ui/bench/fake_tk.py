@@ -0,0 +1,83 @@
+"""디스플레이 없이 GUI 코드를 실행하기 위한 최소한의 tkinter 대체물
+
+위젯 생성/배치/config 호출만 받아서 속성을 저장하고 실제로 그리지는 않음.
+"""
+
+
+class FakeWidget:
+    def __init__(self, parent=None, **options):
+        self.parent = parent
+        self.options = dict(options)
+        self.children = []
+        if isinstance(parent, FakeWidget):
+            parent.children.append(self)
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    def __getitem__(self, key):
+        return self.options.get(key)
+
+    def pack(self, **options):
+        pass
+
+    def place(self, **options):
+        pass
+
+    def grid_propagate(self, flag):
+        pass
+
+    def winfo_children(self):
+        return list(self.children)
+
+    def destroy(self):
+        if isinstance(self.parent, FakeWidget) and self in self.parent.children:
+            self.parent.children.remove(self)
+
+
+class FakeWindow(FakeWidget):
+    """after()로 예약한 작업은 run_pending()을 호출할 때만 실행"""
+    def __init__(self, **options):
+        super().__init__(None, **options)
+        self.jobs = {}
+        self.next_job = 0
+
+    def after(self, delay, func, *args):
+        self.next_job += 1
+        self.jobs[self.next_job] = (func, args)
+        return self.next_job
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for func, args in jobs.values():
+            func(*args)
+
+    def title(self, text):
+        pass
+
+    def geometry(self, size):
+        pass
+
+    def update_idletasks(self):
+        pass
+
+
+class Font:
+    def __init__(self, **options):
+        self.options = options
+
+
+# tkinter / tkinter.font 모듈 대신 쓸 수 있도록 같은 이름으로 노출
+Tk = FakeWindow
+Frame = FakeWidget
+Label = FakeWidget
+Button = FakeWidget
+Entry = FakeWidget
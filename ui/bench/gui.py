@@ -0,0 +1,76 @@
+import os
+from itertools import cycle
+
+from bench import fake_tk
+from bench.common import measure, summarize
+from funs.utils import load_yaml
+from funs.UpdateHandler import UpdateHandler
+from funs.UIUpdateBus import UIUpdateBus
+import funs.ShoeCabinetGUI as gui
+
+
+def make_window(backend):
+    """backend: "tk"(실제 Tk, Xvfb 등 디스플레이 필요) 또는 "fake"(그리지 않는 가짜 위젯)"""
+    if backend == "tk":
+        import tkinter as tk
+        window = tk.Tk()
+        window.withdraw()
+        return window
+    gui.tk = fake_tk
+    gui.font = fake_tk
+    return fake_tk.FakeWindow()
+
+
+def run(args):
+    backend = args.gui_backend
+    if backend == "auto":
+        backend = "tk" if os.environ.get("DISPLAY") else "fake"
+
+    original = (gui.tk, gui.font)
+    window = make_window(backend)
+    try:
+        config = load_yaml("./config.yaml")
+        update_handler = UpdateHandler(None, "./figs/sneakers.png", None)
+        font_manager = gui.FontManager()
+        dehumid_frame = gui.DehumidFrame(window, config, update_handler, font_manager, None)
+        dry_frame = gui.DryFrame(window, config, update_handler, font_manager, None, None, None)
+
+        def render():
+            if backend == "tk":
+                window.update_idletasks()  # 바뀐 라벨을 실제로 다시 그리는 비용 포함
+
+        temperatures = cycle([f"{30 + i / 10:.1f}°C" for i in range(100)])
+        dry_info = dict(update_handler.dry_info)
+
+        def changed():
+            dry_info["temp"] = next(temperatures)
+            dry_frame.update_labels(dry_info)
+            render()
+
+        def unchanged():
+            dry_frame.update_labels(dry_info)
+            render()
+
+        # 한 갱신 주기 동안 센서 프레임 10개가 도착했을 때 버스가 합쳐서 한 번만 반영하는 비용
+        bus = UIUpdateBus(window)
+        bus.register("dehumid", dehumid_frame.update_labels)
+        bus.register("dry", dry_frame.update_labels)
+
+        def coalesced():
+            for _ in range(10):
+                dry_info["temp"] = next(temperatures)
+                bus.post("dry", dry_info)
+                bus.post("dehumid", update_handler.dehumid_info)
+            bus._pump()
+            render()
+
+        results = {
+            "gui.update_labels_changed": summarize(measure(changed, args.iterations * 5), backend=backend),
+            "gui.update_labels_unchanged": summarize(measure(unchanged, args.iterations * 5), backend=backend),
+            "gui.bus_pump_10_posts": summarize(measure(coalesced, args.iterations * 5), backend=backend),
+        }
+    finally:
+        gui.tk, gui.font = original
+        if backend == "tk":
+            window.destroy()
+    return results
@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+from PIL import Image
+
+from bench.common import measure, summarize
+from funs.CameraHandler import CameraHandler, FakeCamera
+from funs.ModelHandler import ModelHandler
+
+TEST_MODEL_PATH = "./bench/data/test_model.tflite"
+DEFAULT_MODEL_PATH = "./model/model_1214_1830.tflite"
+
+
+def build_test_model(path=TEST_MODEL_PATH, input_size=96, num_classes=4):
+    """벤치마크용 작은 TFLite 모델 생성 (tensorflow 필요)
+
+    실제 모델과 입출력 형태(1, H, W, 3) -> (1, 4)만 같고 가중치는 무작위임.
+    """
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(input_size, input_size, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=2, activation="relu"),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(num_classes, activation="softmax"),
+    ])
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+    return path
+
+
+def default_model_path():
+    """작은 테스트 모델이 있으면 사용하고 없으면 배포용 모델 사용"""
+    return TEST_MODEL_PATH if os.path.exists(TEST_MODEL_PATH) else DEFAULT_MODEL_PATH
+
+
+def run(args):
+    model_path = args.model or default_model_path()
+    results = {}
+
+    def load():
+        handler.interpreter = None  # 캐시를 비워 매번 새로 로드
+        handler.load_model()
+
+    handler = ModelHandler(model_path=model_path, warmup=False)
+    results["recognition.model_load"] = summarize(
+        measure(load, iterations=max(3, args.iterations // 20), warmup=1), model=model_path
+    )
+    height, width = handler.input_details["shape"][1:3]
+
+    camera_handler = CameraHandler(
+        save_dir=tempfile.gettempdir(),
+        camera=FakeCamera(args.image),
+        recognition_size=(int(width), int(height)),
+        crop_width=0 if args.image else 1500
+    )
+    try:
+        camera_handler.start_stream()
+        frame = camera_handler.capture_frame()
+        if frame is None:
+            raise RuntimeError("가짜 카메라에서 프레임을 받지 못했습니다.")
+        if handler.predict_shoe_type_from_array(frame)[0] == "예측 실패":
+            raise RuntimeError("모델 예측에 실패했습니다.")
+
+        results["recognition.capture_frame"] = summarize(
+            measure(camera_handler.capture_frame, args.iterations), frame_shape=list(frame.shape)
+        )
+        results["recognition.predict_array"] = summarize(
+            measure(lambda: handler.predict_shoe_type_from_array(frame), args.iterations)
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            image_path = os.path.join(tmp, "frame.png")
+            Image.fromarray(frame).save(image_path)
+            results["recognition.predict_file"] = summarize(
+                measure(lambda: handler.predict_shoe_type(image_path), args.iterations)
+            )
+
+        def end_to_end():
+            handler.predict_shoe_type_from_array(camera_handler.capture_frame())
+
+        results["recognition.end_to_end"] = summarize(measure(end_to_end, args.iterations))
+    finally:
+        camera_handler.stop_camera()
+    return results
@@ -0,0 +1,74 @@
+"""신발장 제어/인식 경로 벤치마크
+
+ui 디렉터리에서 실행:
+    python -m bench.run                                  # 전체 실행, bench/results.json에 저장
+    python -m bench.run --suites serial,telemetry        # 일부만 실행
+    python -m bench.run --save-baseline                  # 결과를 기준(bench/baseline.json)으로 저장
+    python -m bench.run --baseline bench/baseline.json   # 기준과 비교 (느려지면 종료 코드 1)
+    xvfb-run python -m bench.run --suites gui --gui-backend tk
+"""
+import argparse
+import importlib
+import traceback
+
+from bench.common import environment, save_results, load_results, compare, print_summary, print_comparison
+
+SUITES = {
+    "recognition": "bench.recognition",  # 가짜 카메라 -> ModelHandler 인식 지연
+    "serial": "bench.serial_path",  # parse_data + UpdateHandler 프레임 처리
+    "telemetry": "bench.telemetry",  # TelemetryWriter 기록 처리량
+    "gui": "bench.gui",  # 라벨 갱신 비용
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="신발장 벤치마크")
+    parser.add_argument("--suites", default=",".join(SUITES), help="쉼표로 구분 (" + ", ".join(SUITES) + ")")
+    parser.add_argument("--iterations", type=int, default=200, help="기본 반복 횟수 (스위트별로 배수 적용)")
+    parser.add_argument("--out", default="./bench/results.json")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--save-baseline", nargs="?", const="./bench/baseline.json", default=None,
+                        help="결과를 기준 파일로도 저장")
+    parser.add_argument("--threshold", type=float, default=0.1, help="이 비율 이상 느려지면 회귀로 판단")
+    parser.add_argument("--model", default=None, help="인식에 사용할 .tflite (기본: bench/data/test_model.tflite)")
+    parser.add_argument("--build-test-model", action="store_true", help="tensorflow로 작은 테스트 모델 생성")
+    parser.add_argument("--image", default=None, help="가짜 카메라 이미지 (기본: 무작위 4608x2592 프레임)")
+    parser.add_argument("--gui-backend", choices=["auto", "tk", "fake"], default="auto")
+    args = parser.parse_args()
+
+    if args.build_test_model:
+        from bench.recognition import build_test_model
+        print(f"테스트 모델 생성: {build_test_model()}")
+
+    results = {"environment": environment(), "benchmarks": {}}
+    for name in args.suites.split(","):
+        name = name.strip()
+        if name not in SUITES:
+            parser.error(f"알 수 없는 스위트: {name}")
+        print(f"[{name}] 실행 중...")
+        try:
+            suite = importlib.import_module(SUITES[name])
+            results["benchmarks"].update(suite.run(args))
+        except ImportError as e:
+            # 해당 장비에 없는 의존성(tflite_runtime 등)은 건너뛰고 나머지는 계속 측정
+            results["benchmarks"][name] = {"skipped": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            results["benchmarks"][name] = {"skipped": f"오류: {e}"}
+
+    print_summary(results)
+    save_results(results, args.out)
+    print(f"\n결과 저장: {args.out}")
+    if args.save_baseline:
+        save_results(results, args.save_baseline)
+        print(f"기준 저장: {args.save_baseline}")
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row[-1] for row in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+from itertools import cycle
+
+from bench.common import measure, summarize
+from bench.fake_tk import FakeWindow
+from funs.SerialComm import SerialComm
+from funs.UpdateHandler import UpdateHandler
+from funs.UIUpdateBus import UIUpdateBus
+from funs.HeaterController import HeaterController
+from funs.HardwareSimulator import CabinetSimulator
+
+
+def make_frames(count=256, seed=0):
+    """시뮬레이터 모델로 JSON 줄과 바이너리 프레임을 미리 만들어 둠 (포트 입출력 없음)"""
+    simulator = CabinetSimulator(seed=seed)
+    try:
+        for pin in (3, 7, 8, 13):
+            simulator.handle_command(f"on {pin}")
+        lines, frames = [], []
+        for _ in range(count):
+            simulator.model.advance(2.0)
+            readings = simulator.sensor_readings()
+            lines.append(json.dumps(simulator.json_frame(readings), separators=(",", ":")))
+            frames.append(simulator.binary_frame(readings))
+    finally:
+        simulator.close()
+    return lines, frames
+
+
+def run(args):
+    lines, frames = make_frames()
+    serial_comm = SerialComm(port=None)  # 포트를 열지 않고 파싱만 사용
+    results = {}
+
+    json_lines = cycle(lines)
+    results["serial.parse_json"] = summarize(
+        measure(lambda: serial_comm.parse_data(next(json_lines)), args.iterations * 10)
+    )
+    binary_frames = cycle(frames)
+    results["serial.parse_binary"] = summarize(
+        measure(lambda: serial_comm.parse_data(next(binary_frames)), args.iterations * 10)
+    )
+
+    # 수신 쓰레드의 한 프레임 처리: 파싱 -> 상태 갱신 -> UI 버스에 게시 -> 히터 제어 입력
+    bus = UIUpdateBus(FakeWindow())
+    heater_controller = HeaterController(None)
+    update_handler = UpdateHandler(serial_comm, "./figs/sneakers.png", None, heater_controller=heater_controller)
+    update_handler.set_update_callbacks(
+        lambda info: bus.post("dehumid", info),
+        lambda info: bus.post("dry", info),
+        lambda path: bus.post("image", path)
+    )
+    for name, source in (("json", lines), ("binary", frames)):
+        items = cycle(source)
+        results[f"serial.update_path_{name}"] = summarize(
+            measure(lambda: update_handler.handle_frame(next(items)), args.iterations * 10)
+        )
+    return results
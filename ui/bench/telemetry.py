@@ -0,0 +1,37 @@
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bench.common import summarize
+from funs.TelemetryWriter import TelemetryWriter
+
+
+def write_rows(formats, rows, flush_rows=30):
+    """rows개 행을 기록하며 write() 한 번씩의 시간과 전체 처리량 측정"""
+    rng = np.random.default_rng(0)
+    values = rng.normal(30, 10, (rows, 6)).round(1).tolist()
+    start_time = datetime(2024, 12, 14, 12, 0, 0)
+    samples = np.empty(rows)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        writer = TelemetryWriter(log_dir=log_dir, formats=formats, flush_rows=flush_rows, flush_interval=1e9)
+        total_start = time.perf_counter()
+        for i in range(rows):
+            timestamp = start_time + timedelta(seconds=2 * i)
+            start = time.perf_counter()
+            writer.write(timestamp, values[i])
+            samples[i] = time.perf_counter() - start
+        writer.close()
+        total = time.perf_counter() - total_start
+    return samples, rows / total
+
+
+def run(args):
+    rows = args.iterations * 50
+    results = {}
+    for name, formats in (("csv", ("csv",)), ("csv_npy", ("csv", "npy"))):
+        samples, rows_per_s = write_rows(formats, rows)
+        results[f"telemetry.write_{name}"] = summarize(samples, rows=rows, rows_per_s=rows_per_s)
+    return results
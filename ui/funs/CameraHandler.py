@@ -1,53 +1,293 @@
 import time
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from PIL import Image
-from picamera2 import Picamera2
+
+from funs.Metrics import metrics
+from funs.LogConfig import get_logger
+
+logger = get_logger("camera")
+
+try:
+    from picamera2 import Picamera2
+except ImportError:  # 라즈베리파이가 아닌 환경 (FakeCamera 사용)
+    Picamera2 = None
+
+
+class FakeCamera:
+    """테스트용 가짜 카메라 백엔드 (Picamera2 인터페이스 일부를 흉내냄)"""
+    def __init__(self, image_path=None, size=(4608, 2592), frame_interval=1 / 30):
+        self.frame_interval = frame_interval  # 스트림 프레임 간격 (초)
+        if image_path:
+            self.frame = np.array(Image.open(image_path).convert("RGB"))
+        else:
+            rng = np.random.default_rng(0)
+            self.frame = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+        height, width = self.frame.shape[:2]
+        full = (0, 0, width, height)
+        self.camera_controls = {"ScalerCrop": ((0, 0, 64, 64), full, full)}
+        self.config = {}
+        self.scaler_crop = full
+
+    def create_still_configuration(self, main=None, **kwargs):
+        return {"use_case": "still", "main": dict(main or {})}
+
+    def create_video_configuration(self, main=None, controls=None, **kwargs):
+        return {"use_case": "video", "main": dict(main or {}), "controls": dict(controls or {})}
+
+    def align_configuration(self, config):
+        pass
+
+    def configure(self, config):
+        self.config = config
+        self.scaler_crop = self.camera_controls["ScalerCrop"][1]
+
+    def set_controls(self, controls):
+        if "ScalerCrop" in controls:
+            self.scaler_crop = tuple(controls["ScalerCrop"])
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def capture_array(self, name="main"):
+        size = self.config.get("main", {}).get("size")
+        if self.config.get("use_case") != "video" or not size:
+            return self.frame.copy()
+        # ISP의 ScalerCrop + 다운스케일 동작을 흉내냄
+        x, y, w, h = self.scaler_crop
+        region = Image.fromarray(np.ascontiguousarray(self.frame[y:y + h, x:x + w]))
+        return np.asarray(region.resize(size))
+
+    def capture_arrays(self, names=("main",)):
+        time.sleep(self.frame_interval)
+        metadata = {"AeLocked": True, "ExposureTime": 10000, "AnalogueGain": 1.0}
+        return [self.capture_array(name) for name in names], metadata
+
+    def capture_file(self, path):
+        Image.fromarray(self.frame).save(path)
+
+    def switch_mode_and_capture_file(self, config, path):
+        self.capture_file(path)
+
 
 class CameraHandler:
     """카메라로 사진을 찍고 처리하는 클래스"""
-    def __init__(self, save_dir="./data"):
+    def __init__(self, save_dir="./data", camera=None, debug=False,
+                 recognition_size=(224, 224), crop_width=1500, ring_size=4):
         self.save_dir = save_dir
         os.makedirs(self.save_dir, exist_ok=True)  # 저장 디렉터리 생성
-        self.picam2 = Picamera2()  # 카메라 객체 초기화
+        self.picam2 = camera if camera is not None else Picamera2()  # 카메라 객체 초기화
         self.picam2_configured = False  # 카메라 초기화 상태 추적
+        self.mode = None  # 현재 카메라 모드 ("recognition" 또는 "still")
+        self.recognition_size = tuple(recognition_size)  # 모델 입력 크기 (너비, 높이)
+        self.crop_width = crop_width  # 센서 기준 오른쪽에서 잘라낼 픽셀 수
+        self.isp_cropped = False  # ScalerCrop으로 ISP에서 크롭했는지 여부
+        self.debug = debug  # True면 인식에 사용한 프레임을 JPEG로 남김
+        self.save_executor = ThreadPoolExecutor(max_workers=1) if debug else None
+
+        # 백그라운드 스트림 관련 상태
+        self.camera_lock = threading.Lock()  # Picamera2 호출 직렬화
+        self.frames = deque(maxlen=ring_size)  # (촬영 시각, 프레임, 노출 수렴 여부) 링 버퍼
+        self.frame_cond = threading.Condition()
+        self.exposure_history = deque(maxlen=3)  # 자동 노출 수렴 판단용
+        self.streaming = False
+        self.stream_thread = None
 
     def crop_image(self, image, crop_width = 1500):
         width, height = image.size
         # 오른쪽에서 crop_width만큼 잘라내기
         return image.crop((0, 0, width - crop_width, height))
-    
-    def capture_and_crop_image(self, filename="pic.jpg"):
-        """카메라로 사진을 찍고 아래 550 픽셀을 자른 후 저장"""
+
+    def crop_array(self, frame, crop_width=1500):
+        """NumPy 프레임의 오른쪽 crop_width 픽셀을 잘라낸 뷰 반환 (복사 없음)"""
+        return frame[:, :frame.shape[1] - crop_width]
+
+    def _recognition_size(self):
+        """크롭 영역의 가로세로 비율을 유지하면서 모델 입력 높이에 맞춘 출력 크기"""
+        _, _, max_w, max_h = self.picam2.camera_controls["ScalerCrop"][1]
+        aspect = (max_w - self.crop_width) / max_h
+        height = self.recognition_size[1]
+        width = int(round(height * aspect / 2)) * 2  # ISP 정렬을 위해 짝수로
+        return (max(width, self.recognition_size[0]), height)
+
+    def _configure_camera(self, mode="recognition"):
+        """카메라 모드 설정
+        - recognition: 모델 입력 크기에 맞춘 저해상도 비디오 스트림, 크롭은 ISP(ScalerCrop)에서 수행
+        - still: 데이터셋 수집용 전체 해상도 정지 화상
+        """
+        if self.mode == mode:
+            return
+        if self.picam2_configured:
+            self.picam2.stop()
+
+        # BGR888 포맷은 NumPy 배열에서 RGB 순서로 들어옴
+        if mode == "recognition":
+            config = self.picam2.create_video_configuration(
+                main={"size": self._recognition_size(), "format": "BGR888"},
+                buffer_count=2
+            )
+            self.picam2.align_configuration(config)
+        else:
+            config = self.picam2.create_still_configuration(main={"format": "BGR888"})
+        self.picam2.configure(config)
+        self.picam2.start()
+
+        self.isp_cropped = False
+        if mode == "recognition":
+            try:
+                # 센서 좌표계에서 오른쪽 crop_width 픽셀을 제외한 영역만 ISP가 읽도록 설정
+                x, y, max_w, max_h = self.picam2.camera_controls["ScalerCrop"][1]
+                self.picam2.set_controls({"ScalerCrop": (x, y, max_w - self.crop_width, max_h)})
+                self.isp_cropped = True
+            except Exception as e:
+                logger.warning("ScalerCrop 설정에 실패하여 소프트웨어로 크롭합니다: %s", e, extra={"event": "scaler_crop_failed"})
+
+        self.picam2_configured = True
+        self.mode = mode
+        self.exposure_history.clear()  # 고정 대기 대신 프레임 메타데이터로 노출 수렴을 확인
+
+    def _is_exposure_converged(self, metadata):
+        """프레임 메타데이터로 자동 노출(AE) 수렴 여부 판단"""
+        if "AeLocked" in metadata:
+            return bool(metadata["AeLocked"])
+        # AeLocked가 없으면 최근 프레임들의 노출량(노출 시간 x 게인)이 안정되었는지 확인
+        self.exposure_history.append(metadata.get("ExposureTime", 0) * metadata.get("AnalogueGain", 1.0))
+        if len(self.exposure_history) < self.exposure_history.maxlen:
+            return False
+        highest = max(self.exposure_history)
+        return highest - min(self.exposure_history) <= 0.05 * highest
+
+    def _capture_with_metadata(self):
+        """프레임 한 장과 (노출 시작 기준) 촬영 시각, 노출 수렴 여부 반환"""
+        with self.camera_lock:
+            (frame,), metadata = self.picam2.capture_arrays(["main"])
+        captured_at = time.monotonic() - metadata.get("ExposureTime", 0) / 1e6
+        return captured_at, frame, self._is_exposure_converged(metadata)
+
+    def start_stream(self):
+        """인식용 스트림을 백그라운드에서 시작하고 최근 프레임을 링 버퍼에 유지"""
+        if self.stream_thread and self.stream_thread.is_alive():
+            return
+        self.streaming = True
+        self.stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
+        self.stream_thread.start()
+
+    def _stream_loop(self):
         try:
-            if not self.picam2_configured:
-                # 카메라 초기화가 안 된 경우만 초기화
-                config = self.picam2.create_still_configuration()
-                self.picam2.configure(config)
-                self.picam2.start()
-                self.picam2_configured = True
-                time.sleep(2)  # 카메라 준비 대기
+            with self.camera_lock:
+                self._configure_camera("recognition")
+            while self.streaming:
+                captured = self._capture_with_metadata()
+                with self.frame_cond:
+                    self.frames.append(captured)
+                    self.frame_cond.notify_all()
+        except Exception as e:
+            logger.exception("카메라 스트림 중 오류가 발생했습니다: %s", e, extra={"event": "stream_error"})
+        finally:
+            self.streaming = False
+            with self.frame_cond:
+                self.frame_cond.notify_all()
+
+    def stop_stream(self):
+        """백그라운드 스트림 종료"""
+        self.streaming = False
+        if self.stream_thread:
+            self.stream_thread.join(timeout=2)
+            self.stream_thread = None
+        self.frames.clear()
+
+    def get_latest_frame(self, after=0.0, timeout=3.0):
+        """after(time.monotonic 기준) 이후에 촬영되고 노출이 수렴된 가장 최신 프레임 반환"""
+        deadline = time.monotonic() + timeout
+        with self.frame_cond:
+            while True:
+                for captured_at, frame, converged in reversed(self.frames):
+                    if captured_at >= after and converged:
+                        return frame
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.streaming:
+                    return None
+                self.frame_cond.wait(remaining)
+
+    def capture_frame(self, after=0.0, timeout=3.0):
+        """카메라 프레임을 NumPy 배열로 받아 메모리에서 크롭 (파일 저장 없음)"""
+        with metrics.timer("camera_capture"):
+            return self._capture_frame(after, timeout)
 
+    def _capture_frame(self, after, timeout):
+        try:
+            if self.streaming:
+                # 스트림 중이면 링 버퍼에서 바로 가져옴
+                frame = self.get_latest_frame(after, timeout)
+                if frame is None:
+                    logger.warning("조건에 맞는 카메라 프레임을 받지 못했습니다.", extra={"event": "frame_timeout"})
+                    return None
+            else:
+                with self.camera_lock:
+                    self._configure_camera("recognition")
+                # 노출이 수렴할 때까지 프레임을 버림
+                deadline = time.monotonic() + timeout
+                while True:
+                    captured_at, frame, converged = self._capture_with_metadata()
+                    if (converged and captured_at >= after) or time.monotonic() > deadline:
+                        break
+            cropped = frame if self.isp_cropped else self.crop_array(frame, self.crop_width)
+
+            if self.debug:
+                # 디버그 모드에서만 백그라운드로 JPEG 저장
+                self.save_executor.submit(self._save_debug_images, frame, cropped)
+
+            return cropped
+        except Exception as e:
+            logger.error("카메라 촬영 중 오류가 발생했습니다: %s", e, extra={"event": "capture_error"})
+            return None
+
+    def _save_debug_images(self, frame, cropped, filename="pic.jpg"):
+        try:
+            Image.fromarray(frame).save(os.path.join(self.save_dir, filename))
+            Image.fromarray(np.ascontiguousarray(cropped)).save(os.path.join(self.save_dir, "cropped_" + filename))
+        except Exception as e:
+            logger.error("디버그 이미지 저장 중 오류가 발생했습니다: %s", e, extra={"event": "debug_save_error"})
+
+    def capture_and_crop_image(self, filename="pic.jpg"):
+        """데이터셋 수집용: 전체 해상도로 사진을 찍고 오른쪽 1500 픽셀을 자른 후 저장"""
+        try:
             image_path = os.path.join(self.save_dir, filename)
-            self.picam2.capture_file(image_path)
+            with self.camera_lock:
+                if self.mode == "recognition":
+                    # 인식용 스트림을 유지한 채 한 장만 전체 해상도로 촬영
+                    still_config = self.picam2.create_still_configuration(main={"format": "BGR888"})
+                    self.picam2.switch_mode_and_capture_file(still_config, image_path)
+                else:
+                    self._configure_camera("still")
+                    self.picam2.capture_file(image_path)
 
-            print(f"사진이 저장되었습니다: {image_path}")
+            logger.info("사진이 저장되었습니다: %s", image_path, extra={"event": "photo_saved"})
 
-            # 이미지 열고 아래 550 픽셀 자르기
+            # 이미지 열고 오른쪽 1500 픽셀 자르기
             image = Image.open(image_path)
-            cropped_image = self.crop_image(image)  # crop_image 함수 사용
+            cropped_image = self.crop_image(image, self.crop_width)  # crop_image 함수 사용
 
             cropped_image_path = os.path.join(self.save_dir, "cropped_" + filename)
             cropped_image.save(cropped_image_path)
-            print(f"이미지에서 550픽셀을 잘랐습니다: {cropped_image_path}")
+            logger.info("이미지에서 %d픽셀을 잘랐습니다: %s", self.crop_width, cropped_image_path, extra={"event": "photo_cropped"})
 
             return cropped_image_path
         except Exception as e:
-            print(f"카메라 촬영 중 오류가 발생했습니다: {e}")
+            logger.error("카메라 촬영 중 오류가 발생했습니다: %s", e, extra={"event": "capture_error"})
             return None
 
     def stop_camera(self):
         """카메라 종료 메소드"""
+        self.stop_stream()
         if self.picam2_configured:
             self.picam2.stop()
             self.picam2_configured = False
-            print("카메라가 종료되었습니다.")
+            self.mode = None
+            logger.info("카메라가 종료되었습니다.", extra={"event": "camera_stopped"})
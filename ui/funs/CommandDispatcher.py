@@ -0,0 +1,154 @@
+import threading
+import queue
+import json
+from concurrent.futures import Future
+
+from funs.LogConfig import get_logger
+
+logger = get_logger("command")
+
+# peltier.ino의 controlPins 순서 (pinStates 배열의 인덱스와 대응)
+CONTROL_PINS = [3, 7, 8, 11, 12, 13]
+
+
+class Command:
+    """아두이노로 보낼 명령 묶음 (각 줄마다 기대하는 응답을 기다림)"""
+    def __init__(self, lines, callback=None):
+        self.lines = lines  # [(전송할 문자열, 응답 판별 함수), ...]
+        self.callback = callback
+        self.future = Future()
+
+
+class CommandDispatcher:
+    """시리얼 명령을 전용 쓰레드에서 순서대로 전송하고 아두이노 응답을 기다리는 클래스"""
+    def __init__(self, serial_comm, ack_timeout=5.0):
+        self.serial_comm = serial_comm
+        self.ack_timeout = ack_timeout  # 아두이노 loop()가 2초 간격이므로 여유를 둠
+        self.commands = queue.Queue()
+        self.scheduler = None  # UIUpdateBus.call_soon (콜백을 Tk 쓰레드에서 실행)
+        self.ack_lock = threading.Lock()
+        self.ack_matcher = None  # 현재 기다리는 응답 판별 함수
+        self.ack_result = None
+        self.ack_event = threading.Event()
+        self.ack_error = None
+        self.worker = None
+
+        if self.serial_comm:
+            self.serial_comm.add_line_listener(self.on_line)
+
+    def set_scheduler(self, scheduler):
+        """완료 콜백을 전달할 스케줄러 등록 (예: UIUpdateBus.call_soon)"""
+        self.scheduler = scheduler
+
+    def start(self):
+        """명령 전송 쓰레드 시작"""
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self.worker.start()
+
+    def submit(self, lines, callback=None):
+        """명령을 큐에 넣고 완료 Future를 바로 반환 (호출 쓰레드를 막지 않음)"""
+        command = Command(lines, callback)
+        if not self.serial_comm or not self.serial_comm.ser:
+            command.future.set_exception(RuntimeError("시리얼 포트가 연결되어 있지 않습니다."))
+            self._notify(command)
+            return command.future
+        self.start()
+        self.commands.put(command)
+        return command.future
+
+    def turn_on(self, pins, callback=None):
+        """'on 3 7 8' 명령으로 여러 핀을 한 번에 켜기 (JSON 응답 한 번으로 완료)"""
+        command = "on " + " ".join(map(str, pins))
+        return self.submit([(command, self._pin_state_matcher("on", pins, 1))], callback)
+
+    def turn_off(self, pins, callback=None):
+        """stop 명령으로 여러 핀 끄기"""
+        command = "stop " + " ".join(map(str, pins))
+        return self.submit([(command, self._pin_state_matcher("stop", pins, 0))], callback)
+
+    def all_off(self, callback=None):
+        """모든 핀 끄기"""
+        return self.submit([("0", lambda line: line if line == "All pins set to LOW." else None)], callback)
+
+    def set_protocol(self, protocol, callback=None):
+        """'proto bin'/'proto json' 명령으로 텔레메트리 전송 형식 협상"""
+        def matcher(line):
+            if line.startswith('{"ack"'):
+                ack = json.loads(line)
+                if ack.get("ack") == "proto":
+                    return ack["mode"]
+            return None
+        return self.submit([(f"proto {protocol}", matcher)], callback)
+
+    def _pin_state_matcher(self, ack_name, pins, expected_state):
+        """{"ack": ..., "pinStates": [...]} 응답을 확인하고 pinStates를 결과로 반환"""
+        def matcher(line):
+            if not line.startswith("{"):
+                return None
+            ack = json.loads(line)
+            if ack.get("ack") != ack_name:
+                return None
+            pin_states = dict(zip(CONTROL_PINS, ack["pinStates"]))
+            failed = [pin for pin in pins if pin_states.get(pin) != expected_state]
+            if failed:
+                raise RuntimeError(f"핀 {failed} 상태가 바뀌지 않았습니다: {ack['pinStates']}")
+            return pin_states
+        return matcher
+
+    def on_line(self, line):
+        """시리얼에서 받은 응답 처리 (SerialComm 리스너)"""
+        with self.ack_lock:
+            if self.ack_matcher is None:
+                return
+            try:
+                result = self.ack_matcher(line)
+                if result is None:
+                    if line.startswith("Invalid"):
+                        self.ack_error = line
+                        self.ack_event.set()
+                    return
+                self.ack_result = result
+            except Exception as e:
+                self.ack_error = str(e)
+            self.ack_event.set()
+
+    def _worker_loop(self):
+        while True:
+            command = self.commands.get()
+            try:
+                acks = []
+                for text, matcher in command.lines:
+                    acks.append(self._send_and_wait(text, matcher))
+                command.future.set_result(acks)
+            except Exception as e:
+                logger.error("아두이노 명령 처리 중 오류 발생: %s", e, extra={"event": "command_failed"})
+                command.future.set_exception(e)
+            self._notify(command)
+
+    def _send_and_wait(self, text, matcher):
+        with self.ack_lock:
+            self.ack_matcher = matcher
+            self.ack_result = None
+            self.ack_error = None
+            self.ack_event.clear()
+        try:
+            self.serial_comm.write_line(text)
+            logger.debug("Sent '%s' to Arduino.", text, extra={"event": "command_sent"})
+            if not self.ack_event.wait(self.ack_timeout):
+                raise TimeoutError(f"'{text}' 명령에 대한 응답이 없습니다.")
+            if self.ack_error:
+                raise RuntimeError(self.ack_error)
+            return self.ack_result
+        finally:
+            with self.ack_lock:
+                self.ack_matcher = None
+
+    def _notify(self, command):
+        if command.callback is None:
+            return
+        if self.scheduler:
+            self.scheduler(command.callback, command.future)
+        else:
+            command.callback(command.future)
+
@@ -0,0 +1,103 @@
+import math
+import time
+
+
+class CycleTimer:
+    """time.monotonic() 기준 마감 시각으로 남은 시간을 계산하는 건조 타이머
+
+    센서 데이터 주기와 상관없이 Tk after로 1초마다 표시를 갱신하고,
+    마감 시각에 정확히 on_complete를 호출함. 모든 메소드는 Tk 쓰레드에서 호출해야 함.
+    time_scale배 빠르게 흐르는 시간 기준으로 동작 가능 (시뮬레이터 가속용, 기본 1).
+    """
+    def __init__(self, window, on_tick=None, on_complete=None, tick_interval=1.0, time_scale=1.0):
+        self.window = window  # after/after_cancel을 제공하는 Tk 위젯
+        self.on_tick = on_tick  # on_tick(남은 초)
+        self.on_complete = on_complete
+        self.tick_interval = tick_interval
+        self.time_scale = time_scale
+        self.end_time = None  # 진행 중일 때 마감 시각 (monotonic)
+        self.paused_remaining = None  # 일시정지 중일 때 남은 시간
+        self.tick_job = None
+        self.complete_job = None
+
+    def _now(self):
+        return time.monotonic() * self.time_scale
+
+    def _after(self, seconds, func):
+        """seconds(가속된 시간)를 실제 ms로 바꿔 예약"""
+        return self.window.after(max(1, int(math.ceil(seconds * 1000 / self.time_scale))), func)
+
+    @property
+    def running(self):
+        return self.end_time is not None
+
+    @property
+    def paused(self):
+        return self.paused_remaining is not None
+
+    def start(self, duration):
+        """duration초 뒤에 끝나는 사이클 시작 (진행 중이던 사이클은 취소)"""
+        self.cancel()
+        self._run_until(self._now() + duration)
+
+    def remaining(self):
+        """남은 시간(초) 계산"""
+        if self.paused:
+            return self.paused_remaining
+        if not self.running:
+            return 0.0
+        return max(0.0, self.end_time - self._now())
+
+    def pause(self):
+        if self.running:
+            self.paused_remaining = self.remaining()
+            self._cancel_jobs()
+            self.end_time = None
+            self._tick()
+
+    def resume(self):
+        if self.paused:
+            remaining, self.paused_remaining = self.paused_remaining, None
+            self._run_until(self._now() + remaining)
+
+    def cancel(self):
+        """사이클 취소 (완료 콜백 호출 안 함)"""
+        self._cancel_jobs()
+        self.end_time = None
+        self.paused_remaining = None
+
+    def _run_until(self, end_time):
+        self.end_time = end_time
+        self.complete_job = self._after(end_time - self._now(), self._complete)
+        self._tick()
+
+    def _tick(self):
+        """표시 갱신 후 다음 초 경계에 맞춰 다시 예약"""
+        self.tick_job = None
+        remaining = self.remaining()
+        if self.on_tick:
+            self.on_tick(int(math.ceil(remaining)))
+        if self.running and remaining > 0:
+            # 남은 시간이 정수 초가 되는 시점에 맞춰 깨어남
+            delay = remaining % self.tick_interval or self.tick_interval
+            self.tick_job = self._after(delay, self._tick)
+
+    def _complete(self):
+        self.complete_job = None
+        if self.running and self.end_time - self._now() > 0.001 * self.time_scale:
+            # after의 타이머가 조금 이르게 깨어난 경우 남은 만큼 다시 예약
+            self.complete_job = self._after(self.end_time - self._now(), self._complete)
+            return
+        self._cancel_jobs()
+        self.end_time = None
+        if self.on_tick:
+            self.on_tick(0)
+        if self.on_complete:
+            self.on_complete()
+
+    def _cancel_jobs(self):
+        for job in (self.tick_job, self.complete_job):
+            if job is not None:
+                self.window.after_cancel(job)
+        self.tick_job = None
+        self.complete_job = None
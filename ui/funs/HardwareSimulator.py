@@ -0,0 +1,332 @@
+import os
+import tty
+import json
+import math
+import time
+import random
+import select
+import argparse
+import binascii
+import threading
+
+from funs.CommandDispatcher import CONTROL_PINS
+from funs.SerialComm import FRAME_SYNC, FRAME_VERSION, FRAME_STRUCT, MISSING_VALUE
+
+FRAME_PERIOD = 2.0  # peltier.ino loop()의 delay (초)
+PIN_NAMES = {3: "peltier", 7: "heater_fan", 8: "heater", 11: "led", 12: "uv", 13: "vent"}
+
+
+def saturation_vapor_density(temperature):
+    """포화 수증기 밀도 (g/m^3, Magnus 식 근사)"""
+    pressure = 6.112 * math.exp(17.62 * temperature / (243.12 + temperature))  # hPa
+    return 216.7 * pressure / (273.15 + temperature)
+
+
+class ThermalModel:
+    """핀 상태로 구동하는 신발장 온습도 모델 (시뮬레이션 시간 기준)
+
+    - sensor1: 제습실 (3 펠티어가 공기를 식히고 수분을 응결시킴)
+    - sensor2: 건조실 (8 히터의 열이 7 히터팬으로 전달, 13 환풍으로 외부 공기와 교환)
+    - sensor3: 히터 측 (히터 블록 온도)
+    습도는 절대 습도(g/m^3)로 계산하고 센서값은 상대 습도(%)로 변환함.
+    """
+    def __init__(self, ambient_temp=25.0, ambient_humid=50.0, wet_load=30.0):
+        self.ambient_temp = ambient_temp
+        self.ambient_vapor = saturation_vapor_density(ambient_temp) * ambient_humid / 100
+        self.wet_load = wet_load  # 신발에 남은 수분 (g)
+        self.temps = [ambient_temp] * 3
+        self.vapors = [self.ambient_vapor] * 3
+        self.pins = {pin: 0 for pin in CONTROL_PINS}
+
+        # 열용량 (J/K), 열전달 계수 (W/K), 출력 (W)
+        self.heater_power = 40.0
+        self.heater_capacity = 60.0
+        self.chamber_capacity = 400.0
+        self.dehumid_capacity = 300.0
+        self.heater_to_chamber = 0.4  # 팬이 꺼져 있을 때 (켜지면 4배)
+        self.heater_loss = 0.05
+        self.chamber_loss = 0.6  # 환풍이 켜지면 3배
+        self.dehumid_loss = 1.5
+        self.peltier_power = 15.0
+        self.peltier_condense = 0.02  # 펠티어 수분 제거율 (1/s)
+        self.vent_exchange = 0.01  # 환풍 공기 교환율 (1/s)
+        self.leak_exchange = 0.005
+        self.evaporation = 0.00002  # 신발 수분 증발율 (1/s/°C)
+        self.chamber_volume = 0.05  # m^3
+
+    def set_pin(self, pin, state):
+        self.pins[pin] = 1 if state else 0
+
+    def advance(self, seconds, max_step=1.0):
+        """seconds만큼 시뮬레이션 시간 진행 (안정성을 위해 max_step 이하로 나눠 적분)"""
+        steps = max(1, int(math.ceil(seconds / max_step)))
+        dt = seconds / steps
+        for _ in range(steps):
+            self._step(dt)
+
+    def _step(self, dt):
+        t1, t2, t3 = self.temps
+        v1, v2, _ = self.vapors
+        pins = self.pins
+        ambient = self.ambient_temp
+
+        fan = 4.0 if pins[7] else 1.0
+        vent = 3.0 if pins[13] else 1.0
+        transfer = self.heater_to_chamber * fan * (t3 - t2)
+        heater_in = self.heater_power * pins[8]
+        dt3 = (heater_in - transfer - self.heater_loss * (t3 - ambient)) / self.heater_capacity
+        dt2 = (transfer - self.chamber_loss * vent * (t2 - ambient)) / self.chamber_capacity
+        dt1 = (-self.peltier_power * pins[3] - self.dehumid_loss * (t1 - ambient)) / self.dehumid_capacity
+
+        # 건조실: 신발 수분 증발 + 외부 공기 교환
+        exchange = self.leak_exchange + self.vent_exchange * pins[13]
+        evaporated = min(self.wet_load, self.wet_load * self.evaporation * max(t2, 0.0) * dt)
+        self.wet_load -= evaporated
+        dv2 = evaporated / self.chamber_volume / dt - exchange * (v2 - self.ambient_vapor)
+
+        # 제습실: 펠티어 냉각면에서 응결
+        condense = self.peltier_condense * pins[3] * max(0.0, v1 - saturation_vapor_density(t1 - 10.0))
+        dv1 = -condense - self.leak_exchange * (v1 - self.ambient_vapor)
+
+        self.temps = [t1 + dt1 * dt, t2 + dt2 * dt, t3 + dt3 * dt]
+        # 포화 수증기량을 넘는 수분은 응결된 것으로 봄 (히터 측은 건조실 공기와 같음)
+        v1 = min(max(0.0, v1 + dv1 * dt), saturation_vapor_density(self.temps[0]))
+        v2 = min(max(0.0, v2 + dv2 * dt), saturation_vapor_density(self.temps[1]))
+        self.vapors = [v1, v2, v2]
+
+    def readings(self):
+        """[온도1, 습도1, 온도2, 습도2, 온도3, 습도3]"""
+        values = []
+        for temperature, vapor in zip(self.temps, self.vapors):
+            humidity = min(100.0, 100.0 * vapor / saturation_vapor_density(temperature))
+            values.extend([temperature, humidity])
+        return values
+
+
+class CabinetSimulator:
+    """pty로 peltier.ino를 흉내내는 가짜 시리얼 장치
+
+    port 경로를 SerialComm에 그대로 넘기면 실제 아두이노처럼 동작함.
+    - 2초(시뮬레이션 시간)마다 JSON 또는 바이너리 센서 프레임 전송
+    - loop() 한 번에 명령 한 줄씩 처리 (핀 번호, "0", "on ...", "stop ...", "proto ...")
+    - speedup배 빠르게 시간이 흐름 (예: 100이면 프레임 간격 20ms)
+    """
+    def __init__(self, speedup=1.0, model=None, noise=True, nan_rate=0.0, seed=None):
+        self.speedup = speedup
+        self.model = model or ThermalModel()
+        self.noise = noise  # DHT 센서 분해능/잡음 흉내
+        self.nan_rate = nan_rate  # 센서 읽기 실패(NaN) 확률
+        self.random = random.Random(seed)
+        self.pin_states = [0] * len(CONTROL_PINS)
+        self.binary_mode = False
+        self.frame_seq = 0
+        self.sim_time = 0.0
+        self.commands = []  # 아직 처리하지 않은 명령 줄
+        self.stats = {"frames": 0, "commands": 0, "dropped_bytes": 0}
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)  # 에코/줄바꿈 변환 없이 바이트 그대로 전달
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        self.buffer = b""
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self.port
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def close(self):
+        self.stop()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _run(self):
+        interval = FRAME_PERIOD / self.speedup
+        next_frame = time.monotonic()
+        while self.running:
+            timeout = max(0.0, next_frame - time.monotonic())
+            readable, _, _ = select.select([self.master], [], [], timeout)
+            if readable:
+                self._receive()
+            if time.monotonic() >= next_frame:
+                self.loop()
+                next_frame += interval
+                if next_frame < time.monotonic():
+                    next_frame = time.monotonic() + interval  # 밀린 주기는 건너뜀
+
+    def _receive(self):
+        try:
+            self.buffer += os.read(self.master, 1024)
+        except (BlockingIOError, OSError):
+            return
+        *lines, self.buffer = self.buffer.split(b"\n")
+        self.commands.extend(line.decode(errors="replace").strip() for line in lines)
+
+    def loop(self):
+        """peltier.ino loop() 한 번: 시간 진행, 센서 프레임 전송, 명령 한 줄 처리"""
+        self.model.advance(FRAME_PERIOD)
+        self.sim_time += FRAME_PERIOD
+        readings = self.sensor_readings()
+        if self.binary_mode:
+            self._write(self.binary_frame(readings))
+        else:
+            self._write_json(self.json_frame(readings))
+        self.stats["frames"] += 1
+
+        if self.commands:
+            self.handle_command(self.commands.pop(0))
+
+    def sensor_readings(self):
+        """모델 값을 센서처럼 반올림 (sensor1, sensor3은 DHT11 정수, sensor2는 DHT22 0.1 단위)"""
+        values = []
+        for i, value in enumerate(self.model.readings()):
+            if self.random.random() < self.nan_rate:
+                values.append(float("nan"))
+                continue
+            if self.noise:
+                value += self.random.gauss(0.0, 0.1 if i % 2 == 0 else 0.5)
+            if i % 2:
+                value = min(max(value, 0.0), 100.0)
+            # DHT11 값은 ArduinoJson이 정수처럼 출력함 (예: 25)
+            values.append(round(value, 1) if i in (2, 3) else round(value))
+        return values
+
+    def json_frame(self, readings):
+        frame = {}
+        for index in range(3):
+            temperature, humidity = readings[index * 2], readings[index * 2 + 1]
+            frame[f"sensor{index + 1}"] = {
+                "temperature": None if math.isnan(temperature) else temperature,
+                "humidity": None if math.isnan(humidity) else humidity
+            }
+        frame["pinStates"] = list(self.pin_states)
+        return frame
+
+    def binary_frame(self, readings):
+        values = [MISSING_VALUE if math.isnan(v) else int(round(v * 100)) for v in readings]
+        pin_mask = sum(1 << i for i, state in enumerate(self.pin_states) if state)
+        body = FRAME_STRUCT.pack(FRAME_SYNC, FRAME_VERSION, self.frame_seq, *values, pin_mask, 0)[:-2]
+        self.frame_seq = (self.frame_seq + 1) & 0xFFFF
+        return body + binascii.crc_hqx(body[2:], 0xFFFF).to_bytes(2, "little")
+
+    def handle_command(self, command):
+        """peltier.ino의 명령 분기와 같은 순서로 처리"""
+        self.stats["commands"] += 1
+        pin = self._to_int(command)
+        if pin > 0:
+            self._control_pin(pin)
+        elif command == "0":
+            for index in range(len(CONTROL_PINS)):
+                self._set(index, 0)
+            self._println("All pins set to LOW.")
+        elif command.startswith("on "):
+            for pin in self._pins(command[3:]):
+                self._set(CONTROL_PINS.index(pin), 1)
+            self._send_ack("on")
+        elif command.startswith("stop"):
+            for pin in self._pins(command[5:]):
+                self._set(CONTROL_PINS.index(pin), 0)
+                self._println(f"Pin {pin} set to LOW.")
+            self._send_ack("stop")
+        elif command.startswith("proto "):
+            mode = command[6:].strip()
+            if mode not in ("bin", "json"):
+                self._println("Invalid protocol. Use 'proto bin' or 'proto json'.")
+                return
+            self.binary_mode = mode == "bin"
+            self._write_json({"ack": "proto", "mode": mode})
+        else:
+            self._println("Invalid command. Enter a valid pin number or '0' to turn all off.")
+
+    @staticmethod
+    def _to_int(text):
+        """Arduino String.toInt()처럼 앞쪽 숫자만 읽고 없으면 0"""
+        digits = ""
+        for char in text.strip():
+            if not char.isdigit():
+                break
+            digits += char
+        return int(digits) if digits else 0
+
+    def _pins(self, text):
+        return [pin for pin in (self._to_int(part) for part in text.split(" ")) if pin in CONTROL_PINS]
+
+    def _control_pin(self, pin):
+        if pin not in CONTROL_PINS:
+            self._println("Invalid pin. Pin not in control list.")
+            return
+        self._set(CONTROL_PINS.index(pin), 1)
+        self._println(f"Pin {pin} set to HIGH.")
+
+    def _set(self, index, state):
+        self.pin_states[index] = state
+        self.model.set_pin(CONTROL_PINS[index], state)
+
+    def _send_ack(self, command):
+        self._write_json({"ack": command, "pinStates": list(self.pin_states)})
+
+    def _write_json(self, document):
+        self._println(json.dumps(document, separators=(",", ":")))
+
+    def _println(self, text):
+        self._write((text + "\r\n").encode())  # Serial.println은 \r\n으로 끝남
+
+    def _write(self, data):
+        try:
+            os.write(self.master, data)
+        except (BlockingIOError, OSError):
+            # 읽는 쪽이 없어 버퍼가 가득 찬 경우 (실제 UART처럼 버림)
+            self.stats["dropped_bytes"] += len(data)
+
+    def snapshot(self):
+        """현재 시뮬레이션 상태 (시간, 모델 온습도, 핀 상태)"""
+        readings = self.model.readings()
+        return {
+            "sim_time": self.sim_time,
+            "readings": readings,
+            "pins": {PIN_NAMES[pin]: state for pin, state in zip(CONTROL_PINS, self.pin_states)},
+            "wet_load": self.model.wet_load,
+            **self.stats
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="peltier.ino 시리얼 장치 시뮬레이터")
+    parser.add_argument("--speedup", type=float, default=1.0, help="시간 가속 배율 (예: 100)")
+    parser.add_argument("--ambient-temp", type=float, default=25.0)
+    parser.add_argument("--ambient-humid", type=float, default=50.0)
+    parser.add_argument("--nan-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = CabinetSimulator(
+        speedup=args.speedup,
+        model=ThermalModel(args.ambient_temp, args.ambient_humid),
+        nan_rate=args.nan_rate,
+        seed=args.seed
+    )
+    print(f"시뮬레이터 포트: {simulator.start()} (x{args.speedup:g})")
+    try:
+        while True:
+            time.sleep(max(1.0, 60 / args.speedup))
+            state = simulator.snapshot()
+            temps = ", ".join(f"{value:.1f}" for value in state["readings"])
+            print(f"[{state['sim_time'] / 60:.1f}분] {temps} 핀: {state['pins']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
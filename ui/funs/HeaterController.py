@@ -0,0 +1,249 @@
+import math
+import threading
+import time
+
+from funs.CommandDispatcher import CONTROL_PINS
+from funs.LogConfig import get_logger
+from funs.Metrics import metrics
+
+logger = get_logger("heater")
+
+
+class HysteresisController:
+    """히스테리시스 온/오프 제어 (setpoint ± band/2 안에서는 이전 출력 유지)"""
+    def __init__(self, band=2.0):
+        self.band = band
+        self.output = None
+
+    def reset(self):
+        self.output = None
+
+    def update(self, setpoint, measurement, dt):
+        if self.output is None:
+            # 시작 직후 밴드 안이면 목표보다 낮을 때 켬
+            self.output = 1.0 if measurement < setpoint else 0.0
+        if measurement <= setpoint - self.band / 2:
+            self.output = 1.0
+        elif measurement >= setpoint + self.band / 2:
+            self.output = 0.0
+        return self.output
+
+
+class PIDController:
+    """출력 0~1 범위의 PID 제어 (조건부 적분으로 와인드업 방지, 미분은 측정값 기준)"""
+    def __init__(self, kp=0.2, ki=0.005, kd=0.0, output_min=0.0, output_max=1.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_min = output_min
+        self.output_max = output_max
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_measurement = None
+        self.output = 0.0
+
+    def update(self, setpoint, measurement, dt):
+        error = setpoint - measurement
+        proportional = self.kp * error
+        derivative = 0.0
+        if self.last_measurement is not None and dt > 0:
+            # setpoint가 바뀔 때 출력이 튀지 않도록 측정값의 변화로 미분
+            derivative = -self.kd * (measurement - self.last_measurement) / dt
+        self.last_measurement = measurement
+
+        integral = self.integral + error * dt
+        output = proportional + self.ki * integral + derivative
+        saturated_high = output > self.output_max and error > 0
+        saturated_low = output < self.output_min and error < 0
+        if not (saturated_high or saturated_low):
+            # 출력이 포화된 방향으로는 적분하지 않음
+            self.integral = integral
+        output = proportional + self.ki * self.integral + derivative
+
+        self.output = min(self.output_max, max(self.output_min, output))
+        return self.output
+
+
+class HeaterController:
+    """건조실 히터(릴레이) 제어 루프
+
+    - 하나의 쓰레드에서 period초마다 제어 출력 계산
+    - 공정값: sensor2(건조실) 온도, sensor3(히터 측)이 max_heater_temp를 넘으면 강제로 끔
+    - sensor1(제습 측)은 ff_gain으로 피드포워드에 사용 (기본 0 = 사용 안 함)
+    - PID 출력(0~1)은 pwm_window초 주기의 시간 비례 제어로 릴레이를 켜고 끔
+    - 릴레이 상태가 바뀔 때만, 그리고 min_switch_time 간격 이상으로만 명령 전송
+    - 시간 관련 설정은 time_scale배 빠르게 흐르는 시간 기준 (시뮬레이터 가속용, 기본 1)
+    """
+    def __init__(self, command_dispatcher, mode="hysteresis", period=2.0, heater_pin=8,
+                 max_heater_temp=80.0, hysteresis_band=2.0, pid=None, pwm_window=60.0,
+                 min_switch_time=10.0, ff_gain=0.0, time_scale=1.0):
+        self.command_dispatcher = command_dispatcher
+        self.mode = mode
+        self.period = period
+        self.heater_pin = heater_pin
+        self.max_heater_temp = max_heater_temp
+        self.pwm_window = pwm_window
+        self.min_switch_time = min_switch_time
+        self.ff_gain = ff_gain
+        self.time_scale = time_scale
+        if mode == "pid":
+            self.controller = PIDController(**(pid or {}))
+        else:
+            self.controller = HysteresisController(hysteresis_band)
+
+        self.lock = threading.Lock()
+        self.setpoint = None
+        self.releasing = False  # 목표 온도가 해제되어 히터를 한 번 꺼야 하는지
+        self.measurements = {}  # 최신 센서 데이터 {"sensor1": {...}, ..., "pinStates": [...]}
+        self.relay_on = None  # 릴레이 상태 (명령 응답 또는 텔레메트리 pinStates 기준)
+        self.pending = False  # 응답을 기다리는 명령이 있는지
+        self.last_switch = -math.inf  # 마지막 릴레이 명령 시각
+        self.window_start = self._now()
+        self.stats = {"switch_count": 0, "overtemp_count": 0, "output": 0.0, "error": None}
+        self.overtemp = False  # 직전 주기에 과열 상태였는지 (과열 진입 횟수 집계용)
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """제어 쓰레드 시작 (한 개만 실행)"""
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread = None
+
+    def set_setpoint(self, setpoint):
+        """목표 온도 설정 (None이면 제어 중지)"""
+        with self.lock:
+            if setpoint != self.setpoint:
+                self.controller.reset()
+                self.window_start = self._now()
+            if setpoint is None and self.setpoint is not None:
+                self.releasing = True  # 건조가 끝나면 켜 둔 히터를 끔
+            elif setpoint is not None:
+                self.releasing = False
+            self.setpoint = setpoint
+
+    def update_measurements(self, data):
+        """시리얼 수신 쓰레드에서 최신 센서 데이터 전달"""
+        with self.lock:
+            self.measurements = data
+            pin_states = data.get("pinStates")
+            # 명령 직후 도착한 이전 프레임으로 상태를 덮어쓰지 않도록 응답 후 잠시 기다림
+            if pin_states and not self.pending and self._now() - self.last_switch > 2 * self.period + 2 * self.time_scale:
+                index = CONTROL_PINS.index(self.heater_pin)
+                self.relay_on = bool(pin_states[index])
+
+    def _temperature(self, sensor):
+        value = self.measurements.get(sensor, {}).get("temperature")
+        return None if value is None or (isinstance(value, float) and math.isnan(value)) else float(value)
+
+    def _now(self):
+        return time.monotonic() * self.time_scale
+
+    def _run(self):
+        last = self._now()
+        while not self.stop_event.wait(self.period / self.time_scale):
+            now = self._now()
+            try:
+                self.step(now, now - last)
+            except Exception as e:
+                logger.exception("히터 제어 중 오류 발생: %s", e, extra={"event": "control_error"})
+            last = now
+
+    def step(self, now, dt):
+        """제어 한 주기: 출력 계산 후 필요하면 릴레이 명령 전송"""
+        with self.lock:
+            try:
+                chamber = self._temperature("sensor2")
+                heater = self._temperature("sensor3")
+                ambient = self._temperature("sensor1")
+
+                overtemp = heater is not None and heater >= self.max_heater_temp
+                was_overtemp, self.overtemp = self.overtemp, overtemp
+                if self.setpoint is None and not overtemp and not (self.releasing and self.relay_on is not False):
+                    self.releasing = False
+                    self.stats["output"] = 0.0
+                    self.stats["error"] = None
+                    return  # 건조 중이 아닐 때는 릴레이를 건드리지 않음
+
+                if self.setpoint is None or chamber is None:
+                    output = 0.0
+                    self.stats["error"] = None
+                else:
+                    output = self.controller.update(self.setpoint, chamber, dt)
+                    if ambient is not None:
+                        output = min(1.0, max(0.0, output + self.ff_gain * (self.setpoint - ambient)))
+                    self.stats["error"] = self.setpoint - chamber
+                self.stats["output"] = output
+
+                if overtemp:
+                    self.stats["overtemp_count"] += 1
+                    if not was_overtemp:
+                        metrics.count("heater_overtemp_trips")
+                    desired = False
+                elif self.setpoint is None:
+                    desired = False
+                elif self.mode == "pid":
+                    # 시간 비례 제어: 주기 앞부분 output 비율만큼 켬
+                    if now - self.window_start >= self.pwm_window:
+                        self.window_start += self.pwm_window * ((now - self.window_start) // self.pwm_window)
+                    desired = (now - self.window_start) < output * self.pwm_window
+                else:
+                    desired = output >= 0.5
+
+                if self.pending or desired == self.relay_on:
+                    return
+                # 과열 차단과 건조 종료 시 끄기는 즉시, 그 외에는 최소 전환 간격을 지킴
+                if not overtemp and self.setpoint is not None and now - self.last_switch < self.min_switch_time:
+                    return
+                self.pending = True
+                self.last_switch = now
+                self.stats["switch_count"] += 1
+                metrics.count("heater_switches", state="on" if desired else "off")
+            finally:
+                self._publish_metrics()
+
+        if desired:
+            logger.info("히터를 켭니다.", extra={"event": "heater_on", **self._log_fields()})
+            self.command_dispatcher.turn_on([self.heater_pin], lambda future: self._on_switched(future, True))
+        else:
+            if overtemp:
+                logger.warning("히터 측 온도가 너무 높아서 히터를 끕니다.",
+                               extra={"event": "heater_overtemp", **self._log_fields()})
+            else:
+                logger.info("히터를 끕니다.", extra={"event": "heater_off", **self._log_fields()})
+            self.command_dispatcher.turn_off([self.heater_pin], lambda future: self._on_switched(future, False))
+
+    def _on_switched(self, future, state):
+        with self.lock:
+            self.pending = False
+            if future.exception():
+                logger.error("히터 명령 실패: %s", future.exception(), extra={"event": "switch_failed"})
+            else:
+                self.relay_on = state
+            self.last_switch = self._now()
+
+    def _log_fields(self):
+        return {"setpoint": self.setpoint, "chamber_temp": self._temperature("sensor2"),
+                "heater_temp": self._temperature("sensor3")}
+
+    def _publish_metrics(self):
+        """제어 상태를 메트릭 게이지로 기록 (step()에서 락을 잡은 채 호출, 값이 없으면 NaN)"""
+        def gauge(value):
+            return math.nan if value is None else float(value)
+
+        metrics.set_gauge("heater_setpoint", gauge(self.setpoint))
+        metrics.set_gauge("heater_output", gauge(self.stats["output"]))
+        metrics.set_gauge("heater_error", gauge(self.stats["error"]))
+        metrics.set_gauge("heater_relay_on", gauge(self.relay_on))
+        metrics.set_gauge("heater_chamber_temp", gauge(self._temperature("sensor2")))
+        metrics.set_gauge("heater_temp", gauge(self._temperature("sensor3")))
+        metrics.set_gauge("heater_switch_count", self.stats["switch_count"])
+        metrics.set_gauge("heater_overtemp_count", self.stats["overtemp_count"])
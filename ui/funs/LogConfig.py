@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import logging.handlers
+import threading
+from datetime import datetime
+
+ROOT_LOGGER = "shoecabinet"
+# LogRecord 기본 속성 (나머지는 extra로 넘긴 필드로 보고 JSON에 포함)
+STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+
+
+def get_logger(component):
+    """컴포넌트별 로거 (예: get_logger("serial") -> shoecabinet.serial)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+def timed_fields(event, start, **fields):
+    """extra로 넘길 event/duration_ms 필드 (start는 time.perf_counter() 값)"""
+    return {"event": event, "duration_ms": round((time.perf_counter() - start) * 1000, 3), **fields}
+
+
+class RateLimitFilter(logging.Filter):
+    """같은 WARNING 이상 메시지는 interval초에 한 번만 통과시키고 생략한 횟수를 다음 기록에 붙임"""
+    def __init__(self, interval=10.0, min_level=logging.WARNING, max_keys=1000):
+        super().__init__()
+        self.interval = interval
+        self.min_level = min_level
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.seen = {}  # (로거, 레벨, 메시지) -> [마지막으로 통과한 시각, 생략 횟수]
+
+    def filter(self, record):
+        if record.levelno < self.min_level or self.interval <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self.lock:
+            entry = self.seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            if entry is not None and entry[1]:
+                record.suppressed = entry[1]
+            if len(self.seen) >= self.max_keys:
+                self.seen.clear()
+            self.seen[key] = [now, 0]
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """호출한 쓰레드에서는 메시지 조립만 하고 큐가 가득 차면 기다리지 않고 버림"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.component = record.name[len(ROOT_LOGGER) + 1:] if record.name.startswith(ROOT_LOGGER + ".") else record.name
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 레코드 하나 (ts, level, component, event, message, duration_ms, ...)"""
+    def format(self, record):
+        document = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "component": getattr(record, "component", record.name),
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRS and key not in document:
+                document[key] = value
+        document["thread"] = record.threadName
+        if record.exc_text:
+            document["exc"] = record.exc_text
+        return json.dumps(document, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """콘솔용 한 줄 텍스트 (생략 횟수와 소요 시간이 있으면 뒤에 붙임)"""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(component)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "duration_ms", None) is not None:
+            text += f" ({record.duration_ms:.1f}ms)"
+        if getattr(record, "suppressed", 0):
+            text += f" (같은 메시지 {record.suppressed}회 생략)"
+        return text
+
+
+def _make_sink(sink):
+    kind = sink.get("type", "console")
+    if kind == "file":
+        handler = logging.handlers.RotatingFileHandler(
+            sink["path"], maxBytes=sink.get("max_bytes", 5 * 1024 * 1024),
+            backupCount=sink.get("backup_count", 3), encoding="utf-8"
+        )
+    elif kind == "console":
+        handler = logging.StreamHandler(sys.stdout)
+    else:
+        raise ValueError(f"알 수 없는 로그 출력 종류: {kind}")
+    handler.setFormatter(JsonFormatter() if sink.get("format", "text") == "json" else TextFormatter())
+    if "level" in sink:
+        handler.setLevel(sink["level"])
+    return handler
+
+
+def setup_logging(level="INFO", sinks=None, rate_limit=10.0, queue_size=10000, levels=None):
+    """config.yaml의 logging 설정 적용
+
+    호출한 쓰레드는 큐에 넣기만 하고 파일/콘솔 출력은 QueueListener 쓰레드에서 처리함.
+    """
+    global _listener
+    shutdown_logging()
+
+    sinks = sinks or [{"type": "console", "format": "text"}]
+    for sink in sinks:
+        if sink.get("type") == "file":
+            os.makedirs(os.path.dirname(sink["path"]) or ".", exist_ok=True)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(rate_limit))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    root.propagate = False
+    for component, component_level in (levels or {}).items():
+        get_logger(component).setLevel(component_level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *[_make_sink(sink) for sink in sinks], respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """남은 기록을 모두 출력하고 리스너 쓰레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
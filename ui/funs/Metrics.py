@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import bisect
+import threading
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from funs.LogConfig import get_logger
+
+logger = get_logger("metrics")
+
+PREFIX = "shoecabinet"
+# 히스토그램 구간 경계 (초): 0.1ms ~ 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullTimer:
+    """비활성화 상태에서 돌려주는 아무것도 하지 않는 타이머"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """고정 구간 히스토그램 + 최근 표본 (메모리 사용량 고정)"""
+    def __init__(self, buckets=DEFAULT_BUCKETS, recent=1024):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=recent)  # 백분위수 계산용 최근 표본
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self.max = max(self.max, value)
+            self.recent.append(value)
+
+    def snapshot(self):
+        with self.lock:
+            recent = sorted(self.recent)
+            summary = {"count": self.count, "sum": self.sum, "max": self.max, "buckets": list(self.counts)}
+        for q in (50, 90, 99):
+            summary[f"p{q}"] = recent[min(len(recent) - 1, len(recent) * q // 100)] if recent else None
+        return summary
+
+
+class MetricsRegistry:
+    """타이머/카운터 모음 (기본은 비활성화, 비활성화 시 호출 비용은 속성 확인 한 번)
+
+    with metrics.timer("model_invoke"):
+        interpreter.invoke()
+    metrics.count("serial_frames")
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms = {}  # (이름, 라벨) -> Histogram
+        self.counters = {}  # (이름, 라벨) -> 값
+        self.gauges = {}  # (이름, 라벨) -> 값
+        self.server = None
+        self.dump_thread = None
+        self.dump_stop = threading.Event()
+        self.json_path = None
+
+    def configure(self, enabled=False, http_host="127.0.0.1", http_port=None, unix_socket=None,
+                  json_path=None, json_interval=60.0):
+        """config.yaml의 metrics 설정 적용 (엔드포인트/JSON 덤프 쓰레드 시작)"""
+        self.enabled = enabled
+        if not enabled:
+            return
+        if http_port:
+            self.server = ThreadingHTTPServer((http_host, http_port), _MetricsRequestHandler)
+        elif unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            self.server = _UnixHTTPServer(unix_socket, _MetricsRequestHandler)
+        if self.server:
+            self.server.registry = self
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            endpoint = f"http://{http_host}:{http_port}/metrics" if http_port else unix_socket
+            logger.info("메트릭 엔드포인트 시작: %s", endpoint, extra={"event": "endpoint_started"})
+        if json_path:
+            self.json_path = json_path
+            self.dump_stop.clear()
+            self.dump_thread = threading.Thread(target=self._dump_loop, args=(json_interval,), daemon=True)
+            self.dump_thread.start()
+
+    def stop(self):
+        """엔드포인트를 닫고 마지막 JSON 덤프 저장"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.dump_thread:
+            self.dump_stop.set()
+            self.dump_thread = None
+            self.dump_json()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())) if labels else ())
+
+    def histogram(self, name, **labels):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def timer(self, name, **labels):
+        """걸린 시간을 name 히스토그램에 기록하는 컨텍스트 매니저"""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self.histogram(name, **labels))
+
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self.histogram(name, **labels).observe(seconds)
+
+    def count(self, name, value=1, **labels):
+        if self.enabled:
+            key = self._key(name, labels)
+            with self.lock:
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        if self.enabled:
+            self.gauges[self._key(name, labels)] = value
+
+    def snapshot(self):
+        """현재 값 전체를 JSON으로 바꿀 수 있는 딕셔너리로 반환"""
+        def label_name(name, labels):
+            return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        with self.lock:
+            histograms = list(self.histograms.items())
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {
+            "timestamp": time.time(),
+            "timers": {label_name(*key): histogram.snapshot() for key, histogram in histograms},
+            "counters": {label_name(*key): value for key, value in counters.items()},
+            "gauges": {label_name(*key): value for key, value in gauges.items()},
+            "bucket_bounds": list(DEFAULT_BUCKETS),
+        }
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        def label_text(labels, extra=()):
+            pairs = [f'{k}="{v}"' for k, v in tuple(labels) + tuple(extra)]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), histogram in histograms:
+            metric = f"{PREFIX}_{name}_seconds"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            snapshot = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], snapshot["buckets"]):
+                cumulative += count
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{label_text(labels)} {snapshot['sum']}")
+            lines.append(f"{metric}_count{label_text(labels)} {snapshot['count']}")
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{label_text(labels)} {value}")
+        for (name, labels), value in gauges:
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{label_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path=None):
+        """JSON 파일로 저장 (임시 파일에 쓴 뒤 교체해서 읽는 쪽이 반쯤 쓴 파일을 보지 않게 함)"""
+        path = path or self.json_path
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logger.error("메트릭 저장 실패: %s", e, extra={"event": "dump_failed"})
+
+    def _dump_loop(self, interval):
+        while not self.dump_stop.wait(interval):
+            self.dump_json()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """GET /metrics (Prometheus 텍스트), GET /metrics.json"""
+    def do_GET(self):
+        registry = self.server.registry
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(registry.snapshot()).encode()
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = registry.prometheus_text().encode()
+            content_type = "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 출력하지 않음
+
+    def address_string(self):
+        return str(self.client_address)
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """유닉스 소켓으로 같은 HTTP 응답 제공 (curl --unix-socket PATH http://localhost/metrics)"""
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)  # BaseHTTPRequestHandler가 (host, port)를 기대함
+
+
+# 프로세스 전체에서 공유하는 레지스트리
+metrics = MetricsRegistry()
@@ -1,41 +1,215 @@
+import os
+import json
+import time
+import platform
+import threading
 import numpy as np
 from PIL import Image
 from tflite_runtime.interpreter import Interpreter
 
+from funs.Metrics import metrics
+from funs.LogConfig import get_logger, timed_fields
+
+logger = get_logger("model")
+
+# camera/model.py가 만드는 변환 종류 (float32는 model.tflite, 나머지는 model_<종류>.tflite)
+VARIANTS = ("float32", "dynamic", "float16", "int8")
+
+
+def variant_path(model_dir, name, variant):
+    suffix = "" if variant == "float32" else f"_{variant}"
+    return os.path.join(model_dir, f"{name}{suffix}.tflite")
+
+
+def load_metadata(model_path):
+    """model_int8.tflite 옆의 model_int8.json (정확도, 지연 시간 등), 없으면 빈 딕셔너리"""
+    path = os.path.splitext(model_path)[0] + ".json"
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def select_model_variant(model_dir="./model", name="model", variant="float32", max_accuracy_drop=0.02):
+    """config의 model 설정으로 사용할 .tflite 경로 선택
+
+    - variant가 float32/dynamic/float16/int8이면 해당 파일 (없으면 float32 모델)
+    - auto면 메타데이터가 있는 변환 중 정확도가 최고보다 max_accuracy_drop 이상 낮지 않은 것 가운데
+      이 장비에서 잰 지연 시간(camera/measure_latency.py가 기록한 device_latency_ms)이 가장 짧은 것.
+      장비 측정값이 없으면 학습 장비의 지연 시간은 믿을 수 없으므로 정확도가 가장 높은 것
+    """
+    default = variant_path(model_dir, name, "float32")
+    if variant == "auto":
+        candidates = []
+        for candidate in VARIANTS:
+            path = variant_path(model_dir, name, candidate)
+            metadata = load_metadata(path) if os.path.exists(path) else {}
+            if metadata.get("accuracy") is not None:
+                candidates.append((metadata, path))
+        if not candidates:
+            return default
+        best_accuracy = max(metadata["accuracy"] for metadata, _ in candidates)
+        eligible = [(metadata, path) for metadata, path in candidates if metadata["accuracy"] >= best_accuracy - max_accuracy_drop]
+        measured = [(metadata, path) for metadata, path in eligible if metadata.get("device_latency_ms")]
+        if not measured:
+            logger.warning("장비에서 잰 지연 시간이 없어 정확도가 가장 높은 모델을 사용합니다 "
+                           "(라즈베리파이에서 camera/measure_latency.py 실행 필요)", extra={"event": "no_device_latency"})
+            return max(candidates, key=lambda item: item[0]["accuracy"])[1]
+        if len(measured) < len(eligible):
+            logger.warning("장비 지연 시간이 없는 변환은 제외합니다: %s",
+                           [metadata.get("variant") for metadata, _ in eligible if not metadata.get("device_latency_ms")],
+                           extra={"event": "no_device_latency"})
+        machine = platform.machine()
+        for metadata, path in measured:
+            device = metadata["device_latency_ms"].get("device", "")
+            if machine not in device.split():
+                logger.warning("%s의 지연 시간은 다른 장비(%s)에서 측정됨", path, device, extra={"event": "device_mismatch"})
+        return min(measured, key=lambda item: item[0]["device_latency_ms"]["p50"])[1]
+
+    if variant not in VARIANTS:
+        raise ValueError(f"알 수 없는 모델 변환 종류: {variant}")
+    path = variant_path(model_dir, name, variant)
+    if not os.path.exists(path):
+        logger.warning("%s 모델이 없어 float32 모델을 사용합니다: %s", variant, path,
+                       extra={"event": "variant_missing"})
+        return default
+    return path
+
+
 class ModelHandler:
     """TFLite 모델을 사용하여 예측하는 클래스"""
-    def __init__(self, model_path="./model/model.tflite"):
+    def __init__(self, model_path="./model/model.tflite", warmup=True):
         self.model_path = model_path
+        self.interpreter = None
+        self.input_details = None
+        self.output_details = None
+        self.input_lut = None  # 정수 입력 모델: 픽셀값(0~255) -> 양자화된 입력값 표
+        self.output_quantization = None  # 정수 출력 모델: (scale, zero_point)
+        self.metadata = {}
+        self.model_mtime = None  # 로드된 모델 파일의 수정 시각
+        self.lock = threading.Lock()  # invoke() 및 인터프리터 교체 보호
+        self.load_lock = threading.Lock()  # 중복 로드 방지
 
-    def predict_shoe_type(self, image_path):
-        """TFLite 모델을 사용하여 신발 유형을 예측"""
+        if warmup:
+            # 클릭 시 로드 비용이 들지 않도록 백그라운드에서 미리 로드 및 워밍업
+            self.warmup_thread = threading.Thread(target=self._load_in_background, daemon=True)
+            self.warmup_thread.start()
 
+    def _load_in_background(self):
         try:
-            # 모델 로드
+            self.load_model()
+        except Exception as e:
+            logger.exception("모델 로드 중 오류가 발생했습니다: %s", e, extra={"event": "load_error"})
+
+    def load_model(self):
+        """모델을 로드하고 더미 입력으로 워밍업한 뒤 캐시된 인터프리터를 교체"""
+        with self.load_lock:
+            mtime = os.path.getmtime(self.model_path)
+            if self.interpreter is not None and mtime == self.model_mtime:
+                return  # 다른 쓰레드가 이미 최신 모델을 로드함
+            start = time.perf_counter()
+
             interpreter = Interpreter(model_path=self.model_path)
             interpreter.allocate_tensors()
+            input_details = interpreter.get_input_details()[0]
+            output_details = interpreter.get_output_details()[0]
+            input_lut, output_quantization = self._quantization(input_details, output_details)
+
+            # 첫 추론 지연(메모리 할당, 커널 준비)을 미리 소모
+            dummy = np.zeros(input_details['shape'], dtype=input_details['dtype'])
+            interpreter.set_tensor(input_details['index'], dummy)
+            interpreter.invoke()
+
+            with self.lock:
+                self.interpreter = interpreter
+                self.input_details = input_details
+                self.output_details = output_details
+                self.input_lut = input_lut
+                self.output_quantization = output_quantization
+                self.metadata = load_metadata(self.model_path)
+                self.model_mtime = mtime
+            logger.info("모델이 로드되었습니다: %s", self.model_path, extra=timed_fields(
+                "model_loaded", start, variant=self.metadata.get("variant"),
+                input_dtype=np.dtype(input_details['dtype']).name, accuracy=self.metadata.get("accuracy")
+            ))
+
+    @staticmethod
+    def _quantization(input_details, output_details):
+        """int8/uint8 입출력 모델의 양자화 정보
+
+        입력은 0~255 픽셀값 x에 대해 round(x / 255 / scale + zero_point)를 미리 계산한 256칸 표로 변환하고,
+        출력은 (q - zero_point) * scale로 확률값 복원.
+        """
+        input_lut = None
+        if np.issubdtype(input_details['dtype'], np.integer):
+            scale, zero_point = input_details['quantization']
+            info = np.iinfo(input_details['dtype'])
+            values = np.round(np.arange(256) / 255.0 / scale + zero_point)
+            input_lut = np.clip(values, info.min, info.max).astype(input_details['dtype'])
+
+        output_quantization = None
+        if np.issubdtype(output_details['dtype'], np.integer):
+            output_quantization = output_details['quantization']
+        return input_lut, output_quantization
+
+    def _ensure_model(self):
+        """모델이 없거나 디스크의 .tflite 파일이 바뀌었으면 다시 로드"""
+        if self.interpreter is None or os.path.getmtime(self.model_path) != self.model_mtime:
+            self.load_model()
+
+    def predict_shoe_type(self, image_path):
+        """TFLite 모델을 사용하여 신발 유형을 예측"""
 
-            input_details = interpreter.get_input_details()
-            output_details = interpreter.get_output_details()
-            input_shape = input_details[0]['shape'][1:3]  # (높이, 너비)
-            input_dtype = input_details[0]['dtype']
+        try:
+            image = Image.open(image_path).convert("RGB")  # RGB로 변환
+            return self.predict_shoe_type_from_array(np.asarray(image))
 
-            # 이미지 전처리
-            image = Image.open(image_path).convert("RGB")  # 그레이스케일로 변환
-            image = image.resize(input_shape)  # 모델 입력 크기에 맞게 리사이즈
-            input_data = np.expand_dims(np.array(image) / 255.0, axis=0)  # 정규화 및 채널 차원 추가
-            input_data = input_data.astype(input_dtype)
+        except Exception as e:
+            logger.error("모델 예측 중 오류가 발생했습니다: %s", e, extra={"event": "predict_error"})
+            return "예측 실패", ""
 
-            # print(f"Input shape expected: {input_details[0]['shape']}")
-            # print(f"Input data shape: {input_data.shape}")
+    @staticmethod
+    def _resize(frame, size):
+        """RGB 프레임을 모델 입력 크기 (height, width)로 리사이즈"""
+        height, width = size
+        return np.asarray(Image.fromarray(np.ascontiguousarray(frame)).resize((width, height)))
+
+    def predict_shoe_type_from_array(self, frame):
+        """RGB NumPy 프레임(H, W, 3)으로 신발 유형을 예측 (파일 입출력 없음)"""
+
+        try:
+            self._ensure_model()
+
+            # 리사이즈는 락 밖에서 (그 사이 핫 리로드로 입력 크기가 바뀌면 락 안에서 다시 리사이즈)
+            size = tuple(self.input_details['shape'][1:3])
+            with metrics.timer("model_preprocess"):
+                resized = self._resize(frame, size)
 
             # 모델 예측
-            interpreter.set_tensor(input_details[0]['index'], input_data)
-            interpreter.invoke()
-            output_data = interpreter.get_tensor(output_details[0]['index'])[0]
+            with self.lock:
+                # 교체 중에 섞이지 않도록 인터프리터와 입출력 정보를 한 번에 가져와서 이것만 사용
+                interpreter, input_details, output_details = self.interpreter, self.input_details, self.output_details
+                input_lut, output_quantization = self.input_lut, self.output_quantization
+                if tuple(input_details['shape'][1:3]) != size:
+                    resized = self._resize(frame, tuple(input_details['shape'][1:3]))
+                # 입력 텐서 버퍼에 직접 정규화(또는 양자화)하여 기록 (중간 배열 생성 없음)
+                input_tensor = interpreter.tensor(input_details['index'])()
+                if input_lut is not None:
+                    np.take(input_lut, resized, out=input_tensor[0], mode="clip")
+                else:
+                    np.multiply(resized, 1.0 / 255.0, out=input_tensor[0], casting='unsafe')
+                del input_tensor  # invoke() 전에 버퍼 참조 해제
+                with metrics.timer("model_invoke"):
+                    interpreter.invoke()
+                output_data = interpreter.get_tensor(output_details['index'])[0]
+
+            if output_quantization is not None:
+                scale, zero_point = output_quantization
+                output_data = (output_data.astype(np.float32) - zero_point) * scale
 
+            metrics.count("model_predictions")
             return output_data
 
         except Exception as e:
-            print(f"모델 예측 중 오류가 발생했습니다: {e}")
+            logger.error("모델 예측 중 오류가 발생했습니다: %s", e, extra={"event": "predict_error"})
             return "예측 실패", ""
@@ -1,35 +1,270 @@
 import serial
 import json
+import time
+import threading
+import queue
+import struct
+import binascii
+
+from funs.Metrics import metrics
+from funs.LogConfig import get_logger
+
+logger = get_logger("serial")
+
+# peltier.ino의 바이너리 텔레메트리 프레임 (리틀 엔디안, 20바이트)
+# sync(0xAA 0x55) | version | seq(u16) | 온도/습도 x3 (int16, 0.01 단위) | 핀 비트마스크 | CRC16
+FRAME_SYNC = b"\xaa\x55"
+FRAME_VERSION = 1
+FRAME_STRUCT = struct.Struct("<2sBH6hBH")
+FRAME_SIZE = FRAME_STRUCT.size
+MISSING_VALUE = -32768  # 센서 오류(NaN)
+# 읽기 오류 시 재시도 간격 (초, 연속 오류마다 두 배), 연속 오류가 이만큼이면 포트를 다시 엶
+RETRY_DELAY = 0.1
+MAX_RETRY_DELAY = 5.0
+REOPEN_AFTER = 3
+
+def frame_is_valid(frame):
+    """버전과 CRC16(CCITT, 초기값 0xFFFF)이 맞는 프레임인지"""
+    return frame[2] == FRAME_VERSION and binascii.crc_hqx(frame[2:-2], 0xFFFF) == int.from_bytes(frame[-2:], "little")
+
 
 class SerialComm:
-    def __init__(self, port='/dev/ttyACM0', baudrate=9600, timeout=1, bytesize=8):
+    def __init__(self, port='/dev/ttyACM0', baudrate=9600, timeout=1, bytesize=8, protocol="json"):
+        self.port_settings = {"port": port, "baudrate": baudrate, "timeout": timeout, "bytesize": bytesize}
         try:
-            self.ser = serial.Serial(port, baudrate, timeout=timeout, bytesize=bytesize)
-            print(f"Serial port {port} opened successfully!")
+            self.ser = serial.Serial(**self.port_settings)
+            logger.info("Serial port %s opened successfully!", port, extra={"event": "port_opened"})
         except serial.SerialException as e:
-            print(f"Failed to open serial port {port}: {e}")
+            logger.error("Failed to open serial port %s: %s", port, e, extra={"event": "port_open_failed"})
             self.ser = None
         self.data = {}
+        self.line_listeners = []  # 텍스트 응답("Pin N set to HIGH." 등)을 받을 함수들
+        self.reopen_listeners = []  # 포트를 다시 연 뒤 호출할 함수들 (아두이노가 리셋되므로 전송 형식 재협상 등)
+        self.read_errors = 0  # 연속 읽기 오류 수
+        self.write_lock = threading.Lock()
+        self.frames = queue.Queue(maxsize=100)  # 수신한 센서 데이터 줄
+        self.reader_thread = None
+        self.reading = False
+        self.protocol = protocol  # 시작 시 아두이노와 협상할 전송 형식 ("json" 또는 "bin")
+        self.last_seq = None
+        self.dropped_frames = 0  # 시퀀스 번호로 확인한 누락 프레임 수
+        self.bad_frames = 0  # CRC 오류 등으로 버린 프레임 수
+        self.skipped_bytes = 0  # sync를 찾느라 버린 바이트 수
+        self.rx_buffer = bytearray()  # 동기화를 다시 맞추려고 되돌려 둔 수신 바이트
 
-    def read_data(self):
-        if self.ser and self.ser.in_waiting > 0:
-            line = self.ser.readline().decode('utf-8').strip()
-            # print(f"받은 데이터: {line}")
+    def add_line_listener(self, listener):
+        """JSON이 아닌 응답 줄을 전달받을 리스너 등록"""
+        self.line_listeners.append(listener)
+
+    def add_reopen_listener(self, listener):
+        """읽기 오류로 포트를 다시 열었을 때 호출할 함수 등록"""
+        self.reopen_listeners.append(listener)
+
+    def write_line(self, text):
+        """명령 한 줄 전송 (아두이노는 '\n'까지 읽음)"""
+        with self.write_lock:
+            self.ser.write((text + "\n").encode())
+
+    def start_reader(self):
+        """전용 쓰레드에서 시리얼을 블로킹으로 읽어 센서 데이터를 큐에 넣음"""
+        if self.ser is None or self.reader_thread is not None:
+            return
+        self.reading = True
+        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.reader_thread.start()
+
+    def stop_reader(self):
+        self.reading = False
+
+    def _reader_loop(self):
+        """읽기 오류가 나도 멈추지 않음: 잠시 쉬었다 다시 읽고, 계속 실패하면 포트를 다시 엶"""
+        while self.reading:
+            try:
+                if self.ser is None:
+                    self._reopen()
+                    continue
+                line = self.read_data()
+                self.read_errors = 0
+                if line:
+                    self._put_frame(line)
+            except Exception as e:
+                # pyserial의 "device reports readiness to read but returned no data" 등 일시적인 오류 포함
+                self.read_errors += 1
+                metrics.count("serial_read_errors")
+                logger.warning("시리얼 읽기 오류 (연속 %d회): %s", self.read_errors, e, extra={"event": "read_error"})
+                self._backoff()
+                if self.read_errors >= REOPEN_AFTER:
+                    self._reopen()
+        self.reader_thread = None
+
+    def _backoff(self):
+        time.sleep(min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** max(0, self.read_errors - 1)))
+
+    def _reopen(self):
+        """포트를 닫고 다시 엶 (USB 재연결 등), 실패하면 다음 재시도까지 대기"""
+        with self.write_lock:
+            if self.ser is not None:
+                try:
+                    self.ser.close()
+                except Exception:
+                    pass
+                self.ser = None
+            try:
+                self.ser = serial.Serial(**self.port_settings)
+            except (serial.SerialException, OSError) as e:
+                self.read_errors += 1
+                logger.error("시리얼 포트 다시 열기 실패: %s", e, extra={"event": "port_reopen_failed"})
+        if self.ser is None:
+            self._backoff()
+            return
+        self.read_errors = 0
+        self.last_seq = None  # 아두이노가 리셋되어 시퀀스 번호가 처음부터 다시 시작됨
+        metrics.count("serial_reopens")
+        logger.info("시리얼 포트를 다시 열었습니다: %s", self.port_settings["port"], extra={"event": "port_reopened"})
+        for listener in self.reopen_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error("포트 재연결 처리 오류: %s", e, extra={"event": "reopen_listener_error"})
+
+    def _put_frame(self, line):
+        """큐가 가득 차면 가장 오래된 데이터를 버리고 최신 데이터를 넣음"""
+        while True:
+            try:
+                self.frames.put_nowait(line)
+                return
+            except queue.Full:
+                metrics.count("serial_queue_overflows")
+                try:
+                    self.frames.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get_frame(self, timeout=None):
+        """다음 센서 데이터 줄을 기다려서 반환 (timeout 동안 없으면 None)"""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _read(self, size):
+        """되돌려 둔 바이트를 먼저 쓰고 모자라면 포트에서 읽음"""
+        data = bytes(self.rx_buffer[:size])
+        del self.rx_buffer[:size]
+        if len(data) < size:
+            data += self.ser.read(size - len(data))
+        return data
+
+    def _readline(self):
+        index = self.rx_buffer.find(b"\n")
+        if index >= 0:
+            line = bytes(self.rx_buffer[:index + 1])
+            del self.rx_buffer[:index + 1]
             return line
-        return None
+        line = bytes(self.rx_buffer)
+        self.rx_buffer.clear()
+        return line + self.ser.readline()
+
+    def _resync(self, data):
+        """잘못 읽은 데이터를 버리고, 그 안에 다음 sync가 있으면 거기부터 다시 읽도록 되돌림"""
+        self.bad_frames += 1
+        metrics.count("serial_bad_frames")
+        index = data.find(FRAME_SYNC, 1)
+        if index < 0 and data.endswith(FRAME_SYNC[:1]):
+            index = len(data) - 1  # 마지막 바이트가 다음 sync의 첫 바이트일 수 있음
+        if index > 0:
+            self.rx_buffer[:0] = data[index:]
+
+    def read_data(self):
+        """한 메시지를 읽음 (데이터가 올 때까지 포트 timeout 동안 블로킹)
+        - CRC까지 맞는 바이너리 프레임이면 bytes, 센서 JSON이면 str 반환
+        - 명령 응답 텍스트는 리스너에게 넘기고 None 반환
+        - 프레임 중간부터 읽었으면 다음 sync(0xAA 0x55)가 나올 때까지 버리고 None 반환
+        """
+        if not self.ser:
+            return None
+        first = self._read(1)
+        if not first:
+            return None
+        # 측정 구간은 첫 바이트 이후 메시지 끝까지 (데이터를 기다리는 시간은 제외)
+        if first == FRAME_SYNC[:1]:
+            with metrics.timer("serial_read", format="bin"):
+                frame = first + self._read(FRAME_SIZE - 1)
+            if len(frame) == FRAME_SIZE and frame.startswith(FRAME_SYNC) and frame_is_valid(frame):
+                return frame
+            self._resync(frame)
+            return None
+
+        if first != b"{" and not 0x20 <= first[0] < 0x7f:
+            # 텍스트 응답이나 JSON이 시작될 수 없는 바이트: 한 바이트씩 버리며 sync를 찾음
+            self.skipped_bytes += 1
+            metrics.count("serial_skipped_bytes")
+            return None
+
+        with metrics.timer("serial_read", format="json"):
+            raw = first + self._readline()
+        line = raw.decode('utf-8', errors='replace').strip()
+        if "\ufffd" in line or any(ord(char) < 0x20 for char in line):
+            # 출력 가능한 바이트로 시작한 바이너리 데이터: 텍스트 응답으로 넘기지 않음
+            self._resync(raw)
+            return None
+        # logger.debug("받은 데이터: %s", line)
+        if line and (not line.startswith("{") or line.startswith('{"ack"')):
+            # 명령 응답은 리스너에게 넘기고 센서 데이터로 처리하지 않음
+            for listener in self.line_listeners:
+                listener(line)
+            return None
+        return line
+
+    def parse_binary_frame(self, frame):
+        """바이너리 프레임을 JSON과 같은 형태의 딕셔너리로 변환"""
+        _, version, seq, *values, pin_mask, crc = FRAME_STRUCT.unpack(frame)
+        if version != FRAME_VERSION:
+            raise ValueError(f"지원하지 않는 프레임 버전: {version}")
+        if binascii.crc_hqx(frame[2:-2], 0xFFFF) != crc:
+            raise ValueError("프레임 CRC 불일치")
+
+        if self.last_seq is not None:
+            dropped = (seq - self.last_seq - 1) & 0xFFFF
+            self.dropped_frames += dropped
+            if dropped:
+                metrics.count("serial_dropped_frames", dropped)
+        self.last_seq = seq
+
+        readings = [None if value == MISSING_VALUE else value / 100 for value in values]
+        return {
+            "sensor1": {"temperature": readings[0], "humidity": readings[1]},
+            "sensor2": {"temperature": readings[2], "humidity": readings[3]},
+            "sensor3": {"temperature": readings[4], "humidity": readings[5]},
+            "pinStates": [(pin_mask >> i) & 1 for i in range(6)]
+        }
 
     def parse_data(self, line):
+        with metrics.timer("serial_parse", format="bin" if isinstance(line, bytes) else "json"):
+            self._parse(line)
+        metrics.count("serial_frames")
+
+    def _parse(self, line):
+        if isinstance(line, bytes):
+            try:
+                self.data = self.parse_binary_frame(line)
+            except Exception as e:
+                self.bad_frames += 1
+                metrics.count("serial_bad_frames")
+                logger.warning("바이너리 프레임 오류: %s", e, extra={"event": "bad_frame"})
+            return
         try:
             json_data = json.loads(line)  # JSON 문자열 파싱
             self.data = {
                 "sensor1": json_data.get("sensor1", {}),
                 "sensor2": json_data.get("sensor2", {}),
-                "sensor3": json_data.get("sensor3", {})
+                "sensor3": json_data.get("sensor3", {}),
+                "pinStates": json_data.get("pinStates", [])
             }
         except json.JSONDecodeError as e:
-            print(f"JSON 파싱 오류: {e}")
+            logger.warning("JSON 파싱 오류: %s", e, extra={"event": "bad_json"})
         except Exception as e:
-            print(f"데이터 처리 오류: {e}")
+            logger.error("데이터 처리 오류: %s", e, extra={"event": "parse_error"})
 
     def get_data(self):
         return self.data
\ No newline at end of file
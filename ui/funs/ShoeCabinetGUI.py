@@ -2,8 +2,15 @@ import tkinter as tk
 from tkinter import font, messagebox
 from PIL import Image, ImageTk
 import time
+from collections import OrderedDict
 import numpy as np
 
+from funs.UIUpdateBus import UIUpdateBus
+from funs.CycleTimer import CycleTimer
+from funs.LogConfig import get_logger
+
+logger = get_logger("gui")
+
 
 class FontManager:
     """글꼴 관리를 위한 클래스"""
@@ -34,6 +41,7 @@ class BaseFrame:
     def __init__(self, parent, config, title, top_color, font_manager, title_fg="black"):
         self.config = config
         self.font_manager = font_manager
+        self.label_texts = {}  # 라벨별 마지막으로 표시한 글자
         
         self.frame = tk.Frame(parent, width=400, height=300, bg=config.colors["frame_bg"])
         self.frame.pack(side="left", fill="both", expand=True)
@@ -79,6 +87,12 @@ class BaseFrame:
         )
         button.pack(side="left", padx=5)
 
+    def set_label_text(self, key, text):
+        """라벨 글자가 실제로 바뀐 경우에만 configure 호출"""
+        if self.label_texts.get(key) != text:
+            self.label_texts[key] = text
+            self.labels[key].config(text=text)
+
     def clear_buttons(self):
         """모든 버튼 제거"""
         for widget in self.button_frame.winfo_children():
@@ -87,7 +101,7 @@ class BaseFrame:
 
 class DehumidFrame(BaseFrame):
     """제습 프레임 클래스"""
-    def __init__(self, parent, config, update_handler, font_manager, serial_port):
+    def __init__(self, parent, config, update_handler, font_manager, command_dispatcher):
         super().__init__(
             parent, 
             config, 
@@ -97,7 +111,7 @@ class DehumidFrame(BaseFrame):
             title_fg="white"
         )
 
-        self.serial_port = serial_port 
+        self.command_dispatcher = command_dispatcher
         self.update_handler = update_handler
         self.labels = {}
         self.dehumid_pins = [3, 7, 12]
@@ -127,45 +141,49 @@ class DehumidFrame(BaseFrame):
         self.create_button("제습 시작", self.start_dehumidification)
         self.create_button("제습 중지", self.stop_dehumidification)
 
+    def set_status(self, status):
+        """제습 상태 변경 및 UI 갱신"""
+        self.update_handler.dehumid_info["status"] = status
+        if self.update_handler.callbacks["dehumid"]:
+            self.update_handler.callbacks["dehumid"](self.update_handler.dehumid_info)
+
     def start_dehumidification(self):
-        """제습 시작 동작"""
-        try:
-            for pin in self.dehumid_pins:
-                self.serial_port.write(str(pin).encode())
-                print(f"Sent pin {pin} to Arduino.")
-                time.sleep(5)  # 각 핀 전송 후 1초 대기
-
-            self.update_handler.dehumid_info["status"] = "제습중"
-            if self.update_handler.callbacks["dehumid"]:
-                self.update_handler.callbacks["dehumid"](self.update_handler.dehumid_info)
-        except Exception as e:
-            print(f"제습 시작 중 오류 발생: {e}")
+        """제습 시작 동작 (아두이노 응답을 기다리지 않고 바로 반환)"""
+        self.set_status("명령 전송중")
+        self.command_dispatcher.turn_on(self.dehumid_pins, self.on_dehumidification_started)
+
+    def on_dehumidification_started(self, future):
+        """제습 핀 켜기 응답 처리"""
+        if future.exception():
+            logger.error("제습 시작 중 오류 발생: %s", future.exception(), extra={"event": "dehumid_start_failed"})
+            self.set_status("오류")
+        else:
+            self.set_status("제습중")
 
     def stop_dehumidification(self):
         """제습 중지 동작"""
-        try:
-            pins_to_turn_off = self.dehumid_pins
-            command = "stop " + " ".join(map(str, pins_to_turn_off))
-            self.serial_port.write(command.encode())
-            print(f"Sent stop command for pins {pins_to_turn_off} to Arduino.")
-
-            self.update_handler.dehumid_info["status"] = "대기중"
-            if self.update_handler.callbacks["dehumid"]:
-                self.update_handler.callbacks["dehumid"](self.update_handler.dehumid_info)
-        except Exception as e:
-            print(f"제습 중지 중 오류 발생: {e}")
+        self.set_status("중지중")
+        self.command_dispatcher.turn_off(self.dehumid_pins, self.on_dehumidification_stopped)
+
+    def on_dehumidification_stopped(self, future):
+        """제습 핀 끄기 응답 처리"""
+        if future.exception():
+            logger.error("제습 중지 중 오류 발생: %s", future.exception(), extra={"event": "dehumid_stop_failed"})
+            self.set_status("오류")
+        else:
+            self.set_status("대기중")
 
 
     def update_labels(self, data):
-        """제습 정보 라벨 업데이트"""
+        """제습 정보 라벨 업데이트 (글자가 바뀐 라벨만 다시 그림)"""
         for key, value in data.items():
             if key in self.labels:
-                self.labels[key].config(text=f"{key}: {value}")
+                self.set_label_text(key, f"{key}: {value}")
 
 
 class DryFrame(BaseFrame):
     """건조 프레임 클래스"""
-    def __init__(self, parent, config, update_handler, font_manager, model_handler, camera_handler, serial_port):
+    def __init__(self, parent, config, update_handler, font_manager, model_handler, camera_handler, command_dispatcher):
         super().__init__(
             parent, 
             config, 
@@ -177,11 +195,13 @@ class DryFrame(BaseFrame):
         self.update_handler = update_handler
         self.model_handler = model_handler
         self.camera_handler = camera_handler
-        self.serial_port = serial_port
+        self.command_dispatcher = command_dispatcher
 
         self.dry_pins = [3, 7, 8, 11, 13]
         
         self.class_probs = None
+        self.led_on_time = 0.0  # LED를 켠 시각 (time.monotonic 기준)
+        self.drying_request = 0  # 건조 시작 요청 번호 (중지 후 늦게 온 응답 무시용)
         self.options = ["고무", "면(합성피혁)", "가죽", "스웨이드", "AI 모드"]
         
         self.labels = {}
@@ -226,7 +246,7 @@ class DryFrame(BaseFrame):
         elif target == "가죽":
             return 70, 30
         else:
-            print("알 수 없는 재질입니다. 기본값(면)으로 건조합니다.")
+            logger.warning("알 수 없는 재질입니다. 기본값(면)으로 건조합니다: %s", target, extra={"event": "unknown_material"})
             return 75, 45
 
 
@@ -282,7 +302,7 @@ class DryFrame(BaseFrame):
     def confirm_material(self):
         """선택된 재질 확인 버튼을 클릭했을 때 출력"""
         selected_material = self.options[self.material_slider.get()]
-        print(f"확인된 재질: {selected_material}")
+        logger.info("확인된 재질: %s", selected_material, extra={"event": "material_selected"})
 
         if selected_material == 'AI 모드':
             # 버튼과 슬라이더 및 관련 라벨들 지우기
@@ -302,35 +322,40 @@ class DryFrame(BaseFrame):
 
     def set_ai_auto_mode(self):
         """AI 자동 모드 설정"""
-        # LED 키기
-        try:
-            for pin in [11]:
-                self.serial_port.write(str(pin).encode())
-                print(f"Sent pin {pin} to Arduino.")
-                time.sleep(5)  # 각 핀 전송 후 1초 대기
-        except Exception as e:
-            print(f"제습 시작 중 오류 발생: {e}")
+        # 카메라 스트림이 꺼져 있으면 미리 시작 (노출 수렴을 기다리는 동안 LED를 켬)
+        if self.camera_handler:
+            self.camera_handler.start_stream()
+
+        # LED 키기: 이 시각 이후의 프레임만 인식에 사용하고, 응답이 오면 응답 시각으로 갱신
+        self.led_on_time = time.monotonic()
+        self.command_dispatcher.turn_on([11], self.on_led_turned_on)
 
         self.clear_buttons()
         self.create_button("신발 인식하기", self.toggle_recognition)
         self.create_button("건조 중지하기", self.stop_drying)
-        print("AI 자동 모드로 전환합니다.")
+        logger.info("AI 자동 모드로 전환합니다.", extra={"event": "ai_mode"})
+
+    def on_led_turned_on(self, future):
+        """LED 켜기 응답 처리"""
+        if future.exception():
+            logger.error("LED 켜기 중 오류 발생: %s", future.exception(), extra={"event": "led_on_failed"})
+        else:
+            self.led_on_time = time.monotonic()
 
     def toggle_recognition(self):
         """신발 인식 동작"""
-        self.serial_port.write(str(10).encode())
-        time.sleep(5)
         try:
-            image_path = self.camera_handler.capture_and_crop_image()
-            if image_path:
-                self.class_probs = self.model_handler.predict_shoe_type(image_path)
+            # LED가 켜진 뒤 촬영되고 노출이 수렴된 최신 프레임 사용
+            frame = self.camera_handler.capture_frame(after=self.led_on_time)
+            if frame is not None:
+                self.class_probs = self.model_handler.predict_shoe_type_from_array(frame)
                 predicted_class = np.argmax(self.class_probs)
                 predicted_shoe_type = self.shoe_types.get(predicted_class, "알 수 없음")
                 
                 self.update_handler.dry_info["shoes_type"] = predicted_shoe_type
                 self.update_handler.image_path = f'./figs/{self.shoe_english_names[predicted_shoe_type]}.png'
         except Exception as e:
-            print(f"신발 확인 중 오류가 발생했습니다: {e}")
+            logger.error("신발 확인 중 오류가 발생했습니다: %s", e, extra={"event": "recognition_error"})
 
         self.clear_buttons()
         self.create_button("신발 확인", self.check_shoe)
@@ -339,7 +364,7 @@ class DryFrame(BaseFrame):
 
     def check_shoe(self):
         """신발 확인"""
-        print(self.update_handler.dry_info["shoes_type"])
+        logger.info("신발 종류: %s", self.update_handler.dry_info["shoes_type"], extra={"event": "shoe_checked"})
         
         self.clear_buttons()
         self.start_dryig_based_on_shoetype()
@@ -357,79 +382,69 @@ class DryFrame(BaseFrame):
         self.create_button("건조 중지하기", self.stop_drying)
 
 
-    def stop_drying(self):
-        print("건조를 중지합니다.")
-        try:
-            pins_to_turn_off = self.dry_pins
-            command = "stop " + " ".join(map(str, pins_to_turn_off))
-            self.serial_port.write(command.encode())
-            print(f"Sent stop command for pins {pins_to_turn_off} to Arduino.")
+    def set_status(self, status):
+        """건조 상태 변경 및 UI 갱신"""
+        self.update_handler.dry_info["status"] = status
+        if self.update_handler.callbacks["dry"]:
+            self.update_handler.callbacks["dry"](self.update_handler.dry_info)
 
-            self.update_handler.dry_info["status"] = "대기중"
-            self.update_handler.dry_info["remaining_time"] = 0
-            if self.update_handler.callbacks["dry"]:
-                self.update_handler.callbacks["dry"](self.update_handler.dry_info)
-        except Exception as e:
-            print(f"제습 중지 중 오류 발생: {e}")
+    def stop_drying(self):
+        logger.info("건조를 중지합니다.", extra={"event": "drying_stop"})
+        self.drying_request += 1  # 대기 중인 건조 시작 응답 무효화
+        self.update_handler.target_temp = None
+        self.update_handler.stop_drying_cycle()
+        self.set_status("중지중")
+        self.command_dispatcher.turn_off(self.dry_pins, self.on_drying_stopped)
 
         self.clear_buttons()
         self.create_initial_buttons()
 
+    def on_drying_stopped(self, future):
+        """건조 핀 끄기 응답 처리"""
+        if future.exception():
+            logger.error("건조 중지 중 오류 발생: %s", future.exception(), extra={"event": "drying_stop_failed"})
+            self.set_status("오류")
+        else:
+            self.set_status("대기중")
+
+    def start_drying(self):
+        """건조 핀을 켜는 명령을 보내고 바로 반환 (응답이 오면 건조 상태로 전환)"""
+        self.drying_request += 1
+        request = self.drying_request
+        self.set_status("명령 전송중")
+        self.command_dispatcher.turn_on(
+            self.dry_pins,
+            lambda future: self.on_drying_started(future, request)
+        )
 
-    def start_dryig_based_on_shoetype(self):
-        """건조 시작 동작"""
-        try:
-            for pin in self.dry_pins:
-                self.serial_port.write(str(pin).encode())
-                print(f"Sent pin {pin} to Arduino.")
-                time.sleep(5)  # 각 핀 전송 후 1초 대기
-            
-            self.update_handler.dry_info["status"] = "건조중"
-            if self.update_handler.callbacks["dry"]:
-                self.update_handler.callbacks["dry"](self.update_handler.dry_info)
+        self.clear_buttons()
+        self.create_button("건조 중지하기", self.stop_drying)
+        self.create_button("건조 완료", self.complete_drying)
 
+    def on_drying_started(self, future, request):
+        """건조 핀 켜기 응답 처리"""
+        if request != self.drying_request:
+            return  # 응답 전에 건조가 중지됨
+        if future.exception():
+            logger.error("건조 시작 중 오류 발생: %s", future.exception(), extra={"event": "drying_start_failed"})
+            self.set_status("오류")
+        else:
             target_time, target_temp = self.get_time_temp(self.update_handler.dry_info["shoes_type"])
             self.update_handler.target_temp = target_temp
-            self.update_handler.heating_on = True
-            self.update_handler.drying_stopped = False
-            self.update_handler.dry_info["remaining_time"] = target_time * 60
-            
-        except Exception as e:
-            print(f"제습 시작 중 오류 발생: {e}")
+            self.update_handler.start_drying_cycle(target_time * 60)
+            self.set_status("건조중")
 
-        self.clear_buttons()
-        self.create_button("건조 중지하기", self.stop_drying)
-        self.create_button("건조 완료", self.complete_drying)
         if self.update_handler.dry_info["remaining_time"] == 0:
             self.complete_drying()
 
+    def start_dryig_based_on_shoetype(self):
+        """건조 시작 동작"""
+        self.start_drying()
+
     def start_dryig_based_on_material(self, material):
         """건조 시작 동작"""
         self.update_handler.dry_info["shoes_type"] = material
-        try:
-            for pin in self.dry_pins:
-                self.serial_port.write(str(pin).encode())
-                print(f"Sent pin {pin} to Arduino.")
-                time.sleep(5)  # 각 핀 전송 후 1초 대기
-            
-            self.update_handler.dry_info["status"] = "건조중"
-            if self.update_handler.callbacks["dry"]:
-                self.update_handler.callbacks["dry"](self.update_handler.dry_info)
-
-            target_time, target_temp = self.get_time_temp(self.update_handler.dry_info["shoes_type"])
-            self.update_handler.target_temp = target_temp
-            self.update_handler.heating_on = True
-            self.update_handler.drying_stopped = False
-            self.update_handler.dry_info["remaining_time"] = target_time * 60
-            
-        except Exception as e:
-            print(f"제습 시작 중 오류 발생: {e}")
-
-        self.clear_buttons()
-        self.create_button("건조 중지하기", self.stop_drying)
-        self.create_button("건조 완료", self.complete_drying)
-        if self.update_handler.dry_info["remaining_time"] == 0:
-            self.complete_drying()
+        self.start_drying()
 
     def complete_drying(self):
         if self.update_handler.dry_info["remaining_time"] != 0:
@@ -437,10 +452,7 @@ class DryFrame(BaseFrame):
             return
         else:
             messagebox.showinfo("건조 상태", "건조 완료")
-            pins_to_turn_off = self.dry_pins
-            command = "stop " + " ".join(map(str, pins_to_turn_off))
-            self.serial_port.write(command.encode())
-            print(f"Sent stop command for pins {pins_to_turn_off} to Arduino.")
+            self.command_dispatcher.turn_off(self.dry_pins)
 
             if self.update_handler.callbacks["dry"]:
                 self.update_handler.callbacks["dry"](self.update_handler.dry_info)
@@ -448,12 +460,12 @@ class DryFrame(BaseFrame):
             self.create_initial_buttons()
 
     def update_labels(self, data):
-        """건조 정보 라벨 업데이트"""
+        """건조 정보 라벨 업데이트 (글자가 바뀐 라벨만 다시 그림)"""
         for key, value in data.items():
             if key != 'remaining_time' and key in self.labels:
-                self.labels[key].config(text=f"{key}: {value}")
+                self.set_label_text(key, f"{key}: {value}")
             elif key == 'remaining_time':
-                self.labels[key].config(text=self.format_time(value))
+                self.set_label_text(key, self.format_time(value))
 
     def format_time(self, seconds):
         """남은 시간을 '시간:분:초' 형식으로 변환"""
@@ -464,7 +476,7 @@ class DryFrame(BaseFrame):
 
 
 class ShoeCabinetGUI:
-    def __init__(self, config, update_handler, serial_port, camera_handler, model_handler):
+    def __init__(self, config, update_handler, command_dispatcher, camera_handler, model_handler):
         # 폰트 관리자 초기화
         self.font_manager = FontManager()
         
@@ -473,10 +485,16 @@ class ShoeCabinetGUI:
         self.update_handler = update_handler
         self.camera_handler = camera_handler
         self.model_handler = model_handler
-        self.serial_port = serial_port
+        self.command_dispatcher = command_dispatcher
 
         # 창 설정
         self.window = self._setup_window()
+
+        # 백그라운드 쓰레드의 UI 갱신은 모두 이 버스를 거쳐 Tk 쓰레드에서 반영
+        self.ui_bus = UIUpdateBus(self.window, max_fps=self.config.ui["max_fps"])
+
+        # 명령 완료 콜백은 Tk 쓰레드에서 실행
+        self.command_dispatcher.set_scheduler(self.ui_bus.call_soon)
         
         # 시작 버튼 생성
         self._create_start_button()
@@ -511,6 +529,9 @@ class ShoeCabinetGUI:
         self.image_label = None
         self.current_image = None
         self.class_probabilities = None
+        self.image_cache = OrderedDict()  # (경로, 크기) -> 크기를 맞춘 PhotoImage (LRU)
+        self.image_cache_size = 8
+        self.image_size = (100, 100)
         
         # 시간 대기
         time.sleep(2)
@@ -527,7 +548,7 @@ class ShoeCabinetGUI:
             self.config, 
             self.update_handler, 
             self.font_manager,
-            self.serial_port
+            self.command_dispatcher
         )
         
         self.dry_frame = DryFrame(
@@ -537,27 +558,43 @@ class ShoeCabinetGUI:
             self.font_manager,
             self.model_handler, 
             self.camera_handler,
-            self.serial_port
+            self.command_dispatcher
         )
 
         # 입력 핀 관련 위젯 추가
         self._add_pin_input_widgets()
 
+        # 신발 이미지 라벨은 하나만 만들고 이미지만 바꿔 끼움
+        self.image_label = tk.Label(self.window, bg="#f9f9f9")
+        self.image_label.place(x=500, y=100)
+        self._preload_images()
+
         # 시작 버튼 제거
         for widget in self.window.winfo_children():
             if isinstance(widget, tk.Button) and widget.cget('text') == 'Start':
                 widget.destroy()
 
-        # 업데이트 콜백 설정
+        # 업데이트 콜백 설정: 상태를 버스에 올리기만 하고 위젯 갱신은 Tk 쓰레드에서 처리
+        self.ui_bus.register("dehumid", self.dehumid_frame.update_labels)
+        self.ui_bus.register("dry", self.dry_frame.update_labels)
+        self.ui_bus.register("image", self.update_image)
         self.update_handler.set_update_callbacks(
-            self.dehumid_frame.update_labels, 
-            self.dry_frame.update_labels, 
-            self.update_image
+            lambda info: self.ui_bus.post("dehumid", info),
+            lambda info: self.ui_bus.post("dry", info),
+            lambda path: self.ui_bus.post("image", path)
         )
+        self.ui_bus.start()
+
+        # 건조 남은 시간은 센서 데이터와 별개로 Tk 타이머로 갱신
+        self.update_handler.set_cycle_timer(CycleTimer(self.window, time_scale=self.config.ui.get("time_scale", 1.0)))
         
         # 업데이트 시작
         self.update_handler.start()
 
+        # 인식 버튼을 누를 때 대기하지 않도록 카메라 스트림을 미리 시작
+        if self.camera_handler:
+            self.camera_handler.start_stream()
+
     def _add_pin_input_widgets(self):
         """핀 입력 위젯 추가"""
         self.pin_entry_label = tk.Label(
@@ -579,36 +616,53 @@ class ShoeCabinetGUI:
         )
         self.send_button.pack(pady=10)
 
+    def _preload_images(self):
+        """신발 종류 아이콘 4개를 미리 디코딩/리사이즈"""
+        for name in ("boots", "shoes", "slipper", "sneakers"):
+            try:
+                self._load_image(f'./figs/{name}.png', self.image_size)
+            except Exception as e:
+                logger.error("이미지를 불러오는 중 오류가 발생했습니다: %s", e, extra={"event": "image_load_error"})
+
+    def _load_image(self, image_path, size):
+        """크기를 맞춘 PhotoImage를 캐시에서 가져오거나 새로 만들어 캐시에 저장"""
+        key = (image_path, size)
+        if key in self.image_cache:
+            self.image_cache.move_to_end(key)
+            return self.image_cache[key]
+
+        with Image.open(image_path) as img:
+            img_tk = ImageTk.PhotoImage(img.resize(size, Image.LANCZOS))
+        self.image_cache[key] = img_tk
+        if len(self.image_cache) > self.image_cache_size:
+            self.image_cache.popitem(last=False)  # 가장 오래 쓰지 않은 이미지 제거
+        return img_tk
+
     def update_image(self, image_path):
         """이미지 업데이트"""
         if self.current_image != image_path:
             try:
+                img_tk = self._load_image(image_path, self.image_size)
+                self.image_label.config(image=img_tk)
+                self.image_label.image = img_tk  # 가비지 컬렉션 방지
                 self.current_image = image_path
-                img = Image.open(image_path)
-                img = img.resize((100, 100), Image.LANCZOS)
-                img_tk = ImageTk.PhotoImage(img)
-                
-                self.image_label = tk.Label(
-                    self.window, 
-                    image=img_tk, 
-                    bg="#f9f9f9"
-                )
-                self.image_label.image = img_tk
-                self.image_label.place(x=500, y=100)
 
             except Exception as e:
-                print(f"이미지를 불러오는 중 오류가 발생했습니다: {e}")
+                logger.error("이미지를 불러오는 중 오류가 발생했습니다: %s", e, extra={"event": "image_load_error"})
 
     def send_to_arduino(self):
         """아두이노로 핀 값 전송"""
         pin = self.pin_entry.get().strip()
         if pin.isdigit():
-            pin = int(pin)
-            self.serial_port.write(str(pin).encode())
-            print(f"Sent pin {pin} to Arduino.")
+            self.command_dispatcher.turn_on([int(pin)])
         else:
-            print("Invalid pin number.")
+            logger.warning("Invalid pin number: %s", pin, extra={"event": "invalid_pin"})
 
     def run(self):
         """GUI 실행"""
-        self.window.mainloop()
\ No newline at end of file
+        try:
+            self.window.mainloop()
+        finally:
+            self.update_handler.stop()
+            if self.camera_handler:
+                self.camera_handler.stop_camera()
@@ -0,0 +1,208 @@
+import os
+import re
+import json
+import argparse
+import numpy as np
+
+from funs.TelemetryWriter import COLUMNS, load_part
+
+BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+def to_seconds(value):
+    """'2024-12-14 18:30:00' 같은 로컬 시각 문자열을 1970-01-01 기준 초로 변환"""
+    return float(np.datetime64(value, "s").astype(np.int64))
+
+
+def to_datetime_strings(seconds):
+    """초 배열을 'YYYY-MM-DD HH:MM:SS' 문자열 배열로 변환"""
+    return np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s").astype("U19")
+
+
+class TelemetryStore:
+    """TelemetryWriter가 회전시킨 파일들을 시간 범위로 조회하는 클래스
+
+    파일마다 (시작 시각, 끝 시각)을 index.json에 캐시하고, 조회 범위와 겹치는 파일만 읽음.
+    npy 청크는 메모리 맵으로 열어 필요한 구간만 복사함. 채우는 중인 청크(.part)도 npy와 함께 읽음.
+    """
+    def __init__(self, log_dir="./logs", prefix="telemetry", source=None):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.index_path = os.path.join(log_dir, f"{prefix}-index.json")
+        self.source = source  # "npy" 또는 "csv" (None이면 npy 청크가 있으면 npy 사용)
+        self.chunks = []  # [(시작 초, 끝 초, 경로)] 시작 시각 순 정렬
+        self.refresh()
+
+    def refresh(self):
+        """로그 디렉터리를 다시 훑어 파일 인덱스 갱신 (바뀐 파일만 다시 읽음)"""
+        pattern = re.compile(rf"^{re.escape(self.prefix)}-\d{{8}}.*\.(npy|part|csv)$")
+        files = sorted(f for f in os.listdir(self.log_dir) if pattern.match(f)) if os.path.isdir(self.log_dir) else []
+        source = self.source or ("npy" if any(not f.endswith(".csv") for f in files) else "csv")
+        extensions = (".npy", ".part") if source == "npy" else (".csv",)
+
+        cache = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                cache = json.load(f)
+
+        index = {}
+        for filename in files:
+            if not filename.endswith(extensions):
+                continue
+            path = os.path.join(self.log_dir, filename)
+            stat = os.stat(path)
+            entry = cache.get(filename)
+            if not entry or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+                bounds = self._read_bounds(path)
+                if bounds is None:
+                    continue
+                entry = {"mtime": stat.st_mtime, "size": stat.st_size, "start": bounds[0], "end": bounds[1]}
+            index[filename] = entry
+
+        if index != cache:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+
+        self.chunks = sorted(
+            (entry["start"], entry["end"], os.path.join(self.log_dir, filename))
+            for filename, entry in index.items()
+        )
+        self.starts = np.array([chunk[0] for chunk in self.chunks])
+
+    def _read_bounds(self, path):
+        """파일의 첫/마지막 시각만 읽음"""
+        if path.endswith((".npy", ".part")):
+            timestamps = self._load(path)[0]
+            return (float(timestamps[0]), float(timestamps[-1])) if len(timestamps) else None
+
+        with open(path, "rb") as f:
+            f.readline()  # 헤더
+            first = f.readline()
+            if not first:
+                return None
+            # 마지막 줄은 파일 끝에서 거꾸로 찾음
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            f.seek(max(0, position - 4096))
+            last = f.read().rstrip(b"\r\n").rsplit(b"\n", 1)[-1]
+        return to_seconds(first.split(b",")[0].decode()), to_seconds(last.split(b",")[0].decode())
+
+    def _load(self, path):
+        """파일 하나를 (7, N) 배열로 읽음 (npy는 메모리 맵)"""
+        if path.endswith(".npy"):
+            return np.load(path, mmap_mode="r")
+        if path.endswith(".part"):
+            return load_part(path)
+        values = np.genfromtxt(path, delimiter=",", skip_header=1, usecols=range(1, len(COLUMNS)),
+                               filling_values=np.nan, ndmin=2)
+        timestamps = np.genfromtxt(path, delimiter=",", skip_header=1, usecols=0,
+                                   dtype="datetime64[s]", ndmin=1).astype(np.int64)
+        return np.vstack([timestamps.astype(np.float64), values.T])
+
+    def _overlapping(self, start, end):
+        # 시작 시각이 end 이하인 파일 중 끝 시각이 start 이상인 것
+        last = np.searchsorted(self.starts, end, side="right")
+        return [chunk for chunk in self.chunks[:last] if chunk[1] >= start]
+
+    def iter_range(self, start, end):
+        """[start, end] 구간의 데이터를 파일 단위 (7, n) 배열로 차례로 반환"""
+        for _, _, path in self._overlapping(start, end):
+            columns = self._load(path)
+            lo = np.searchsorted(columns[0], start, side="left")
+            hi = np.searchsorted(columns[0], end, side="right")
+            if hi > lo:
+                yield np.array(columns[:, lo:hi])
+
+    def query(self, start, end):
+        """[start, end] 구간의 원본 데이터를 (7, n) 배열로 반환"""
+        parts = list(self.iter_range(start, end))
+        if not parts:
+            return np.empty((len(COLUMNS), 0))
+        return np.concatenate(parts, axis=1)
+
+    def aggregate(self, start, end, bucket="minute"):
+        """구간을 bucket(minute/hour/day 또는 초) 단위로 나눠 센서별 최소/최대/평균 계산
+
+        반환: {"timestamp": 구간 시작 초 배열, "min"/"max"/"mean": (구간 수, 6) 배열, "count": 유효 표본 수}
+        """
+        width = BUCKETS.get(bucket, bucket)
+        partials = []
+        for columns in self.iter_range(start, end):
+            # 파일마다 부분 집계 후 마지막에 합침 (전체 데이터를 한 번에 올리지 않음)
+            partials.append(self._reduce(np.floor(columns[0] / width) * width, columns[1:].T))
+
+        if not partials:
+            empty = np.empty((0, len(COLUMNS) - 1))
+            return {"timestamp": np.empty(0), "min": empty, "max": empty, "mean": empty, "count": empty}
+
+        keys = np.concatenate([p[0] for p in partials])
+        minimum = np.concatenate([p[1] for p in partials])
+        maximum = np.concatenate([p[2] for p in partials])
+        total = np.concatenate([p[3] for p in partials])
+        count = np.concatenate([p[4] for p in partials])
+
+        # 파일 경계에 걸친 구간 병합
+        unique_keys, starts = np.unique(keys, return_index=True)
+        minimum = np.fmin.reduceat(minimum, starts, axis=0)
+        maximum = np.fmax.reduceat(maximum, starts, axis=0)
+        total = np.add.reduceat(total, starts, axis=0)
+        count = np.add.reduceat(count, starts, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+        return {"timestamp": unique_keys, "min": minimum, "max": maximum, "mean": mean, "count": count}
+
+    @staticmethod
+    def _reduce(keys, values):
+        """정렬된 구간 키별로 NaN을 제외한 최소/최대/합/개수 계산"""
+        unique_keys, starts = np.unique(keys, return_index=True)
+        valid = ~np.isnan(values)
+        minimum = np.fmin.reduceat(values, starts, axis=0)
+        maximum = np.fmax.reduceat(values, starts, axis=0)
+        total = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+        count = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        return unique_keys, minimum, maximum, total, count
+
+
+def export(store, start, end, out_path, bucket=None):
+    """구간 데이터를 CSV로 내보내기 (bucket을 주면 구간별 최소/최대/평균)"""
+    if bucket:
+        result = store.aggregate(start, end, bucket)
+        names = COLUMNS[1:]
+        header = ["Timestamp"] + [f"{name}_{stat}" for stat in ("min", "max", "mean") for name in names]
+        table = np.hstack([result["min"], result["max"], result["mean"]])
+        timestamps = result["timestamp"]
+    else:
+        columns = store.query(start, end)
+        header = COLUMNS
+        table = columns[1:].T
+        timestamps = columns[0]
+
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(header) + "\n")
+        for timestamp, row in zip(to_datetime_strings(timestamps), table):
+            f.write(timestamp + "," + ",".join("" if np.isnan(v) else f"{v:g}" for v in row) + "\n")
+    return len(timestamps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="텔레메트리 로그 구간 내보내기")
+    parser.add_argument("--log-dir", default="./logs")
+    parser.add_argument("--prefix", default="telemetry")
+    parser.add_argument("--source", choices=["npy", "csv"], default=None)
+    parser.add_argument("--start", required=True, help="예: '2024-12-14 00:00:00'")
+    parser.add_argument("--end", required=True, help="예: '2024-12-15 00:00:00'")
+    parser.add_argument("--bucket", default=None, help="minute, hour, day 또는 초 단위 숫자")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    bucket = args.bucket
+    if bucket and bucket not in BUCKETS:
+        bucket = float(bucket)
+
+    store = TelemetryStore(args.log_dir, args.prefix, args.source)
+    rows = export(store, to_seconds(args.start), to_seconds(args.end), args.out, bucket)
+    print(f"{rows}개 행을 {args.out}에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import csv
+import time
+import threading
+import numpy as np
+
+from funs.Metrics import metrics
+from funs.LogConfig import get_logger
+
+logger = get_logger("telemetry")
+
+COLUMNS = ["Timestamp", "Sensor1_Temperature", "Sensor1_Humidity", "Sensor2_Temperature", "Sensor2_Humidity", "Sensor3_Temperature", "Sensor3_Humidity"]
+
+
+class TelemetryWriter:
+    """센서 데이터를 메모리에 모았다가 한 번에 기록하는 클래스 (일/용량 단위로 파일 회전)
+
+    - csv: 하루(또는 max_bytes)마다 새 파일, 파일 핸들을 열어둔 채 flush_rows/flush_interval마다 기록
+    - npy: chunk_rows마다 (7, N) float64 배열 청크 파일 (행 = 열 데이터, 0행은 로컬 시각 기준 초)
+      채우는 중인 청크는 기록할 때마다 새 행만 .part 파일(float64 행 단위 원시 데이터)에 덧붙이고,
+      청크가 차면 .npy로 한 번 저장한 뒤 .part 삭제. 비정상 종료로 남은 .part는 다음 시작 시 .npy로 변환
+    """
+    def __init__(self, log_dir="./logs", prefix="telemetry", formats=("csv",),
+                 flush_rows=30, flush_interval=60.0, chunk_rows=1800, max_bytes=10 * 1024 * 1024):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.formats = tuple(formats)
+        self.flush_rows = flush_rows  # 이 행 수만큼 모이면 기록
+        self.flush_interval = flush_interval  # 마지막 기록 후 이 시간(초)이 지나면 기록
+        self.chunk_rows = chunk_rows  # npy 청크 하나의 최대 행 수
+        self.max_bytes = max_bytes  # csv 파일 하나의 최대 크기
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.pending = []  # 아직 기록하지 않은 행 [(datetime, 값 6개), ...]
+        self.chunk = []  # 아직 npy 청크로 기록하지 않은 행
+        self.part_file = None  # 채우는 중인 청크의 .part 파일
+        self.last_flush = time.monotonic()
+        self.current_day = None
+        self.csv_file = None
+        self.csv_writer = None
+        self.csv_index = 0  # 같은 날 용량 초과로 회전한 횟수
+        if "npy" in self.formats:
+            recover_parts(self.log_dir, self.prefix)
+
+    def write(self, timestamp, values):
+        """한 행 추가 (values: 센서1~3 온도/습도 6개, 값이 없으면 None)"""
+        with self.lock:
+            day = timestamp.strftime("%Y%m%d")
+            if day != self.current_day:
+                # 날짜가 바뀌면 이전 날의 데이터를 모두 기록하고 파일 회전
+                self._flush()
+                self._flush_chunk()
+                self._close_csv()
+                self.current_day = day
+                self.csv_index = 0
+
+            self.pending.append((timestamp, values))
+            if len(self.pending) >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        """남은 데이터를 모두 기록하고 파일 닫기"""
+        with self.lock:
+            self._flush()
+            self._flush_chunk()
+            self._close_csv()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        metrics.count("telemetry_rows", len(self.pending))
+        try:
+            with metrics.timer("telemetry_flush"):
+                self._write_pending()
+        except Exception as e:
+            logger.error("Failed to save telemetry: %s", e, extra={"event": "flush_failed"})
+        self.pending = []
+        self.last_flush = time.monotonic()
+
+    def _write_pending(self):
+        if "csv" in self.formats:
+            self._write_csv(self.pending)
+        if "npy" in self.formats:
+            self._append_part(self.pending)
+            self.chunk.extend(self.pending)
+            if len(self.chunk) >= self.chunk_rows:
+                self._flush_chunk()
+
+    def _csv_path(self):
+        suffix = f"-{self.csv_index}" if self.csv_index else ""
+        return os.path.join(self.log_dir, f"{self.prefix}-{self.current_day}{suffix}.csv")
+
+    def _open_csv(self):
+        # 재시작 시 이미 가득 찬 파일은 건너뜀
+        while os.path.exists(self._csv_path()) and os.path.getsize(self._csv_path()) >= self.max_bytes:
+            self.csv_index += 1
+        path = self._csv_path()
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        # 재시작해도 기존 기록을 지우지 않도록 이어쓰기
+        self.csv_file = open(path, mode='a', newline='', encoding='utf-8')
+        self.csv_writer = csv.writer(self.csv_file)
+        if is_new:
+            self.csv_writer.writerow(COLUMNS)
+
+    def _close_csv(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+
+    def _write_csv(self, rows):
+        if self.csv_file is None:
+            self._open_csv()
+        self.csv_writer.writerows(
+            [timestamp.strftime("%Y-%m-%d %H:%M:%S"), *values] for timestamp, values in rows
+        )
+        self.csv_file.flush()
+        if self.csv_file.tell() >= self.max_bytes:
+            # 용량 초과 시 같은 날짜의 다음 번호 파일로 회전
+            self._close_csv()
+            self.csv_index += 1
+
+    def _chunk_path(self, extension):
+        first = self.chunk[0][0] if self.chunk else self.pending[0][0]
+        return os.path.join(self.log_dir, f"{self.prefix}-{first.strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+    def _append_part(self, rows):
+        """새 행만 .part 파일 끝에 덧붙임 (fsync 없이 OS 버퍼에 맡김)"""
+        if self.part_file is None:
+            self.part_file = open(self._chunk_path("part"), "ab")
+        self.part_file.write(rows_to_array(rows).tobytes())
+        self.part_file.flush()
+
+    def _flush_chunk(self):
+        """모인 행을 열 단위 배열 하나로 저장하고 .part 삭제"""
+        if not self.chunk:
+            return
+        save_chunk(self._chunk_path("npy"), rows_to_array(self.chunk).T)
+        if self.part_file is not None:
+            self.part_file.close()
+            os.remove(self.part_file.name)
+            self.part_file = None
+        self.chunk = []
+
+
+def rows_to_array(rows):
+    """[(datetime, 값 6개), ...] -> (N, 7) float64 (0열은 로컬 시각 기준 초)"""
+    array = np.empty((len(rows), len(COLUMNS)), dtype=np.float64)
+    # 시간대 없이 로컬 시각 그대로 1970-01-01 기준 초로 저장 (csv의 시각 문자열과 같은 기준)
+    array[:, 0] = np.array([timestamp for timestamp, _ in rows], dtype="datetime64[s]").astype(np.int64)
+    array[:, 1:] = np.array(
+        [[np.nan if value is None else value for value in values] for _, values in rows],
+        dtype=np.float64
+    )
+    return array
+
+
+def load_part(path):
+    """.part 파일을 (7, N) 배열로 읽음 (쓰다 만 마지막 행은 버림)"""
+    data = np.fromfile(path, dtype=np.float64)
+    rows = len(data) // len(COLUMNS)
+    return data[:rows * len(COLUMNS)].reshape(rows, len(COLUMNS)).T
+
+
+def save_chunk(path, columns):
+    """청크 하나를 저장 (임시 파일에 쓴 뒤 교체해서 반쯤 쓴 .npy가 남지 않게 함, 청크당 한 번)"""
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, columns)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def recover_parts(log_dir, prefix):
+    """비정상 종료로 남은 .part 파일을 .npy 청크로 변환"""
+    for filename in sorted(os.listdir(log_dir)):
+        if not (filename.startswith(prefix + "-") and filename.endswith(".part")):
+            continue
+        path = os.path.join(log_dir, filename)
+        npy_path = path[:-len(".part")] + ".npy"
+        try:
+            columns = load_part(path)
+            if columns.shape[1] and not os.path.exists(npy_path):
+                save_chunk(npy_path, columns)
+            os.remove(path)
+            logger.info("남아 있던 텔레메트리 청크 복구: %s (%d행)", npy_path, columns.shape[1],
+                        extra={"event": "part_recovered"})
+        except Exception as e:
+            logger.error("텔레메트리 청크 복구 실패: %s (%s)", path, e, extra={"event": "part_recover_failed"})
@@ -0,0 +1,73 @@
+import threading
+
+from funs.Metrics import metrics
+from funs.LogConfig import get_logger
+
+logger = get_logger("ui")
+
+
+class UIUpdateBus:
+    """백그라운드 쓰레드의 UI 갱신 요청을 모아 Tk 쓰레드에서 일정 주기로 반영하는 클래스
+
+    - post(): 채널별로 가장 최근 상태만 남김 (한 주기 안의 중복 갱신은 한 번으로 합쳐짐)
+    - call_soon(): 다음 주기에 Tk 쓰레드에서 함수 실행
+    Tk 위젯은 _pump()에서만, 즉 Tk 쓰레드에서만 건드림.
+    """
+    def __init__(self, window, max_fps=10):
+        self.window = window
+        self.interval = max(1, int(1000 / max_fps))  # 갱신 주기 (ms)
+        self.lock = threading.Lock()
+        self.latest = {}  # 채널 -> 최신 상태
+        self.calls = []  # Tk 쓰레드에서 실행할 (함수, 인자)
+        self.handlers = {}  # 채널 -> 상태를 반영할 함수
+        self.running = False
+
+    def register(self, channel, handler):
+        """채널의 상태를 반영할 함수 등록"""
+        self.handlers[channel] = handler
+
+    def post(self, channel, snapshot):
+        """어느 쓰레드에서든 호출 가능: 채널의 최신 상태 갱신"""
+        if isinstance(snapshot, dict):
+            snapshot = dict(snapshot)  # 호출 쪽에서 이후에 바꿔도 영향 없도록 복사
+        with self.lock:
+            self.latest[channel] = snapshot
+        metrics.count("ui_posts", channel=channel)
+
+    def call_soon(self, func, *args):
+        """어느 쓰레드에서든 호출 가능: 다음 주기에 Tk 쓰레드에서 func(*args) 실행"""
+        with self.lock:
+            self.calls.append((func, args))
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.window.after(self.interval, self._pump)
+
+    def stop(self):
+        self.running = False
+
+    def _pump(self):
+        with self.lock:
+            latest, self.latest = self.latest, {}
+            calls, self.calls = self.calls, []
+
+        for func, args in calls:
+            try:
+                with metrics.timer("ui_callback", channel="call_soon"):
+                    func(*args)
+            except Exception as e:
+                logger.exception("UI 작업 실행 중 오류 발생: %s", e, extra={"event": "call_failed"})
+
+        for channel, snapshot in latest.items():
+            handler = self.handlers.get(channel)
+            if handler:
+                try:
+                    with metrics.timer("ui_callback", channel=channel):
+                        handler(snapshot)
+                except Exception as e:
+                    logger.exception("UI 갱신 중 오류 발생 (%s): %s", channel, e,
+                                     extra={"event": "update_failed", "channel": channel})
+
+        if self.running:
+            self.window.after(self.interval, self._pump)
@@ -1,55 +1,53 @@
 import threading
-import time
-import csv
 from datetime import datetime
 
+from funs.Metrics import metrics
+from funs.LogConfig import get_logger
+
+logger = get_logger("update")
+
 class UpdateHandler:
     """시리얼 데이터 업데이트를 관리하는 클래스"""
-    def __init__(self, serial_comm, image_path, model_handler, csv_name):
+    def __init__(self, serial_comm, image_path, model_handler, telemetry_writer=None, command_dispatcher=None,
+                 heater_controller=None):
         self.serial_comm = serial_comm
+        self.command_dispatcher = command_dispatcher  # 전송 형식 협상용
+        self.heater_controller = heater_controller  # 히터 제어 루프 (HeaterController)
         self.dehumid_info = {"temp": "25°C", "humid": "40%", "status": "대기중"}
         self.dry_info = {"temp": "35°C", "humid": "20%", "status": "대기중", "shoes_type": "운동화", "remaining_time": 999}
         self.image_path = image_path  # 이미지 경로 추가
         self.callbacks = {"dehumid": None, "dry": None, "image": None}  # 이미지 업데이트 콜백 추가
         self.data = {}
-        self.csv_file = csv_name
+        self.telemetry_writer = telemetry_writer  # 센서 기록 (None이면 기록하지 않음)
         self.model_handler = model_handler  # ModelHandler 인스턴스를 전달받음
-        self.init_csv_file()
-        self.heating_on = False  # 히터가 켜져 있는지 여부
-        self.drying_stopped = False  # 건조 중지 여부
-        self.target_temp = None
-
-    def init_csv_file(self):
-        # CSV 파일 초기화: 파일이 없으면 헤더를 추가
-        try:
-            with open(self.csv_file, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(["Timestamp", "Sensor1_Temperature", "Sensor1_Humidity", "Sensor2_Temperature", "Sensor2_Humidity",  "Sensor3_Temperature", "Sensor3_Humidity"])
-            print(f"{self.csv_file} initialized successfully.")
-        except Exception as e:
-            print(f"Failed to initialize CSV file: {e}")
+        self.cycle_timer = None  # 건조 남은 시간 타이머 (CycleTimer)
 
     def save_to_csv(self):
-        # 센서 데이터를 CSV 파일에 저장
-        if "sensor1" in self.data:
-            sensor1 = self.data["sensor1"]
-            temperature1 = sensor1.get("temperature", None)
-            humidity1 = sensor1.get("humidity", None)
-
-            sensor2 = self.data["sensor2"]
-            temperature2 = sensor2.get("temperature", None)
-            humidity2 = sensor2.get("humidity", None)
-
-            sensor3 = self.data["sensor3"]
-            temperature3 = sensor3.get("temperature", None)
-            humidity3 = sensor3.get("humidity", None)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            try:
-                with open(self.csv_file, mode='a', newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-                    writer.writerow([timestamp, temperature1, humidity1, temperature2, humidity2, temperature3, humidity3])
-            except Exception as e:
-                print(f"Failed to save data to CSV: {e}")
+        # 센서 데이터를 기록기에 전달 (파일 기록은 모아서 한 번에 수행)
+        if "sensor1" in self.data and self.telemetry_writer:
+            values = []
+            for sensor in ("sensor1", "sensor2", "sensor3"):
+                sensor_data = self.data.get(sensor, {})
+                values.append(sensor_data.get("temperature", None))
+                values.append(sensor_data.get("humidity", None))
+            self.telemetry_writer.write(datetime.now(), values)
+
+    def stop(self):
+        """종료 시 남은 센서 기록을 파일에 저장"""
+        if self.heater_controller:
+            self.heater_controller.stop()
+        if self.telemetry_writer:
+            self.telemetry_writer.close()
+
+    @property
+    def target_temp(self):
+        """건조 목표 온도 (히터 제어 루프의 setpoint)"""
+        return self.heater_controller.setpoint if self.heater_controller else None
+
+    @target_temp.setter
+    def target_temp(self, value):
+        if self.heater_controller:
+            self.heater_controller.set_setpoint(value)
 
     def set_update_callbacks(self, dehumid_callback, dry_callback, image_callback):
         """UI 업데이트를 위한 콜백 함수 등록"""
@@ -60,54 +58,72 @@ class UpdateHandler:
     def start(self):
         """데이터 업데이트를 주기적으로 수행하는 쓰레드 시작"""
         if self.serial_comm:  # serial_comm이 None이 아닌 경우에만 데이터 업데이트 시작
+            self.serial_comm.add_reopen_listener(self.negotiate_protocol)
+            self.serial_comm.start_reader()  # 수신 쓰레드가 완성된 데이터 줄을 큐로 전달
+            self.negotiate_protocol()
             self.update_thread = threading.Thread(target=self.update_data_loop, daemon=True)
             self.update_thread.start()
+            if self.heater_controller:
+                self.heater_controller.start()
+        else:
+            logger.warning("Serial communication not initialized. Skipping data update.", extra={"event": "no_serial"})
 
-            # self.update_dry_time()  # 남은 시간 갱신 시작
+    def negotiate_protocol(self):
+        """설정된 전송 형식 요청 (시작할 때와 포트를 다시 열어 아두이노가 리셋됐을 때)"""
+        if self.serial_comm.protocol != "json" and self.command_dispatcher:
+            # 펌웨어가 지원하지 않으면 오류 응답을 받고 JSON 형식을 유지
+            self.command_dispatcher.set_protocol(self.serial_comm.protocol, self.on_protocol_set)
+
+    def on_protocol_set(self, future):
+        if future.exception():
+            logger.warning("전송 형식 협상 실패, JSON 형식을 사용합니다: %s", future.exception(), extra={"event": "protocol_failed"})
         else:
-            print("Serial communication not initialized. Skipping data update.")
+            logger.info("텔레메트리 전송 형식: %s", future.result()[0], extra={"event": "protocol_set"})
 
     def update_data_loop(self):
         """데이터를 주기적으로 가져와 콜백을 호출"""
         while self.serial_comm:  # serial_comm이 None이 아니면 데이터를 계속 읽음
             try:
-                # 시리얼 데이터 읽기
-                line = self.serial_comm.read_data()
+                # 수신 큐에서 다음 데이터 줄을 기다림 (데이터가 없으면 CPU를 쓰지 않고 대기)
+                line = self.serial_comm.get_frame(timeout=5)
                 if line:
-                    self.serial_comm.parse_data(line)
-                    data = self.serial_comm.get_data()
-
-                    # Debug: 받은 데이터 확인
-                    # print(f"수신 데이터: {data}")
-
-                    # sensor3 데이터 -> 제습 프레임 업데이트
-                    if "sensor1" in data:
-                        sensor1 = data["sensor1"]
-                        self.dehumid_info["temp"] = f"{sensor1['temperature']}°C"
-                        self.dehumid_info["humid"] = f"{sensor1['humidity']}%"
-                        if self.callbacks["dehumid"]:
-                            self.callbacks["dehumid"](self.dehumid_info)
-
-                    # sensor2 데이터 -> 건조 프레임 업데이트
-                    if "sensor2" in data:
-                        sensor2 = data["sensor2"]
-                        self.dry_info["temp"] = f"{sensor2['temperature']}°C"
-                        self.dry_info["humid"] = f"{sensor2['humidity']}%"
-                        if self.callbacks["dry"]:
-                            self.callbacks["dry"](self.dry_info)
-
-                    self.check_shoetype()
-
-                    self.data = data
-                    self.save_to_csv()
-                    # 1초 대기
-                    time.sleep(1)
-
-                    self.check_heating()
-                    self.update_dry_time()  # 남은 시간 갱신 시작
+                    with metrics.timer("update_frame"):
+                        self.handle_frame(line)
 
             except Exception as e:
-                print(f"데이터 업데이트 중 오류 발생: {e}")
+                logger.error("데이터 업데이트 중 오류 발생: %s", e, extra={"event": "update_error"})
+
+    def handle_frame(self, line):
+        """수신한 센서 데이터 한 개(JSON 줄 또는 바이너리 프레임) 처리"""
+        self.serial_comm.parse_data(line)
+        data = self.serial_comm.get_data()
+
+        # Debug: 받은 데이터 확인
+        # logger.debug("수신 데이터: %s", data)
+
+        # sensor3 데이터 -> 제습 프레임 업데이트
+        if "sensor1" in data:
+            sensor1 = data["sensor1"]
+            self.dehumid_info["temp"] = f"{sensor1['temperature']}°C"
+            self.dehumid_info["humid"] = f"{sensor1['humidity']}%"
+            if self.callbacks["dehumid"]:
+                self.callbacks["dehumid"](self.dehumid_info)
+
+        # sensor2 데이터 -> 건조 프레임 업데이트
+        if "sensor2" in data:
+            sensor2 = data["sensor2"]
+            self.dry_info["temp"] = f"{sensor2['temperature']}°C"
+            self.dry_info["humid"] = f"{sensor2['humidity']}%"
+            if self.callbacks["dry"]:
+                self.callbacks["dry"](self.dry_info)
+
+        self.check_shoetype()
+
+        self.data = data
+        self.save_to_csv()
+
+        if self.heater_controller:
+            self.heater_controller.update_measurements(data)
 
     def check_shoetype(self):
         # 이미지 경로 업데이트 및 신발 유형 예측
@@ -123,49 +139,36 @@ class UpdateHandler:
         if self.callbacks["image"]:
             self.callbacks["image"](self.image_path)  # 이미지 경로를 업데이트하는 콜백 호출
 
-    def update_dry_time(self):
-        """남은 시간을 1초씩 갱신"""
-        if self.dry_info["remaining_time"] > 0 and not self.drying_stopped:
-            self.dry_info["remaining_time"] -= 1
-            if self.callbacks["dry"]:
-                self.callbacks["dry"](self.dry_info)  # UI 갱신을 위한 콜백 호출
-        else:
-            self.dry_info["status"] = "건조 완료"
-            if self.callbacks["dry"]:
-                self.callbacks["dry"](self.dry_info)  # 상태 변경 후 UI 갱신
-            self.target_temp = None
-
-    def check_heating(self):
-        """히터 제어 및 온도 체크"""
-        if self.target_temp:
-            current_temp = float(self.dry_info["temp"].replace("°C", ""))
-
-            if current_temp > self.target_temp and self.heating_on:
-                self.heating_on = False
-                print("온도가 너무 높아서 히터를 끕니다.")
-                command = "stop " + " ".join(map(str, [8]))
-                self.serial_comm.ser.write(command.encode())
-                print(f"Sent stop command for pins {[8]} to Arduino.")
-                threading.Timer(60, self.check_temperature).start()  # 1분 후 온도 다시 확인
-            elif current_temp < self.target_temp and not self.heating_on:
-                self.heating_on = True
-                print("온도가 낮아서 히터를 켭니다.")
-                for pin in [8]:
-                    self.serial_comm.ser.write(str(pin).encode())
-                    print(f"Sent pin {pin} to Arduino.")
-                    time.sleep(5)  # 각 핀 전송 후 1초 대기
-
-    def check_temperature(self):
-        """히터 끄고 1분 후 온도 재확인"""
-        if self.target_temp:
-            current_temp = float(self.dry_info["temp"].replace("°C", ""))
-            if current_temp > self.target_temp:
-                print("온도가 여전히 너무 높습니다. 다시 1분 기다립니다.")
-                threading.Timer(60, self.check_temperature).start()
-            else:
-                print("온도가 적정 범위에 도달했습니다. 히터를 다시 켭니다.")
-                self.heating_on = True
-                for pin in [8]:
-                    self.serial_comm.ser.write(str(pin).encode())
-                    print(f"Sent pin {pin} to Arduino.")
-                    time.sleep(5)  # 각 핀 전송 후 1초 대기
+    def set_cycle_timer(self, cycle_timer):
+        """건조 남은 시간 타이머 등록 (Tk 창이 만들어진 뒤 GUI에서 설정)"""
+        self.cycle_timer = cycle_timer
+        self.cycle_timer.on_tick = self.on_dry_time_tick
+        self.cycle_timer.on_complete = self.on_drying_complete
+
+    def start_drying_cycle(self, duration):
+        """duration초짜리 건조 사이클 시작"""
+        self.cycle_timer.start(duration)
+
+    def pause_drying_cycle(self):
+        self.cycle_timer.pause()
+
+    def resume_drying_cycle(self):
+        self.cycle_timer.resume()
+
+    def stop_drying_cycle(self):
+        """건조 사이클 취소"""
+        self.cycle_timer.cancel()
+        self.on_dry_time_tick(0)
+
+    def on_dry_time_tick(self, remaining):
+        """타이머가 1초마다 호출: 남은 시간 표시 갱신"""
+        self.dry_info["remaining_time"] = remaining
+        if self.callbacks["dry"]:
+            self.callbacks["dry"](self.dry_info)  # UI 갱신을 위한 콜백 호출
+
+    def on_drying_complete(self):
+        """마감 시각에 정확히 호출: 건조 완료 처리"""
+        self.dry_info["status"] = "건조 완료"
+        self.target_temp = None
+        if self.callbacks["dry"]:
+            self.callbacks["dry"](self.dry_info)  # 상태 변경 후 UI 갱신
@@ -1,20 +1,46 @@
 # main.py
 
 from funs.utils import load_yaml
+from funs.Metrics import metrics
+from funs.LogConfig import setup_logging, shutdown_logging
 from funs.ShoeCabinetGUI import ShoeCabinetGUI
 from funs.SerialComm import SerialComm 
+from funs.CommandDispatcher import CommandDispatcher
+from funs.TelemetryWriter import TelemetryWriter
+from funs.HeaterController import HeaterController
 from funs.UpdateHandler import UpdateHandler
 from funs.CameraHandler import CameraHandler
-from funs.ModelHandler import ModelHandler
+from funs.ModelHandler import ModelHandler, select_model_variant
 
 def main(config):
-    serial_comm = SerialComm(port='/dev/ttyACM0', baudrate=9600, timeout=1)
-    camera_handler = CameraHandler(save_dir="./data")
-    model_handler = ModelHandler(model_path="./model/model_1214_1830.tflite")
-    data_updater = UpdateHandler(serial_comm, './figs/sneakers.png', model_handler, 'foo.csv')
+    setup_logging(**config.logging)
+    metrics.configure(**config.metrics)
+    serial_comm = SerialComm(
+        port=config.serial["port"],
+        baudrate=config.serial["baudrate"],
+        timeout=1,
+        protocol=config.serial["protocol"]
+    )
+    command_dispatcher = CommandDispatcher(serial_comm)
+    camera_handler = CameraHandler(
+        save_dir="./data",
+        debug=config.camera["debug"],
+        recognition_size=config.camera["recognition_size"],
+        crop_width=config.camera["crop_width"]
+    )
+    model_handler = ModelHandler(model_path=select_model_variant(**config.model))
+    telemetry_writer = TelemetryWriter(**config.telemetry)
+    heater_controller = HeaterController(command_dispatcher, **config.heater)
+    data_updater = UpdateHandler(
+        serial_comm, './figs/sneakers.png', model_handler, telemetry_writer, command_dispatcher, heater_controller
+    )
 
-    app = ShoeCabinetGUI(config, data_updater, serial_comm.ser, camera_handler, model_handler)
-    app.run()
+    app = ShoeCabinetGUI(config, data_updater, command_dispatcher, camera_handler, model_handler)
+    try:
+        app.run()
+    finally:
+        metrics.stop()
+        shutdown_logging()
 
 if __name__ == "__main__":
     # config.yaml에서 설정 파일 로드
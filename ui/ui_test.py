@@ -1,15 +1,52 @@
-# main.py
+# ui_test.py
+# 아두이노 없이 시뮬레이터(pty 가짜 시리얼)로 전체 흐름 실행
 
 from funs.utils import load_yaml
+from funs.LogConfig import setup_logging, shutdown_logging
 from funs.ShoeCabinetGUI import ShoeCabinetGUI
+from funs.SerialComm import SerialComm
+from funs.CommandDispatcher import CommandDispatcher
+from funs.TelemetryWriter import TelemetryWriter
+from funs.HeaterController import HeaterController
 from funs.UpdateHandler import UpdateHandler
-from funs.ModelHandler import ModelHandler
+from funs.CameraHandler import CameraHandler, FakeCamera
+from funs.ModelHandler import ModelHandler, select_model_variant
+from funs.HardwareSimulator import CabinetSimulator, ThermalModel
 
 def main(config):
-    model_handler = ModelHandler()
-    data_updater = UpdateHandler(None, './figs/sneakers.png', model_handler)
-    app = ShoeCabinetGUI(config, data_updater, None, None, None)
-    app.run()
+    setup_logging(**config.logging)
+    speedup = config.simulator["speedup"]
+    simulator = CabinetSimulator(
+        speedup=speedup,
+        model=ThermalModel(config.simulator["ambient_temp"], config.simulator["ambient_humid"]),
+        nan_rate=config.simulator["nan_rate"],
+        seed=config.simulator["seed"]
+    )
+    port = simulator.start()
+    print(f"시뮬레이터 포트: {port} (x{speedup:g})")
+
+    serial_comm = SerialComm(port=port, baudrate=config.serial["baudrate"], timeout=1, protocol=config.serial["protocol"])
+    command_dispatcher = CommandDispatcher(serial_comm)
+    camera_handler = CameraHandler(
+        save_dir="./data",
+        camera=FakeCamera('./figs/sneakers.png'),  # 512x512 이미지라 크롭하지 않음
+        recognition_size=config.camera["recognition_size"],
+        crop_width=0
+    )
+    model_handler = ModelHandler(model_path=select_model_variant(**config.model))
+    telemetry_writer = TelemetryWriter(**{**config.telemetry, "log_dir": "./logs/simulator"})
+    heater_controller = HeaterController(command_dispatcher, **config.heater, time_scale=speedup)
+    data_updater = UpdateHandler(
+        serial_comm, './figs/sneakers.png', model_handler, telemetry_writer, command_dispatcher, heater_controller
+    )
+
+    config.ui["time_scale"] = speedup  # 건조 타이머도 같은 배율로 진행
+    app = ShoeCabinetGUI(config, data_updater, command_dispatcher, camera_handler, model_handler)
+    try:
+        app.run()
+    finally:
+        simulator.close()
+        shutdown_logging()
 
 if __name__ == "__main__":
     # config.yaml에서 설정 파일 로드